@@ -0,0 +1,61 @@
+"""MongoDB aggregation pipelines for the analytics endpoints.
+
+Set counts, volume and calories are computed once per workout at write
+time (see ``workout_totals.py``), so the pipelines only add up the stored
+workout totals and never unwind entries or sets.
+"""
+
+from typing import List
+
+
+def workout_day() -> dict:
+    """The calendar day of a workout, ignoring any time component."""
+    return {"$substrCP": [{"$ifNull": ["$date", ""]}, 0, 10]}
+
+
+def _totals_group(key) -> dict:
+    return {
+        "$group": {
+            "_id": key,
+            "workouts": {"$sum": 1},
+            "sets": {"$sum": "$total_sets"},
+            "volume": {"$sum": "$total_volume"},
+            "calories": {"$sum": "$total_calories"},
+        }
+    }
+
+
+def stats_pipeline(query: dict) -> List[dict]:
+    """Single round trip for ``/api/stats`` and ``/api/dashboard``.
+
+    Returns one document with the workout, entry and set counters and the
+    volume and calorie totals. Streaks and day counts come from
+    ``streaks.py``. Only the stored totals and the entry count leave the
+    ``$match``, not the entries and their sets.
+    """
+    group = _totals_group(None)
+    group["$group"]["exercises"] = {"$sum": "$entries"}
+    project = {
+        "$project": {
+            "_id": 0,
+            "entries": {"$size": {"$ifNull": ["$entries", []]}},
+            "total_sets": 1,
+            "total_volume": 1,
+            "total_calories": 1,
+        }
+    }
+    return [{"$match": query}, project, group]
+
+
+def daily_workout_counts_pipeline() -> List[dict]:
+    """Number of workouts per day across the whole collection."""
+    return [{"$group": {"_id": workout_day(), "workouts": {"$sum": 1}}}]
+
+
+def daily_totals_pipeline() -> List[dict]:
+    """Rollup totals (workouts, sets, volume, calories) per day, in the
+    shape of the ``daily_rollups`` documents."""
+    return [
+        _totals_group(workout_day()),
+        {"$addFields": {"date": "$_id"}},
+    ]
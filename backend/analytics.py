@@ -0,0 +1,304 @@
+"""Columnar (NumPy) workout analytics for large histories.
+
+With ``ANALYTICS_ENGINE=columnar`` the stats, trends, progress and
+dashboard endpoints are answered from arrays held in the worker process
+instead of by the storage backend. ``ColumnarAnalytics`` reads the whole
+history from the repository's ``export`` once per ``workouts`` data
+version and loads its sets into columns, one chunk of workouts at a time:
+
+    entry                  the set's entry (row of the entry columns)
+    category               ``STRENGTH`` or ``CARDIO``, from its entry
+    weight, reps, duration, distance
+
+Each chunk is reduced right away with vectorized group-bys (``np.bincount``
+and ``np.maximum.at``) to the entry columns (exercise, day and the totals
+of ``workout_totals.py``) and the workout columns (date, entries, sets and
+the dashboard volume and calories), so memory grows with the number of
+entries, not sets. The calorie formulas of ``calories.py`` are applied as
+array expressions; only their final rounding goes through Python's
+``round`` (once per distinct value), since ``np.round`` rounds some halves
+differently. Workouts are kept sorted by date and entries by (exercise,
+day), so a request is two binary searches plus a reduction over the rows
+in its window.
+
+Reloading reads the full history, so the engine suits read-heavy
+deployments with long histories; writes only cost the next reader a
+reload, and the response cache (``response_cache.py``) still answers
+repeated requests before they get here.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rollups import rounded_rollup
+
+STRENGTH = 0
+CARDIO = 1
+
+# Workouts loaded into set columns before they are reduced
+CHUNK_SIZE = 1000
+
+
+def round1(values: np.ndarray) -> np.ndarray:
+    """Elementwise ``round(value, 1)`` with Python's rounding."""
+    unique, inverse = np.unique(values, return_inverse=True)
+    rounded = np.array([round(value, 1) for value in unique.tolist()], dtype=float)
+    return rounded[inverse.reshape(-1)]
+
+
+def strength_calories(weight: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    """Array form of ``calories.calculate_strength_calories`` (one set each)."""
+    return round1(weight * reps * 0.05 * 1.3)
+
+
+def cardio_calories(duration: np.ndarray) -> np.ndarray:
+    """Array form of ``calories.calculate_cardio_calories`` (moderate)."""
+    return round1(7 * 70 * (duration / 60))
+
+
+def _segments(keys: np.ndarray) -> np.ndarray:
+    """Start of every run of equal values in the sorted ``keys``."""
+    if not len(keys):
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+class _Chunk:
+    """Set, entry and workout columns of up to ``CHUNK_SIZE`` workouts."""
+
+    def __init__(self):
+        self.dates: List[str] = []
+        self.entry_workout: List[int] = []
+        self.entry_exercise: List[Optional[str]] = []
+        self.entry_category: List[int] = []
+        self.set_entry: List[int] = []
+        self.weight: List[float] = []
+        self.reps: List[float] = []
+        self.duration: List[float] = []
+        self.distance: List[float] = []
+
+    def add(self, workout: dict) -> None:
+        workout_index = len(self.dates)
+        self.dates.append(workout["date"])
+        for entry in workout.get("entries", []):
+            entry_index = len(self.entry_workout)
+            self.entry_workout.append(workout_index)
+            self.entry_exercise.append(entry.get("exercise_id"))
+            cardio = entry.get("category", "strength") == "cardio"
+            self.entry_category.append(CARDIO if cardio else STRENGTH)
+            for set_data in entry.get("sets", []):
+                self.set_entry.append(entry_index)
+                self.weight.append(set_data.get("weight", 0) or 0)
+                self.reps.append(set_data.get("reps", 0) or 0)
+                self.duration.append(set_data.get("duration_minutes", 0) or 0)
+                self.distance.append(set_data.get("distance_km", 0) or 0)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def reduce(self) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """The entry and workout columns of the chunk."""
+        entries = len(self.entry_workout)
+        entry = np.array(self.set_entry, dtype=np.int64)
+        weight = np.array(self.weight, dtype=float)
+        reps = np.array(self.reps, dtype=float)
+        duration = np.array(self.duration, dtype=float)
+        entry_category = np.array(self.entry_category, dtype=np.int8)
+        cardio = entry_category[entry] == CARDIO
+
+        volume = weight * reps
+        calories = np.where(
+            cardio, cardio_calories(duration), strength_calories(weight, reps)
+        )
+        # The dashboard leaves out sets without a load or duration
+        lifted = ~cardio & (weight > 0) & (reps > 0)
+        counted_calories = np.where(lifted | (cardio & (duration > 0)), calories, 0.0)
+
+        def by_entry(values) -> np.ndarray:
+            return np.bincount(entry, weights=values, minlength=entries)
+
+        max_weight = np.zeros(entries)
+        np.maximum.at(max_weight, entry, weight)
+        # Progress is only ever asked for by exercise id
+        charted = np.array([e is not None for e in self.entry_exercise], dtype=bool)
+        entry_columns = {
+            "exercise": np.array(self.entry_exercise, dtype=object)[charted],
+            "day": np.array(
+                [self.dates[w][:10] for w in self.entry_workout], dtype=str
+            )[charted],
+            "max_weight": max_weight[charted],
+            "total_volume": by_entry(volume)[charted],
+            "total_reps": by_entry(reps)[charted],
+            "duration": by_entry(duration)[charted],
+            "distance": by_entry(np.array(self.distance, dtype=float))[charted],
+            "calories": by_entry(calories)[charted],
+        }
+
+        workout = np.array(self.entry_workout, dtype=np.int64)
+
+        def by_workout(values) -> np.ndarray:
+            return np.bincount(workout, weights=values, minlength=len(self.dates))
+
+        workout_columns = {
+            "date": np.array(self.dates, dtype=str),
+            "exercises": np.bincount(workout, minlength=len(self.dates)),
+            "sets": by_workout(np.bincount(entry, minlength=entries)),
+            "volume": by_workout(by_entry(np.where(lifted, volume, 0.0))),
+            "calories": by_workout(by_entry(counted_calories)),
+        }
+        return entry_columns, workout_columns
+
+
+def _concatenate(chunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+
+
+class WorkoutColumns:
+    """Entry and workout columns of a whole history, sorted for lookups."""
+
+    def __init__(self, entry_chunks: list, workout_chunks: list):
+        workouts = _concatenate(workout_chunks)
+        order = np.argsort(workouts["date"], kind="stable")
+        self.workouts = {name: values[order] for name, values in workouts.items()}
+        self.workouts["day"] = self.workouts["date"].astype("<U10")
+
+        entries = _concatenate(entry_chunks)
+        # Exercise ids as codes, so entries sort by (exercise, day)
+        self.exercise_ids, codes = np.unique(
+            entries.pop("exercise").astype(str), return_inverse=True
+        )
+        codes = codes.reshape(-1)
+        order = np.lexsort((entries["day"], codes))
+        self.exercise_codes = codes[order]
+        self.entries = {name: values[order] for name, values in entries.items()}
+
+    def _date_slice(self, start_date: Optional[str], end_date: Optional[str]):
+        dates = self.workouts["date"]
+        lo = np.searchsorted(dates, start_date, "left") if start_date else 0
+        hi = np.searchsorted(dates, end_date, "right") if end_date else len(dates)
+        return slice(lo, max(lo, hi))
+
+    def totals(self, start_date: Optional[str], end_date: Optional[str]) -> dict:
+        window = self._date_slice(start_date, end_date)
+        if window.stop == window.start:
+            return {}
+        workouts = self.workouts
+        return {
+            "workouts": int(window.stop - window.start),
+            "exercises": int(workouts["exercises"][window].sum()),
+            "sets": int(workouts["sets"][window].sum()),
+            "volume": float(workouts["volume"][window].sum()),
+            "calories": float(workouts["calories"][window].sum()),
+        }
+
+    def daily_totals(self, start_date: str, end_date: str) -> List[dict]:
+        days = self.workouts["day"]
+        lo = np.searchsorted(days, start_date[:10], "left")
+        hi = max(lo, np.searchsorted(days, end_date[:10], "right"))
+        starts = _segments(days[lo:hi])
+        if not len(starts):
+            return []
+        columns = {
+            name: np.add.reduceat(self.workouts[name][lo:hi], starts).tolist()
+            for name in ("sets", "volume", "calories")
+        }
+        counts = np.diff(np.r_[starts, hi - lo]).tolist()
+        return [
+            rounded_rollup(
+                {
+                    "date": day,
+                    "workouts": counts[i],
+                    "sets": int(columns["sets"][i]),
+                    "volume": columns["volume"][i],
+                    "calories": columns["calories"][i],
+                }
+            )
+            for i, day in enumerate(days[lo:hi][starts].tolist())
+        ]
+
+    def exercise_progress(self, exercise_id: str, start_date: str) -> List[dict]:
+        code = np.searchsorted(self.exercise_ids, exercise_id)
+        if code == len(self.exercise_ids) or self.exercise_ids[code] != exercise_id:
+            return []
+        first, last = np.searchsorted(self.exercise_codes, [code, code + 1])
+        days = self.entries["day"][first:last]
+        lo = first + np.searchsorted(days, start_date[:10], "left")
+        starts = _segments(self.entries["day"][lo:last])
+        if not len(starts):
+            return []
+
+        def reduce(name, ufunc=np.add) -> list:
+            return ufunc.reduceat(self.entries[name][lo:last], starts).tolist()
+
+        columns = {
+            "date": self.entries["day"][lo:last][starts].tolist(),
+            "max_weight": reduce("max_weight", np.maximum),
+            "total_volume": reduce("total_volume"),
+            "total_reps": [int(reps) for reps in reduce("total_reps")],
+            "duration": reduce("duration"),
+            "distance": reduce("distance"),
+            "calories": reduce("calories"),
+        }
+        return [
+            {name: values[i] for name, values in columns.items()}
+            for i in range(len(starts))
+        ]
+
+
+class ColumnarAnalytics:
+    """The analytics reads of ``WorkoutRepository`` from ``WorkoutColumns``,
+    reloaded from a repository when the ``workouts`` version changes."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._columns: Optional[WorkoutColumns] = None
+        self._version = None
+
+    async def ensure_loaded(self, repository, version=None) -> None:
+        """Load the columns unless they are already loaded at ``version``."""
+        if self._columns is not None and version == self._version:
+            return
+        async with self._lock:
+            if self._columns is None or version != self._version:
+                self._columns = await self._load(repository)
+                self._version = version
+
+    async def _load(self, repository) -> WorkoutColumns:
+        entry_chunks, workout_chunks = [], []
+        chunk = _Chunk()
+        async for workout in repository.export(None, None):
+            chunk.add(workout)
+            if len(chunk) == CHUNK_SIZE:
+                entries, workouts = chunk.reduce()
+                entry_chunks.append(entries)
+                workout_chunks.append(workouts)
+                chunk = _Chunk()
+        if len(chunk) or not workout_chunks:
+            entries, workouts = chunk.reduce()
+            entry_chunks.append(entries)
+            workout_chunks.append(workouts)
+        return WorkoutColumns(entry_chunks, workout_chunks)
+
+    async def totals(self, start_date: Optional[str], end_date: Optional[str]) -> dict:
+        return self._columns.totals(start_date, end_date)
+
+    async def daily_totals(self, start_date: str, end_date: str) -> List[dict]:
+        return self._columns.daily_totals(start_date, end_date)
+
+    async def dashboard(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        trend_start: str,
+        trend_end: str,
+    ) -> Tuple[dict, List[dict]]:
+        columns = self._columns
+        return (
+            columns.totals(start_date, end_date),
+            columns.daily_totals(trend_start, trend_end),
+        )
+
+    async def exercise_progress(self, exercise_id: str, start_date: str) -> List[dict]:
+        return self._columns.exercise_progress(exercise_id, start_date)
@@ -0,0 +1 @@
+"""Benchmarks for the backend; run the modules with ``python -m``."""
@@ -0,0 +1,299 @@
+"""Latency, throughput and memory of every GET endpoint, in-process.
+
+Loads a synthetic history (``benchmarks.history``) of the given size into
+a benchmark database, then calls the ASGI app directly, middleware
+included, with no network or HTTP client in between. For every endpoint
+it reports:
+
+- p50 / p95 / p99 / max latency over ``--requests`` requests, issued
+  ``--concurrency`` at a time after ``--warmup`` unmeasured ones;
+- throughput: requests completed per second of wall time;
+- response bytes, and the peak Python allocation of one extra request
+  (traced separately, since ``tracemalloc`` slows everything down).
+
+The response cache is cleared before every request, so the numbers are
+those of the queries themselves; ``--cached`` measures cache hits
+instead. Results go to ``--output`` as JSON, with the process's peak RSS.
+
+``--storage`` picks the backend (see ``storage``), emptied first: the
+in-memory one by default, which needs no database server; ``sqlite``
+with ``--sqlite-path``; or ``mongodb``, where the history goes into
+``--db-name`` on ``--mongo-url``. ``--analytics columnar`` answers the
+analytics endpoints from the NumPy engine (``analytics.py``) instead.
+
+    cd backend && python -m benchmarks.endpoints --size 10k
+    cd backend && python -m benchmarks.endpoints --size 1m --storage mongodb \\
+        --mongo-url mongodb://localhost:27017 --output 1m.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+ENDPOINTS = [
+    "/exercises",
+    "/exercises?search=press",
+    "/workouts?limit=50",
+    "/workouts?limit=50&view=summary",
+    "/workouts/{workout_id}",
+    "/recent-workouts",
+    "/stats",
+    "/stats?start_date={quarter_start}",
+    "/trends?days=30",
+    "/trends?days=365",
+    "/progress/{exercise_id}?days=30",
+    "/progress/{exercise_id}?days=365",
+    "/dashboard",
+    "/templates",
+    "/export/workouts.ndjson",
+    "/export/workouts.csv",
+]
+
+# Whole-history downloads: timed with --export-requests requests instead
+EXPORTS = ("/export/",)
+
+
+async def asgi_get(app, path: str, encoding: str) -> Tuple[int, int]:
+    """GET ``path`` from the ASGI ``app``; returns status and body bytes."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"benchmark"), (b"accept-encoding", encoding.encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    status = 0
+    size = 0
+    done = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Streaming responses listen for a disconnect while they send
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return status, size
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    index = math.ceil(fraction * len(sorted_values)) - 1
+    return sorted_values[max(0, index)]
+
+
+async def measure(
+    server,
+    path: str,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    cached: bool,
+    encoding: str,
+) -> dict:
+    async def call() -> Tuple[float, int]:
+        if not cached:
+            server.response_cache.clear()
+        start = time.perf_counter()
+        status, size = await asgi_get(server.app, path, encoding)
+        elapsed = time.perf_counter() - start
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+        return elapsed, size
+
+    for _ in range(warmup):
+        await call()
+
+    latencies = []
+    size = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, size
+        while remaining > 0:
+            remaining -= 1
+            elapsed, size = await call()
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    wall = time.perf_counter() - start
+
+    tracemalloc.start()
+    await call()
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "response_bytes": size,
+        "peak_alloc_bytes": peak_alloc,
+    }
+
+
+def endpoint_paths(history: dict, workout: dict) -> List[Tuple[str, str]]:
+    last_date = date.fromisoformat(history["last_date"])
+    values = {
+        "workout_id": workout["id"],
+        "exercise_id": workout["entries"][0]["exercise_id"],
+        "quarter_start": (last_date - timedelta(days=90)).isoformat(),
+    }
+    return [(endpoint, "/api" + endpoint.format(**values)) for endpoint in ENDPOINTS]
+
+
+def print_header() -> None:
+    print(
+        f"\n{'endpoint':<36}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'req/s':>9}{'bytes':>11}{'peak KiB':>10}"
+    )
+
+
+def print_row(row: dict) -> None:
+    print(
+        f"{row['endpoint']:<36}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+        f"{row['p99_ms']:>9.2f}{row['throughput_rps']:>9.1f}"
+        f"{row['response_bytes']:>11}{row['peak_alloc_bytes'] / 1024:>10.0f}"
+    )
+
+
+async def run(args, server) -> dict:
+    from benchmarks.history import load_history
+
+    start = time.perf_counter()
+    history = await load_history(server.storage, args.size, args.seed, args.end_date)
+    history["load_seconds"] = time.perf_counter() - start
+    print(
+        f"Loaded {history['sets']} sets in {history['workouts']} workouts "
+        f"({history['first_date']} to {history['last_date']}) "
+        f"in {history['load_seconds']:.1f}s"
+    )
+    await server.load_exercise_catalog()
+
+    (workout,) = await server.storage.workouts.recent(1)
+    results = []
+    print_header()
+    for endpoint, path in endpoint_paths(history, workout):
+        if args.endpoint and not any(part in endpoint for part in args.endpoint):
+            continue
+        export = endpoint.startswith(EXPORTS)
+        result = await measure(
+            server,
+            path,
+            args.export_requests if export else args.requests,
+            args.concurrency,
+            min(args.warmup, 1) if export else args.warmup,
+            args.cached,
+            args.encoding,
+        )
+        results.append({"endpoint": endpoint, "path": path, **result})
+        print_row(results[-1])
+
+    return {
+        "history": history,
+        "storage": server.storage.name,
+        "analytics": args.analytics,
+        "settings": {
+            "requests": args.requests,
+            "export_requests": args.export_requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "cached": args.cached,
+            "encoding": args.encoding,
+        },
+        "python": platform.python_version(),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "endpoints": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from benchmarks.history import SIZES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        help="last day of the history (default: today; the ?days= windows "
+        "always end today)",
+    )
+    parser.add_argument(
+        "--storage", choices=("memory", "sqlite", "mongodb"), default="memory"
+    )
+    parser.add_argument(
+        "--analytics", choices=("storage", "columnar"), default="storage"
+    )
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="workout_benchmark")
+    parser.add_argument("--sqlite-path", default="benchmark.sqlite3")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--export-requests", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--cached", action="store_true")
+    parser.add_argument("--encoding", default="identity")
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        help="only endpoints containing this (repeatable)",
+    )
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args(argv)
+
+    # server.py reads these on import. The benchmark has a database of its
+    # own (--db-name, --sqlite-path), since loading a history empties it
+    os.environ["STORAGE_BACKEND"] = args.storage
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    os.environ["SQLITE_PATH"] = args.sqlite_path
+    os.environ["ANALYTICS_ENGINE"] = args.analytics
+    import server
+
+    report = asyncio.run(run(args, server))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
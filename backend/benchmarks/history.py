@@ -0,0 +1,169 @@
+"""Deterministic synthetic workout histories for the benchmarks.
+
+A history is the exercises of ``INITIAL_EXERCISES`` and a training log
+ending at ``end_date``: a rotating four-day split of five strength
+exercises plus one cardio entry, three to five sets each, with rest days
+and the occasional double session. Working weights drift up over time the
+way a real log does. The same ``seed``, ``end_date`` and size always give
+the same documents, ids included.
+
+Histories are sized by their number of sets (``SIZES``). Workouts are
+written exactly as ``POST /workouts/import`` stores them (stored totals
+included), through the storage backend's batch writes, which keep its
+derived views current, so the database is indistinguishable from one
+filled through the API. ``benchmarks.endpoints`` loads one before timing
+the endpoints.
+"""
+
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+
+from seed import INITIAL_EXERCISES
+from storage.base import Storage
+from workout_totals import add_totals
+
+SIZES = {
+    "small": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+INSERT_BATCH_SIZE = 1000
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_exercises(seed: int = 0) -> List[dict]:
+    """``INITIAL_EXERCISES`` with deterministic ids."""
+    rng = random.Random(f"exercises-{seed}")
+    return [{"id": _uuid(rng), **exercise} for exercise in INITIAL_EXERCISES]
+
+
+def _strength_sets(rng: random.Random, weight: float) -> List[dict]:
+    reps = rng.choice((5, 6, 8, 10, 12))
+    return [
+        {
+            "set_number": number,
+            "reps": max(1, reps - rng.randint(0, 2)),
+            "weight": weight,
+            "duration_minutes": None,
+            "distance_km": None,
+            "notes": None,
+        }
+        for number in range(1, rng.randint(3, 5) + 1)
+    ]
+
+
+def _cardio_sets(rng: random.Random) -> List[dict]:
+    minutes = rng.choice((10, 15, 20, 30, 45))
+    return [
+        {
+            "set_number": 1,
+            "reps": None,
+            "weight": None,
+            "duration_minutes": float(minutes),
+            "distance_km": round(minutes * rng.uniform(0.12, 0.2), 2),
+            "notes": None,
+        }
+    ]
+
+
+def generate_workouts(
+    exercises: List[dict],
+    total_sets: int,
+    seed: int = 0,
+    end_date: Optional[date] = None,
+) -> Iterator[dict]:
+    """Workout documents, newest first, until ``total_sets`` sets."""
+    rng = random.Random(seed)
+    end_date = end_date or datetime.now(timezone.utc).date()
+    strength = [ex for ex in exercises if ex["category"] == "strength"]
+    cardio = [ex for ex in exercises if ex["category"] == "cardio"]
+    split = [rng.sample(strength, 5) + [rng.choice(cardio)] for _ in range(4)]
+    # Walking back in time, so working weights only ever go down
+    weights = {ex["id"]: rng.randrange(40, 140, 5) for ex in strength}
+
+    day = end_date
+    session = 0
+    sets_left = total_sets
+    while sets_left > 0:
+        sessions = 0 if rng.random() < 0.3 else 2 if rng.random() < 0.05 else 1
+        for _ in range(sessions):
+            if sets_left <= 0:
+                break
+            entries = []
+            for exercise in split[session % len(split)]:
+                if sets_left <= 0:
+                    break
+                if exercise["category"] == "cardio":
+                    sets = _cardio_sets(rng)
+                else:
+                    weight = weights[exercise["id"]]
+                    if rng.random() < 0.1:
+                        weights[exercise["id"]] = max(5, weight - 2.5)
+                    sets = _strength_sets(rng, weight)
+                sets = sets[:sets_left]
+                sets_left -= len(sets)
+                entries.append(
+                    {
+                        "exercise_id": exercise["id"],
+                        "exercise_name": exercise["name"],
+                        "category": exercise["category"],
+                        "sets": sets,
+                    }
+                )
+            session += 1
+            started = f"{rng.randint(6, 20):02d}:{rng.randint(0, 59):02d}:00"
+            yield add_totals(
+                {
+                    "id": _uuid(rng),
+                    "date": day.isoformat(),
+                    "entries": entries,
+                    "notes": "Felt strong" if rng.random() < 0.1 else None,
+                    "created_at": f"{day.isoformat()}T{started}+00:00",
+                }
+            )
+        day -= timedelta(days=1)
+
+
+async def load_history(
+    storage: Storage, size: str, seed: int = 0, end_date: Optional[date] = None
+) -> dict:
+    """Replace everything in ``storage`` with a generated history.
+
+    Returns the history's shape: sets, workouts and date range.
+    """
+    await storage.clear()
+    await storage.prepare()
+
+    exercises = generate_exercises(seed)
+    await storage.exercises.add_many(exercises)
+
+    workouts = sets = 0
+    first = last = None
+    batch = []
+    for workout in generate_workouts(exercises, SIZES[size], seed, end_date):
+        batch.append(workout)
+        workouts += 1
+        sets += workout["total_sets"]
+        last = last or workout["date"]
+        first = workout["date"]
+        if len(batch) >= INSERT_BATCH_SIZE:
+            await storage.workouts.add_many(batch)
+            batch = []
+    if batch:
+        await storage.workouts.add_many(batch)
+
+    return {
+        "size": size,
+        "seed": seed,
+        "sets": sets,
+        "workouts": workouts,
+        "first_date": first,
+        "last_date": last,
+    }
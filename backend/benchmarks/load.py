@@ -0,0 +1,507 @@
+"""Concurrent load generator replaying a realistic mix of page loads.
+
+``backend_test.py`` checks behaviour one blocking request at a time; this
+drives the API with many simulated users at once, which is what shows
+contention, pool exhaustion and event-loop stalls. Each user session is
+one scenario, issuing the requests the frontend page issues:
+
+    dashboard     GET /dashboard, for all time or a recent window
+    history       summary pages of /workouts, following X-Next-Cursor,
+                  with a couple of workouts expanded (/workouts/{id})
+    log_workout   /exercises and /templates, then POST /workouts
+    progress      /exercises, then /progress/{id} for a few exercises and
+                  time ranges
+
+Scenarios are picked by weight (``--mix``, e.g. ``dashboard=4,history=3``).
+Without ``--rate``, ``--concurrency`` users run scenarios back to back
+(closed loop). With ``--rate``, scenarios arrive as a Poisson process at
+that many per second (open loop); at most ``--concurrency`` run at once
+and the rest wait, and that wait is reported as ``admission``. A run
+lasts ``--duration`` seconds, or ``--scenarios`` scenarios if given.
+
+For every endpoint it reports requests, errors (4xx/5xx and transport
+errors) and their rate, throughput, and p50 / p90 / p95 / p99 / max
+latency. It also samples how late the event loop wakes up (``loop_lag``)
+and records ``/api/pool-stats`` at the end. Results go to ``--output``.
+
+With ``--url`` the target is a running server. Without it, the app runs
+in-process on a ``--storage`` backend (memory by default) loaded with a
+``benchmarks.history`` history of ``--size``, so no server or database
+is needed. In-process, the app and the generator share one event loop:
+``loop_lag`` is then the app's, but latencies include the generator's
+own (small) overhead.
+
+    cd backend && python -m benchmarks.load --concurrency 20 --duration 30
+    cd backend && python -m benchmarks.load --url http://localhost:8000 \\
+        --rate 50 --concurrency 100 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.endpoints import percentile
+from benchmarks.history import generate_workouts
+from pagination import NEXT_CURSOR_HEADER
+from workout_totals import without_totals
+
+DEFAULT_MIX = {"dashboard": 4, "history": 3, "log_workout": 1.5, "progress": 2}
+
+# Dashboard date presets: all time, or the last N days
+DASHBOARD_WINDOWS = (None, 7, 30, 90)
+PROGRESS_DAYS = ("7", "30", "90", "365")
+
+LOOP_LAG_INTERVAL = 0.01
+
+
+class Recorder:
+    """Latencies and errors per endpoint (method and route template)."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+        self.scenarios = Counter()
+        self.scenario_errors = Counter()
+        self.admission_waits: List[float] = []
+        self.loop_lag: List[float] = []
+
+    def record(self, endpoint: str, elapsed: float, error: Optional[str]) -> None:
+        self.latencies[endpoint].append(elapsed)
+        if error:
+            self.errors[endpoint][error] += 1
+
+
+class User:
+    """One simulated user: issues and records the requests of a scenario."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        recorder: Recorder,
+        rng: random.Random,
+        target: dict,
+        think_time: float,
+    ):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.target = target
+        self.think_time = think_time
+        self.failed = 0
+
+    async def request(
+        self, method: str, path: str, endpoint: Optional[str] = None, **kwargs
+    ) -> Optional[httpx.Response]:
+        """The response, or None if the request failed (and was counted)."""
+        endpoint = f"{method} {endpoint or path}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.failed += 1
+            self.recorder.record(
+                endpoint, time.perf_counter() - start, type(e).__name__
+            )
+            return None
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            self.failed += 1
+            self.recorder.record(endpoint, elapsed, str(response.status_code))
+            return None
+        self.recorder.record(endpoint, elapsed, None)
+        return response
+
+    async def get(self, path: str, endpoint: Optional[str] = None, **kwargs):
+        return await self.request("GET", path, endpoint, **kwargs)
+
+    async def think(self) -> None:
+        """Pause between page actions (``--think-time``, exponential).
+
+        Always yields: an in-process app on the memory backend never waits
+        on I/O, so without it one user would hold the loop for its whole
+        run and the others would queue behind it.
+        """
+        pause = 0.0
+        if self.think_time > 0:
+            pause = self.rng.expovariate(1 / self.think_time)
+        await asyncio.sleep(pause)
+
+    def workout(self) -> dict:
+        """A new workout for today, shaped like the synthetic histories."""
+        generated = generate_workouts(
+            self.target["exercises"],
+            total_sets=self.rng.randint(12, 30),
+            seed=self.rng.getrandbits(32),
+            end_date=datetime.now(timezone.utc).date(),
+        )
+        workout = without_totals(next(generated))
+        return {key: workout[key] for key in ("date", "entries", "notes")}
+
+
+async def dashboard(user: User) -> None:
+    params = {}
+    days = user.rng.choice(DASHBOARD_WINDOWS)
+    if days:
+        today = datetime.now(timezone.utc).date()
+        params["start_date"] = (today - timedelta(days=days)).isoformat()
+    await user.get("/api/dashboard", params=params)
+
+
+async def history(user: User) -> None:
+    cursor = None
+    for _ in range(user.rng.choice((1, 1, 1, 2, 3))):
+        params = {"limit": "50", "view": "summary"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await user.get("/api/workouts", params=params)
+        if response is None:
+            return
+        workouts = response.json()
+        await user.think()
+        for workout in user.rng.sample(workouts, min(len(workouts), 2)):
+            await user.get(f"/api/workouts/{workout['id']}", "/api/workouts/{id}")
+            await user.think()
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return
+
+
+async def log_workout(user: User) -> None:
+    await asyncio.gather(user.get("/api/exercises"), user.get("/api/templates"))
+    await user.think()
+    await user.request("POST", "/api/workouts", json=user.workout())
+
+
+async def progress(user: User) -> None:
+    await user.get("/api/exercises")
+    for _ in range(user.rng.randint(1, 3)):
+        await user.think()
+        exercise_id = user.rng.choice(user.target["trained"])
+        await user.get(
+            f"/api/progress/{exercise_id}",
+            "/api/progress/{id}",
+            params={"days": user.rng.choice(PROGRESS_DAYS)},
+        )
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "dashboard": dashboard,
+    "history": history,
+    "log_workout": log_workout,
+    "progress": progress,
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """``name=weight,...``; scenarios left out do not run."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(
+                f"unknown scenario {name!r}; expected {', '.join(SCENARIOS)}"
+            )
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for {name}: {weight}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs a positive weight")
+    return mix
+
+
+async def discover(client: httpx.AsyncClient) -> dict:
+    """Exercise ids to log workouts with and to view progress of."""
+    response = await client.get("/api/exercises")
+    response.raise_for_status()
+    exercises = response.json()
+    response = await client.get("/api/workouts", params={"limit": "100"})
+    response.raise_for_status()
+    trained = sorted(
+        {
+            entry["exercise_id"]
+            for workout in response.json()
+            for entry in workout["entries"]
+        }
+    )
+    return {
+        "exercises": exercises,
+        "trained": trained or [exercise["id"] for exercise in exercises],
+    }
+
+
+async def monitor_loop_lag(samples: List[float]) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        samples.append(time.perf_counter() - start - LOOP_LAG_INTERVAL)
+
+
+async def generate_load(client: httpx.AsyncClient, target: dict, args) -> dict:
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    start = time.perf_counter()
+    deadline = start + args.duration
+    started = 0
+
+    def more() -> bool:
+        if args.scenarios is not None:
+            return started < args.scenarios
+        return time.perf_counter() < deadline
+
+    def next_user() -> tuple:
+        nonlocal started
+        started += 1
+        name = rng.choices(names, weights)[0]
+        user_rng = random.Random(rng.getrandbits(64))
+        return name, User(client, recorder, user_rng, target, args.think_time)
+
+    async def run_scenario(name: str, user: User) -> None:
+        try:
+            await SCENARIOS[name](user)
+        finally:
+            recorder.scenarios[name] += 1
+            if user.failed:
+                recorder.scenario_errors[name] += 1
+
+    monitor = asyncio.create_task(monitor_loop_lag(recorder.loop_lag))
+    if args.rate:
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def arrive(name: str, user: User) -> None:
+            arrived = time.perf_counter()
+            async with slots:
+                recorder.admission_waits.append(time.perf_counter() - arrived)
+                await run_scenario(name, user)
+
+        tasks = set()
+        next_arrival = start
+        while more():
+            next_arrival += rng.expovariate(args.rate)
+            await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+            task = asyncio.create_task(arrive(*next_user()))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    else:
+
+        async def worker() -> None:
+            while more():
+                name, user = next_user()
+                await run_scenario(name, user)
+                await user.think()
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - start
+    monitor.cancel()
+    return summarize(recorder, wall)
+
+
+def latency_summary(latencies: List[float]) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+def endpoint_summary(
+    endpoint: str, latencies: List[float], errors: Counter, wall: float
+) -> dict:
+    failed = sum(errors.values())
+    return {
+        "endpoint": endpoint,
+        "requests": len(latencies),
+        "errors": failed,
+        "error_rate": failed / len(latencies),
+        "error_kinds": dict(errors),
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        **latency_summary(latencies),
+    }
+
+
+def summarize(recorder: Recorder, wall: float) -> dict:
+    endpoints = [
+        endpoint_summary(endpoint, latencies, recorder.errors[endpoint], wall)
+        for endpoint, latencies in sorted(recorder.latencies.items())
+    ]
+    everything = [t for latencies in recorder.latencies.values() for t in latencies]
+    errors = sum((recorder.errors[endpoint] for endpoint in recorder.errors), Counter())
+    report = {
+        "wall_seconds": wall,
+        "scenarios": {
+            name: {"runs": runs, "with_errors": recorder.scenario_errors[name]}
+            for name, runs in sorted(recorder.scenarios.items())
+        },
+        "total": (
+            endpoint_summary("all", everything, errors, wall) if everything else None
+        ),
+        "endpoints": endpoints,
+        "loop_lag": latency_summary(recorder.loop_lag) if recorder.loop_lag else None,
+    }
+    if recorder.admission_waits:
+        report["admission"] = {
+            "delayed": sum(1 for wait in recorder.admission_waits if wait > 0.001),
+            **latency_summary(recorder.admission_waits),
+        }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n{'endpoint':<34}{'reqs':>7}{'err %':>7}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p90 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    )
+    rows = report["endpoints"] + ([report["total"]] if report["total"] else [])
+    for row in rows:
+        print(
+            f"{row['endpoint']:<34}{row['requests']:>7}"
+            f"{row['error_rate'] * 100:>7.1f}{row['throughput_rps']:>9.1f}"
+            f"{row['p50_ms']:>9.2f}{row['p90_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+            f"{row['p99_ms']:>9.2f}{row['max_ms']:>9.2f}"
+        )
+    for row in report["endpoints"]:
+        if row["error_kinds"]:
+            print(f"  {row['endpoint']}: {row['error_kinds']}")
+    runs = ", ".join(
+        f"{name} {scenario['runs']}" for name, scenario in report["scenarios"].items()
+    )
+    print(f"\nScenarios in {report['wall_seconds']:.1f}s: {runs}")
+    if report["loop_lag"]:
+        lag = report["loop_lag"]
+        print(f"Event loop lag: p99 {lag['p99_ms']:.1f} ms, max {lag['max_ms']:.1f} ms")
+    if "admission" in report:
+        admission = report["admission"]
+        print(
+            f"Admission: {admission['delayed']} scenarios waited, "
+            f"p95 {admission['p95_ms']:.1f} ms, max {admission['max_ms']:.1f} ms"
+        )
+
+
+async def in_process_client(args) -> tuple:
+    """A client for the app in this process, loaded with a history."""
+    import server
+    from benchmarks.history import load_history
+
+    history = await load_history(server.storage, args.size, args.seed)
+    print(
+        f"Loaded {history['sets']} sets in {history['workouts']} workouts "
+        f"into {server.storage.name} storage"
+    )
+    await server.load_exercise_catalog()
+    # Errors come back as 500s, like from a server, instead of raising
+    transport = httpx.ASGITransport(app=server.app, raise_app_exceptions=False)
+    client = httpx.AsyncClient(
+        transport=transport, base_url="http://load", timeout=args.timeout
+    )
+    return client, {"storage": server.storage.name, "history": history}
+
+
+async def run(args) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(
+            base_url=args.url,
+            timeout=args.timeout,
+            limits=httpx.Limits(
+                max_connections=args.concurrency, max_keepalive_connections=None
+            ),
+        )
+        target = {"url": args.url}
+    else:
+        client, target = await in_process_client(args)
+
+    async with client:
+        discovered = await discover(client)
+        print(
+            f"Running {', '.join(f'{n}={w:g}' for n, w in args.mix.items())} "
+            f"with concurrency {args.concurrency}"
+            + (f" at {args.rate:g} scenarios/s" if args.rate else "")
+        )
+        report = await generate_load(client, discovered, args)
+        response = await client.get("/api/pool-stats")
+        pool_stats = response.json() if response.status_code == 200 else None
+
+    return {
+        "target": target,
+        "settings": {
+            "mix": args.mix,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "duration": args.duration,
+            "scenarios": args.scenarios,
+            "think_time": args.think_time,
+            "seed": args.seed,
+        },
+        "python": platform.python_version(),
+        **report,
+        "pool_stats": pool_stats,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from benchmarks.history import SIZES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="load a running server instead")
+    parser.add_argument(
+        "--storage", choices=("memory", "sqlite", "mongodb"), default="memory"
+    )
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="workout_benchmark")
+    parser.add_argument("--sqlite-path", default="benchmark.sqlite3")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX))
+    parser.add_argument(
+        "--concurrency", type=int, default=10, help="users, or scenarios in flight"
+    )
+    parser.add_argument(
+        "--rate", type=float, help="scenario arrivals per second (open loop)"
+    )
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--scenarios", type=int, help="stop after this many")
+    parser.add_argument(
+        "--think-time", type=float, default=0.0, help="mean pause between actions"
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load.json")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    if not args.url:
+        # server.py reads these on import; see benchmarks.endpoints
+        os.environ["STORAGE_BACKEND"] = args.storage
+        os.environ["MONGO_URL"] = args.mongo_url
+        os.environ["DB_NAME"] = args.db_name
+        os.environ["SQLITE_PATH"] = args.sqlite_path
+    # httpx logs every request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Bytes vs latency of response compression, per endpoint.
+
+Against a running server (``--base-url``) this fetches every endpoint once
+per encoding and reports, for each:
+
+- wire bytes and ratio to the uncompressed body;
+- server time: median time to the full response over ``--runs`` requests
+  on the local connection (compression CPU included);
+- transfer time of those bytes on a ``--bandwidth-kbps`` link, and the
+  total of the two, which is what a client on that link would wait.
+
+``--sweep`` additionally compresses each uncompressed body locally at a
+range of levels per codec, to pick the ``GZIP_LEVEL`` / ``BROTLI_QUALITY``
+/ ``ZSTD_LEVEL`` settings.
+
+    cd backend && python -m benchmarks.payload_compression --sweep
+"""
+
+import argparse
+import statistics
+import time
+from typing import List, Tuple
+
+import requests
+
+from compression import available_encodings, compress
+
+ENDPOINTS = [
+    "/exercises",
+    "/workouts?limit=100",
+    "/stats",
+    "/trends",
+    "/dashboard",
+    "/templates",
+    "/export/workouts.ndjson",
+    "/export/workouts.csv",
+]
+
+SWEEP_LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 11), "zstd": (1, 3, 19)}
+
+
+def fetch(url: str, encoding: str, runs: int) -> Tuple[int, float]:
+    """Wire size and median wall time of ``runs`` GETs with ``encoding``."""
+    times = []
+    size = 0
+    headers = {"Accept-Encoding": encoding}
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = requests.get(url, headers=headers, stream=True, timeout=60)
+        body = response.raw.read(decode_content=False)
+        times.append(time.perf_counter() - start)
+        response.raise_for_status()
+        size = len(body)
+    return size, statistics.median(times)
+
+
+def transfer_seconds(size: int, bandwidth_kbps: float) -> float:
+    return size * 8 / (bandwidth_kbps * 1000)
+
+
+def print_rows(title: str, rows: List[tuple], time_label: str = "server ms") -> None:
+    print(f"\n{title}")
+    print(
+        f"{'encoding':<12}{'bytes':>10}{'ratio':>8}"
+        f"{time_label:>11}{'transfer ms':>13}{'total ms':>10}"
+    )
+    for encoding, size, ratio, server, transfer in rows:
+        print(
+            f"{encoding:<12}{size:>10}{ratio:>8.2f}"
+            f"{server * 1000:>11.1f}{transfer * 1000:>13.1f}"
+            f"{(server + transfer) * 1000:>10.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--bandwidth-kbps",
+        type=float,
+        default=1600,
+        help="modelled client link (default: a slow mobile connection)",
+    )
+    parser.add_argument("--sweep", action="store_true")
+    args = parser.parse_args()
+
+    encodings = ["identity", *available_encodings()]
+    for endpoint in ENDPOINTS:
+        url = args.base_url.rstrip("/") + endpoint
+        rows = []
+        plain_size = None
+        for encoding in encodings:
+            size, server = fetch(url, encoding, args.runs)
+            plain_size = plain_size or size
+            rows.append(
+                (
+                    encoding,
+                    size,
+                    plain_size / size if size else 0.0,
+                    server,
+                    transfer_seconds(size, args.bandwidth_kbps),
+                )
+            )
+        print_rows(endpoint, rows)
+
+        if args.sweep:
+            body = requests.get(
+                url, headers={"Accept-Encoding": "identity"}, timeout=60
+            ).content
+            sweep = []
+            for codec in available_encodings():
+                for level in SWEEP_LEVELS[codec]:
+                    times = []
+                    for _ in range(args.runs):
+                        start = time.perf_counter()
+                        compressed = compress(body, codec, level)
+                        times.append(time.perf_counter() - start)
+                    size = len(compressed)
+                    sweep.append(
+                        (
+                            f"{codec}-{level}",
+                            size,
+                            len(body) / size if size else 0.0,
+                            statistics.median(times),
+                            transfer_seconds(size, args.bandwidth_kbps),
+                        )
+                    )
+            print_rows(f"{endpoint} (local, by level)", sweep, "cpu ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Negotiated response compression (zstd, brotli, gzip).
+
+``CompressionMiddleware`` picks the best encoding the client accepts from
+those available here: gzip always, brotli and zstd when the optional
+``brotli`` / ``zstandard`` packages are installed. Bodies smaller than
+``minimum_size`` are sent as is, as are responses that are already
+encoded or not worth compressing (images, fonts, archives).
+
+Streaming responses (exports, static files) are compressed chunk by chunk
+and flushed after every chunk, so clients keep receiving data as it is
+produced instead of waiting for the end of the stream.
+
+A compressed body is a different representation, so strong ETags are
+weakened (``W/"..."``) the way nginx does; ``If-None-Match`` uses weak
+comparison, so conditional GETs keep working. The ETag of a compressible
+response is weakened (and ``Vary`` added) even when it is too small to
+compress: a 304 carries no body to tell the two cases apart, and this way
+it always repeats the headers of the 200 it revalidates.
+"""
+
+import gzip
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Server preference when the client accepts several encodings equally
+PREFERENCE = ("zstd", "br", "gzip")
+
+UNCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "font/woff")
+UNCOMPRESSIBLE_SUBTYPES = ("zip", "gzip", "zstd", "octet-stream")
+
+
+def available_encodings() -> List[str]:
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def negotiate(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """The encoding to use for an ``Accept-Encoding`` header, if any."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best = None
+    for encoding in PREFERENCE:
+        if encoding not in available:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def compressible(content_type: str) -> bool:
+    content_type = content_type.split(";")[0].strip().lower()
+    if not content_type or content_type.startswith(UNCOMPRESSIBLE_TYPES):
+        return False
+    return not content_type.endswith(UNCOMPRESSIBLE_SUBTYPES)
+
+
+class Compressor:
+    """Incremental compressor for one response body."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress ``data``; with ``flush`` also emit everything buffered
+        so far, so the client can decode it right away."""
+        if self.encoding == "br":
+            out = self._obj.process(data)
+            return out + self._obj.flush() if flush else out
+        out = self._obj.compress(data)
+        if not flush:
+            return out
+        if self.encoding == "gzip":
+            return out + self._obj.flush(zlib.Z_SYNC_FLUSH)
+        return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """One-shot compression of a whole body."""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    compressor = Compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+        self.available = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding", ""), self.available
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(
+            send, encoding, self.levels[encoding], self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    def _weakened(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        return headers
+
+    def _headers(self) -> MutableHeaders:
+        headers = self._weakened()
+        headers["Content-Encoding"] = self.encoding
+        return headers
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.start = message
+            self.passthrough = (
+                message["status"] in (204, 206, 304)
+                or "content-encoding" in headers
+                or not compressible(headers.get("content-type", ""))
+            )
+            content_type = headers.get("content-type")
+            if message["status"] == 304 and (
+                content_type is None or compressible(content_type)
+            ):
+                # Repeats the headers of the 200 it revalidates; 304s
+                # rarely say what type of body that was
+                self._weakened()
+            if self.passthrough:
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body:
+                # Whole body in one message
+                if len(body) < self.minimum_size:
+                    self._weakened()
+                    await self._send(self.start)
+                    await self._send(message)
+                    return
+                body = compress(body, self.encoding, self.level)
+                headers = self._headers()
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            # Streaming body: length unknown, compress as it goes
+            self.compressor = Compressor(self.encoding, self.level)
+            headers = self._headers()
+            del headers["Content-Length"]
+            await self._send(self.start)
+
+        if more_body:
+            chunk = self.compressor.compress(body, flush=True)
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+        if chunk or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
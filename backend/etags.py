@@ -0,0 +1,28 @@
+"""ETags for the read endpoints, derived from data versions.
+
+A response is fully determined by the route, its query string and the
+data it reads, so its ETag is a hash of those together with the current
+``DataVersions`` of the collections the route reads (and the day, for
+routes whose output is relative to today). Checking ``If-None-Match``
+therefore never has to run the underlying query.
+"""
+
+import hashlib
+from typing import Iterable, Optional
+
+
+def make_etag(*parts: object) -> str:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header, as
+    RFC 9110 prescribes for GET."""
+    if not if_none_match:
+        return False
+    candidates: Iterable[str] = (tag.strip() for tag in if_none_match.split(","))
+    for candidate in candidates:
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
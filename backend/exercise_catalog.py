@@ -0,0 +1,109 @@
+"""In-process cache of the exercise catalog.
+
+The catalog is small, read on almost every page and only changes when a
+custom exercise is created, so it is loaded once after seeding and kept in
+memory. Writers go through ``add`` (write-through) so the worker that
+created an exercise sees it right away. Other workers notice the write
+through the ``exercises`` data version passed to ``ensure_loaded`` and
+re-read the catalog.
+
+Filtering is answered from precomputed buckets keyed by
+``(category, muscle_group)`` where ``None`` stands for "any", so every
+combination of the two optional filters is a single dict lookup. Name
+search goes through an ``ExerciseSearchIndex`` built alongside.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from exercise_search import ExerciseSearchIndex
+
+BucketKey = Tuple[Optional[str], Optional[str]]
+
+
+class ExerciseCatalog:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._version = None
+        self._by_id: Dict[str, dict] = {}
+        self._buckets: Dict[BucketKey, List[dict]] = defaultdict(list)
+        self._search_index = ExerciseSearchIndex()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self, repository, version=None) -> None:
+        """(Re)load the whole catalog from the exercise ``repository``, as of
+        the data ``version`` read before calling."""
+        async with self._lock:
+            await self._load(repository, version)
+
+    async def ensure_loaded(self, repository, version=None) -> None:
+        """Load the catalog unless it is already loaded at ``version``."""
+        if self._loaded and version == self._version:
+            return
+        async with self._lock:
+            # Requests that queued up behind a reload of the same version
+            # find it done
+            if not self._loaded or version != self._version:
+                await self._load(repository, version)
+
+    async def _load(self, repository, version) -> None:
+        exercises = await repository.list()
+        self._by_id = {}
+        self._buckets = defaultdict(list)
+        self._search_index = ExerciseSearchIndex()
+        for exercise in exercises:
+            self._index(exercise)
+        self._loaded = True
+        self._version = version
+
+    def _index(self, exercise: dict) -> None:
+        self._by_id[exercise["id"]] = exercise
+        category = exercise.get("category")
+        muscle_group = exercise.get("muscle_group")
+        for key in (
+            (None, None),
+            (category, None),
+            (None, muscle_group),
+            (category, muscle_group),
+        ):
+            self._buckets[key].append(exercise)
+        self._search_index.add(exercise)
+
+    def add(self, exercise: dict) -> None:
+        """Write-through for a newly inserted exercise."""
+        if self._loaded:
+            self._index(exercise)
+
+    def get(self, exercise_id: str) -> Optional[dict]:
+        return self._by_id.get(exercise_id)
+
+    def filter(
+        self, category: Optional[str] = None, muscle_group: Optional[str] = None
+    ) -> List[dict]:
+        """Exercises matching the given filters, in insertion order."""
+        return list(self._buckets.get((category, muscle_group), []))
+
+    def search(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        muscle_group: Optional[str] = None,
+    ) -> List[dict]:
+        """Exercises matching ``query`` and the filters, best match first."""
+        results = []
+        for exercise_id in self._search_index.search(query):
+            exercise = self._by_id[exercise_id]
+            if category and exercise.get("category") != category:
+                continue
+            if muscle_group and exercise.get("muscle_group") != muscle_group:
+                continue
+            results.append(exercise)
+        return results
+
+    def __len__(self) -> int:
+        return len(self._by_id)
@@ -0,0 +1,236 @@
+"""Per-exercise daily progress, maintained on write.
+
+``db.exercise_daily_progress`` holds one document per (exercise, day) with
+the numbers ``/api/progress/{exercise_id}`` charts:
+
+    {"exercise_id": "...", "date": "2026-01-31", "max_weight": 100,
+     "total_volume": 2400, "total_reps": 24, "duration": 0, "distance": 0,
+     "calories": 202.8}
+
+Documents are addressed by ``(exercise_id, date)``, which the unique
+``exercise_id_date`` index (``indexes.py``) keeps one per pair; a progress
+lookup is a single range scan over that index that only touches days on
+which that exercise was trained. The two are separate fields rather than
+one key string, so no exercise id can reach into another's range.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+
+# Sorts after any date string, to bound "this day" / "every day" ranges
+DAY_END = "\uffff"
+
+SUM_FIELDS = ("total_volume", "total_reps", "duration", "distance", "calories")
+
+logger = logging.getLogger(__name__)
+
+
+def progress_filter(exercise_id: str, day: str) -> dict:
+    """The filter addressing one (exercise, day) document."""
+    return {"exercise_id": exercise_id, "date": day}
+
+
+def _empty_progress(exercise_id: str, day: str) -> dict:
+    return {
+        "exercise_id": exercise_id,
+        "date": day,
+        "max_weight": 0,
+        "total_volume": 0,
+        "total_reps": 0,
+        "duration": 0,
+        "distance": 0,
+        "calories": 0,
+    }
+
+
+# Progress fields and the stored entry totals they are summed from
+ENTRY_TOTALS = {
+    "total_volume": "total_volume",
+    "total_reps": "total_reps",
+    "duration": "total_duration",
+    "distance": "total_distance",
+    "calories": "total_calories",
+}
+
+
+# What folding a workout into progress reads: no sets leave Mongo
+TOTALS_PROJECTION = {
+    "_id": 0,
+    "date": 1,
+    "entries.exercise_id": 1,
+    **{f"entries.{total}": 1 for total in ENTRY_TOTALS.values()},
+    "entries.max_weight": 1,
+}
+
+
+def _accumulate_entry(progress: dict, entry: dict) -> None:
+    """Add an entry's stored totals (see ``workout_totals.py``)."""
+    for field, total in ENTRY_TOTALS.items():
+        progress[field] += entry[total]
+    if entry["max_weight"] > progress["max_weight"]:
+        progress["max_weight"] = entry["max_weight"]
+
+
+def summarize_workout_progress(workout: dict) -> Dict[str, dict]:
+    """Progress documents for one workout, keyed by exercise id."""
+    day = workout.get("date", "")[:10]
+    by_exercise = {}
+    for entry in workout.get("entries", []):
+        exercise_id = entry.get("exercise_id")
+        if exercise_id not in by_exercise:
+            by_exercise[exercise_id] = _empty_progress(exercise_id, day)
+        _accumulate_entry(by_exercise[exercise_id], entry)
+    return by_exercise
+
+
+def merge_progress(progress: dict, other: dict) -> None:
+    """Fold ``other`` (same exercise and day) into ``progress``."""
+    for field in SUM_FIELDS:
+        progress[field] += other[field]
+    progress["max_weight"] = max(progress["max_weight"], other["max_weight"])
+
+
+def _progress_key(progress: dict) -> Tuple[str, str]:
+    return progress["exercise_id"], progress["date"]
+
+
+def _progress_update(progress: dict) -> dict:
+    # An upsert inserts the exercise id and date from the filter
+    return {
+        "$inc": {field: progress[field] for field in SUM_FIELDS},
+        "$max": {"max_weight": progress["max_weight"]},
+    }
+
+
+async def add_workout_progress(db, workout: dict) -> None:
+    """Fold a newly logged workout into the per-exercise progress docs."""
+    for progress in summarize_workout_progress(workout).values():
+        await db.exercise_daily_progress.update_one(
+            progress_filter(*_progress_key(progress)),
+            _progress_update(progress),
+            upsert=True,
+        )
+
+
+async def add_workouts_progress(db, workouts: List[dict]) -> None:
+    """Fold many new workouts in with a single bulk write (bulk imports)."""
+    merged = {}
+    for workout in workouts:
+        for progress in summarize_workout_progress(workout).values():
+            key = _progress_key(progress)
+            if key not in merged:
+                merged[key] = progress
+            else:
+                merge_progress(merged[key], progress)
+    if merged:
+        await db.exercise_daily_progress.bulk_write(
+            [
+                UpdateOne(
+                    progress_filter(*key), _progress_update(progress), upsert=True
+                )
+                for key, progress in merged.items()
+            ],
+            ordered=False,
+        )
+
+
+async def remove_workout_progress(db, workout: dict) -> None:
+    """Recompute the (exercise, day) docs a deleted workout contributed to.
+
+    A max cannot be decremented, so the affected days are rebuilt from the
+    remaining workouts on that day, which is a handful of documents.
+    """
+    day = workout.get("date", "")[:10]
+    exercise_ids = {entry.get("exercise_id") for entry in workout.get("entries", [])}
+    if not exercise_ids:
+        return
+
+    remaining = await db.workouts.find(
+        {
+            "date": {"$gte": day, "$lt": day + DAY_END},
+            "entries.exercise_id": {"$in": list(exercise_ids)},
+        },
+        TOTALS_PROJECTION,
+    ).to_list(None)
+
+    recomputed = {}
+    for other in remaining:
+        if other.get("date", "")[:10] != day:
+            continue
+        for entry in other.get("entries", []):
+            exercise_id = entry.get("exercise_id")
+            if exercise_id not in exercise_ids:
+                continue
+            if exercise_id not in recomputed:
+                recomputed[exercise_id] = _empty_progress(exercise_id, day)
+            _accumulate_entry(recomputed[exercise_id], entry)
+
+    for exercise_id in exercise_ids:
+        query = progress_filter(exercise_id, day)
+        if exercise_id in recomputed:
+            await db.exercise_daily_progress.replace_one(
+                query, recomputed[exercise_id], upsert=True
+            )
+        else:
+            await db.exercise_daily_progress.delete_one(query)
+
+
+async def get_exercise_progress(db, exercise_id: str, start_date: str) -> List[dict]:
+    """Daily progress for one exercise from ``start_date`` on, by date."""
+    return (
+        await db.exercise_daily_progress.find(
+            {"exercise_id": exercise_id, "date": {"$gte": start_date[:10]}},
+            {"_id": 0, "exercise_id": 0},
+        )
+        .sort("date", 1)
+        .to_list(None)
+    )
+
+
+async def rebuild_exercise_progress(db, batch_size: int = 500) -> int:
+    """Regenerate ``db.exercise_daily_progress`` from ``db.workouts``.
+
+    Workouts are streamed in batches and folded with the same code the
+    write path uses, from their stored entry totals. Returns the number of
+    (exercise, day) docs written.
+    """
+    rebuilt = {}
+    cursor = db.workouts.find({}, TOTALS_PROJECTION)
+    async for workout in cursor.batch_size(batch_size):
+        for progress in summarize_workout_progress(workout).values():
+            key = _progress_key(progress)
+            if key not in rebuilt:
+                rebuilt[key] = progress
+            else:
+                merge_progress(rebuilt[key], progress)
+
+    if rebuilt:
+        await db.exercise_daily_progress.bulk_write(
+            [
+                ReplaceOne(progress_filter(*key), doc, upsert=True)
+                for key, doc in rebuilt.items()
+            ],
+            ordered=False,
+        )
+    stale = [
+        doc["_id"]
+        async for doc in db.exercise_daily_progress.find(
+            {}, {"exercise_id": 1, "date": 1}
+        )
+        if _progress_key(doc) not in rebuilt
+    ]
+    if stale:
+        await db.exercise_daily_progress.delete_many({"_id": {"$in": stale}})
+    logger.info(f"Rebuilt exercise progress for {len(rebuilt)} exercise days")
+    return len(rebuilt)
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from storage import open_mongo_database
+
+    db = open_mongo_database("Rebuilding the exercise progress")
+    asyncio.run(rebuild_exercise_progress(db))
@@ -0,0 +1,211 @@
+"""Ranked, typo-tolerant search over exercise names and descriptions.
+
+Three in-memory inverted indexes are kept per catalog:
+
+- an edge n-gram (prefix) index from every prefix of every normalized
+  name/description token to the exercises containing it, which answers
+  "words starting with ..." queries with one dict lookup per query token;
+- a deletion-neighbourhood index over name words (every word with at most
+  one character removed), which finds words one typo away from a query
+  word, e.g. "sqaut" or "dumbell";
+- a trigram index over the compact (space-free) name, which finds
+  substring matches and near-misses such as "benchpres" for "Bench Press";
+- a bigram index from every one- or two-character substring of the name
+  (spaces aside) to the exercises containing it, which answers queries
+  too short to have trigrams, e.g. "ow" in "Barbell Row".
+
+Only exercises reached through one of these lookups are scored, so the
+cost of a search depends on the number of matches rather than on the size
+of the catalog.
+"""
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Set
+
+# Score tiers, highest first
+EXACT = 100.0
+NAME_PREFIX = 80.0
+NAME_WORD_PREFIX = 60.0
+NAME_SUBSTRING = 50.0
+NAME_WORD_TYPO = 40.0
+DESCRIPTION_WORD_PREFIX = 30.0
+FUZZY = 20.0
+
+# Minimum Dice coefficient between trigram sets for a fuzzy name match
+FUZZY_THRESHOLD = 0.5
+
+# Shorter query words are too ambiguous to correct
+MIN_TYPO_LENGTH = 4
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(compact: str) -> Set[str]:
+    return {compact[i : i + 3] for i in range(len(compact) - 2)}
+
+
+def short_substrings(name: str) -> Set[str]:
+    """Substrings of a normalized ``name`` a query too short for trigrams
+    can be: one or two characters, possibly with a space in between."""
+    grams = set()
+    for i, char in enumerate(name):
+        if char == " ":
+            continue
+        grams.add(char)
+        for end in (i + 2, i + 3):
+            gram = name[i:end]
+            if len(gram) == end - i and gram[-1] != " ":
+                grams.add(gram)
+                break
+    return grams
+
+
+def deletions(word: str) -> Set[str]:
+    """The word itself and every variant with one character removed."""
+    return {word} | {word[:i] + word[i + 1 :] for i in range(len(word))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True if ``a`` and ``b`` differ by at most one insertion, deletion,
+    substitution or transposition of adjacent characters."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1 :]
+    if a[i + 1 :] == b[i + 1 :]:
+        return True
+    return a[i : i + 2] == b[i : i + 2][::-1] and a[i + 2 :] == b[i + 2 :]
+
+
+class ExerciseSearchIndex:
+    def __init__(self):
+        self._names: Dict[str, str] = {}
+        self._name_trigrams: Dict[str, Set[str]] = {}
+        self._name_prefixes: Dict[str, Set[str]] = defaultdict(set)
+        self._description_prefixes: Dict[str, Set[str]] = defaultdict(set)
+        self._trigram_postings: Dict[str, Set[str]] = defaultdict(set)
+        self._bigram_postings: Dict[str, Set[str]] = defaultdict(set)
+        self._word_postings: Dict[str, Set[str]] = defaultdict(set)
+        self._word_deletions: Dict[str, Set[str]] = defaultdict(set)
+
+    def add(self, exercise: dict) -> None:
+        exercise_id = exercise["id"]
+        name = normalize(exercise.get("name", ""))
+        self._names[exercise_id] = name
+        for token in name.split():
+            for end in range(1, len(token) + 1):
+                self._name_prefixes[token[:end]].add(exercise_id)
+            self._word_postings[token].add(exercise_id)
+            for variant in deletions(token):
+                self._word_deletions[variant].add(token)
+        for token in normalize(exercise.get("description") or "").split():
+            for end in range(1, len(token) + 1):
+                self._description_prefixes[token[:end]].add(exercise_id)
+        grams = trigrams(name.replace(" ", ""))
+        self._name_trigrams[exercise_id] = grams
+        for gram in grams:
+            self._trigram_postings[gram].add(exercise_id)
+        for gram in short_substrings(name):
+            self._bigram_postings[gram].add(exercise_id)
+
+    def _all_prefixed(self, index: Dict[str, Set[str]], tokens: List[str]) -> Set[str]:
+        """Ids where every query token prefixes some indexed token."""
+        matches = None
+        for token in tokens:
+            ids = index.get(token, set())
+            matches = set(ids) if matches is None else matches & ids
+            if not matches:
+                return set()
+        return matches or set()
+
+    def _typo_matches(self, token: str) -> Set[str]:
+        """Ids with a name word starting with ``token`` or one edit away."""
+        ids = set(self._name_prefixes.get(token, ()))
+        if len(token) >= MIN_TYPO_LENGTH:
+            candidates = set()
+            for variant in deletions(token):
+                candidates |= self._word_deletions.get(variant, set())
+            for word in candidates:
+                if within_one_edit(token, word):
+                    ids |= self._word_postings[word]
+        return ids
+
+    def search(self, query: str) -> List[str]:
+        """Exercise ids matching ``query``, best match first."""
+        normalized = normalize(query)
+        tokens = normalized.split()
+        if not tokens:
+            return []
+        compact = normalized.replace(" ", "")
+
+        scores: Dict[str, float] = {}
+
+        def score(exercise_id: str, value: float) -> None:
+            if value > scores.get(exercise_id, 0.0):
+                scores[exercise_id] = value
+
+        for exercise_id in self._all_prefixed(self._description_prefixes, tokens):
+            score(exercise_id, DESCRIPTION_WORD_PREFIX)
+
+        for exercise_id in self._all_prefixed(self._name_prefixes, tokens):
+            name = self._names[exercise_id]
+            if name == normalized:
+                score(exercise_id, EXACT)
+            elif name.startswith(normalized):
+                score(exercise_id, NAME_PREFIX)
+            else:
+                score(exercise_id, NAME_WORD_PREFIX)
+
+        typo_matches = None
+        for token in tokens:
+            ids = self._typo_matches(token)
+            typo_matches = ids if typo_matches is None else typo_matches & ids
+        for exercise_id in typo_matches or ():
+            score(exercise_id, NAME_WORD_TYPO)
+
+        query_grams = trigrams(compact)
+        if not query_grams:
+            for exercise_id in self._bigram_postings.get(normalized, ()):
+                score(exercise_id, NAME_SUBSTRING)
+        else:
+            shared = Counter()
+            for gram in query_grams:
+                for exercise_id in self._trigram_postings.get(gram, ()):
+                    shared[exercise_id] += 1
+            for exercise_id, count in shared.items():
+                name_compact = self._names[exercise_id].replace(" ", "")
+                if compact == name_compact:
+                    score(exercise_id, EXACT)
+                    continue
+                if compact in name_compact:
+                    score(exercise_id, NAME_SUBSTRING)
+                    continue
+                name_grams = self._name_trigrams[exercise_id]
+                dice = 2 * count / (len(query_grams) + len(name_grams))
+                if dice >= FUZZY_THRESHOLD:
+                    score(exercise_id, FUZZY * dice)
+
+        return sorted(
+            scores,
+            key=lambda exercise_id: (
+                -scores[exercise_id],
+                len(self._names[exercise_id]),
+                self._names[exercise_id],
+            ),
+        )
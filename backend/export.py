@@ -0,0 +1,88 @@
+"""Streaming export of the workout history.
+
+Workouts come from the storage backend's ``export`` iterator, which reads
+them in ``EXPORT_BATCH_SIZE`` batches, and are encoded as they arrive, so
+memory stays flat however long the history is.
+Encoded rows are coalesced into chunks of roughly ``CHUNK_BYTES`` before
+being handed to the ``StreamingResponse`` to avoid one write per row.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, List
+
+EXPORT_BATCH_SIZE = 500
+CHUNK_BYTES = 64 * 1024
+
+EXPORT_SORT = [("date", 1), ("id", 1)]
+
+CSV_COLUMNS = [
+    "workout_id",
+    "date",
+    "workout_notes",
+    "exercise_id",
+    "exercise_name",
+    "category",
+    "set_number",
+    "reps",
+    "weight",
+    "duration_minutes",
+    "distance_km",
+    "set_notes",
+]
+
+
+def workout_csv_rows(workout: dict) -> List[list]:
+    """One row per set, with the workout and entry repeated on each row."""
+    rows = []
+    for entry in workout.get("entries", []):
+        for set_data in entry.get("sets", []):
+            rows.append(
+                [
+                    workout.get("id"),
+                    workout.get("date"),
+                    workout.get("notes"),
+                    entry.get("exercise_id"),
+                    entry.get("exercise_name"),
+                    entry.get("category"),
+                    set_data.get("set_number"),
+                    set_data.get("reps"),
+                    set_data.get("weight"),
+                    set_data.get("duration_minutes"),
+                    set_data.get("distance_km"),
+                    set_data.get("notes"),
+                ]
+            )
+    return rows
+
+
+async def stream_workouts_ndjson(
+    workouts: AsyncIterable[dict],
+) -> AsyncIterator[bytes]:
+    chunk = []
+    size = 0
+    async for workout in workouts:
+        line = json.dumps(workout, separators=(",", ":")) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(chunk).encode()
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+async def stream_workouts_csv(workouts: AsyncIterable[dict]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    async for workout in workouts:
+        writer.writerows(workout_csv_rows(workout))
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
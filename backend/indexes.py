@@ -0,0 +1,259 @@
+"""Declarative MongoDB indexes for the app.
+
+``INDEXES`` lists every index the endpoints rely on. ``ensure_indexes`` is
+called from the app lifespan and is idempotent: ``createIndexes`` is a
+no-op for indexes that already exist with the same spec.
+
+Run ``python indexes.py check`` against a database to ensure the indexes
+and then ``explain()`` every query the endpoints issue, with and without
+their optional filters. The command exits non-zero if any of them plans a
+collection scan, except for the scans listed in ``FULL_SCANS``, which
+read the whole collection by design and are reported as such.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from aggregations import stats_pipeline
+from exercise_progress import DAY_END
+from export import EXPORT_SORT
+from pagination import WORKOUT_SORT, after_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "exercises": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "workouts": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Serves date-range filters through its prefix and the
+        # date-descending history sort with a stable id tie-break
+        IndexModel([("date", DESCENDING), ("id", DESCENDING)], name="date_id"),
+        # Multikey: one key per logged exercise, plus the day for the
+        # per-exercise progress recompute on delete
+        IndexModel(
+            [("entries.exercise_id", ASCENDING), ("date", ASCENDING)],
+            name="entries_exercise_id_date",
+        ),
+    ],
+    "templates": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    "exercise_daily_progress": [
+        # One document per (exercise, day), and the progress range scan
+        IndexModel(
+            [("exercise_id", ASCENDING), ("date", ASCENDING)],
+            name="exercise_id_date",
+            unique=True,
+        ),
+    ],
+}
+
+
+async def ensure_indexes(db) -> None:
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # A conflicting index (or duplicate ids for a unique index) must
+            # be fixed by hand; keep serving with whatever indexes exist
+            logger.error(f"Could not ensure indexes on {collection}: {e}")
+
+
+# Representative shapes of every query the endpoints send to Mongo; the
+# date filters are optional on most endpoints and left out by the
+# frontend's default views, so both variants are listed
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+SAMPLE_START = "2026-01-01"
+SAMPLE_END = "2026-01-31"
+
+ENDPOINT_QUERIES: List[Tuple[str, str, dict]] = [
+    (
+        "get_workout",
+        "workouts",
+        {"find": "workouts", "filter": {"id": SAMPLE_ID}},
+    ),
+    (
+        "delete_workout",
+        "workouts",
+        {"findAndModify": "workouts", "query": {"id": SAMPLE_ID}, "remove": True},
+    ),
+    (
+        "get_workouts",
+        "workouts",
+        {
+            "find": "workouts",
+            "filter": {"date": {"$gte": SAMPLE_START, "$lte": SAMPLE_END}},
+            "sort": dict(WORKOUT_SORT),
+        },
+    ),
+    (
+        "get_workouts (no filter)",
+        "workouts",
+        {"find": "workouts", "filter": {}, "sort": dict(WORKOUT_SORT), "limit": 50},
+    ),
+    (
+        "get_workouts (next page)",
+        "workouts",
+        {
+            "find": "workouts",
+            "filter": after_cursor(
+                {"date": {"$gte": SAMPLE_START}},
+                encode_cursor({"date": SAMPLE_END, "id": SAMPLE_ID}),
+            ),
+            "sort": dict(WORKOUT_SORT),
+        },
+    ),
+    (
+        "get_recent_workouts",
+        "workouts",
+        {"find": "workouts", "filter": {}, "sort": {"date": -1}, "limit": 5},
+    ),
+    (
+        "get_stats / get_dashboard",
+        "workouts",
+        {
+            "aggregate": "workouts",
+            "pipeline": stats_pipeline(
+                {"date": {"$gte": SAMPLE_START, "$lte": SAMPLE_END}}
+            ),
+            "cursor": {},
+        },
+    ),
+    (
+        "get_stats / get_dashboard (since)",
+        "workouts",
+        {
+            "aggregate": "workouts",
+            "pipeline": stats_pipeline({"date": {"$gte": SAMPLE_START}}),
+            "cursor": {},
+        },
+    ),
+    (
+        "get_stats / get_dashboard (all time)",
+        "workouts",
+        {"aggregate": "workouts", "pipeline": stats_pipeline({}), "cursor": {}},
+    ),
+    (
+        "get_trends / get_dashboard",
+        "daily_rollups",
+        {
+            "find": "daily_rollups",
+            "filter": {"_id": {"$gte": SAMPLE_START, "$lte": SAMPLE_END}},
+            "sort": {"_id": 1},
+        },
+    ),
+    (
+        "get_progress",
+        "exercise_daily_progress",
+        {
+            "find": "exercise_daily_progress",
+            "filter": {"exercise_id": SAMPLE_ID, "date": {"$gte": SAMPLE_START}},
+            "sort": {"date": 1},
+        },
+    ),
+    (
+        "delete_workout (progress recompute)",
+        "workouts",
+        {
+            "find": "workouts",
+            "filter": {
+                "date": {"$gte": SAMPLE_START, "$lt": SAMPLE_START + DAY_END},
+                "entries.exercise_id": {"$in": [SAMPLE_ID]},
+            },
+        },
+    ),
+    (
+        "export_workouts",
+        "workouts",
+        {
+            "find": "workouts",
+            "filter": {"date": {"$gte": SAMPLE_START, "$lte": SAMPLE_END}},
+            "sort": dict(EXPORT_SORT),
+        },
+    ),
+    (
+        "export_workouts (everything)",
+        "workouts",
+        {"find": "workouts", "filter": {}, "sort": dict(EXPORT_SORT)},
+    ),
+    (
+        "get_exercises (catalog load)",
+        "exercises",
+        {"find": "exercises", "filter": {}},
+    ),
+    (
+        "get_template",
+        "templates",
+        {"find": "templates", "filter": {"id": SAMPLE_ID}},
+    ),
+    (
+        "get_templates",
+        "templates",
+        {"find": "templates", "filter": {}, "sort": {"created_at": -1}},
+    ),
+]
+
+
+# Queries above that read every document by design, and why that is fine
+FULL_SCANS: Dict[str, str] = {
+    "get_stats / get_dashboard (all time)": (
+        "all-time totals add up every workout; only the stored totals are read"
+    ),
+    "get_exercises (catalog load)": (
+        "the whole catalog is loaded into memory, once per data version"
+    ),
+}
+
+
+def _has_collscan(plan) -> bool:
+    """Whether an explain output (find or aggregate) plans a collection scan."""
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(
+            _has_collscan(value)
+            for key, value in plan.items()
+            if key != "rejectedPlans"
+        )
+    if isinstance(plan, list):
+        return any(_has_collscan(item) for item in plan)
+    return False
+
+
+async def check_query_plans(db) -> List[str]:
+    """Explain every endpoint query; return the names that scan a collection
+    without being listed in ``FULL_SCANS``."""
+    failures = []
+    for name, collection, command in ENDPOINT_QUERIES:
+        explain = await db.command("explain", command, verbosity="queryPlanner")
+        if not _has_collscan(explain):
+            logger.info(f"{name}: uses an index")
+        elif name in FULL_SCANS:
+            logger.warning(f"{name}: COLLSCAN on {collection} ({FULL_SCANS[name]})")
+        else:
+            logger.error(f"{name}: COLLSCAN on {collection}")
+            failures.append(name)
+    return failures
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    from storage import open_mongo_database
+
+    db = open_mongo_database("Creating indexes")
+
+    async def main() -> int:
+        await ensure_indexes(db)
+        if sys.argv[1:] == ["check"]:
+            return 1 if await check_query_plans(db) else 0
+        return 0
+
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,158 @@
+"""Request and MongoDB command metrics for ``/api/metrics``.
+
+``MetricsMiddleware`` times every HTTP request by route template (so
+``/api/workouts/{workout_id}`` is one series, not one per id) and records
+in-flight requests and response sizes as sent on the wire.
+
+``CommandMetrics`` is a pymongo ``CommandListener`` on the Motor client. It
+records the server-side duration of every command and the documents it
+returned, per command and collection. Comparing a route's latency with
+the Mongo time of the commands it issues shows where its time goes.
+"""
+
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from pymongo import monitoring
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics import MetricsRegistry
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5)
+
+
+def route_template(routes: List[BaseRoute], scope: Scope) -> str:
+    """The path template of the route that will handle ``scope``."""
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "") or "/"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(
+        self, app: ASGIApp, registry: MetricsRegistry, routes: List[BaseRoute]
+    ):
+        self.app = app
+        self.routes = routes
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests.", ("method", "route", "status")
+        )
+        self.latency = registry.histogram(
+            "http_request_duration_seconds",
+            "Time to the end of the response body.",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight",
+            "Requests being handled.",
+            ("method", "route"),
+        )
+        self.sizes = registry.histogram(
+            "http_response_size_bytes",
+            "Response body bytes sent.",
+            ("method", "route"),
+            SIZE_BUCKETS,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = (scope["method"], route_template(self.routes, scope))
+        status = "500"
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.in_flight.inc(labels)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec(labels)
+            self.latency.observe(labels, time.perf_counter() - start)
+            self.sizes.observe(labels, size)
+            self.requests.inc(labels + (status,))
+
+
+def command_collection(event: monitoring.CommandStartedEvent) -> str:
+    """The collection a command runs on ("" for database commands)."""
+    if event.command_name == "getMore":
+        return str(event.command.get("collection", ""))
+    target = event.command.get(event.command_name)
+    return target if isinstance(target, str) else ""
+
+
+def documents_returned(reply: dict) -> int:
+    """Documents in a command reply's batch."""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if "value" in reply:  # findAndModify
+        return 1 if reply["value"] is not None else 0
+    return 0
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Mongo command durations and returned documents, from driver events.
+
+    Started and finished events are matched on (connection, request id);
+    the collection is only known from the started event.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple, str] = {}
+        self.commands = registry.counter(
+            "mongo_commands_total",
+            "MongoDB commands by outcome.",
+            ("command", "collection", "outcome"),
+        )
+        self.duration = registry.histogram(
+            "mongo_command_duration_seconds",
+            "Server round trip of MongoDB commands.",
+            ("command", "collection"),
+            MONGO_BUCKETS,
+        )
+        self.documents = registry.counter(
+            "mongo_documents_returned_total",
+            "Documents returned by MongoDB commands.",
+            ("command", "collection"),
+        )
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        with self._lock:
+            self._pending[self._key(event)] = command_collection(event)
+
+    def _finished(self, event, outcome: str, documents: int) -> None:
+        with self._lock:
+            collection = self._pending.pop(self._key(event), "")
+        labels = (event.command_name, collection)
+        self.commands.inc(labels + (outcome,))
+        self.duration.observe(labels, event.duration_micros / 1e6)
+        if documents:
+            self.documents.inc(labels, documents)
+
+    def succeeded(self, event):
+        self._finished(event, "success", documents_returned(event.reply))
+
+    def failed(self, event):
+        self._finished(event, "failure", 0)
@@ -0,0 +1,149 @@
+"""Production launcher for the API: ``python launcher.py`` (or ``python server.py``).
+
+Runs the app in several worker processes so one CPU-heavy request only
+ties up its own worker. Settings come from the environment:
+
+    HOST, PORT               bind address (0.0.0.0:8000)
+    WEB_CONCURRENCY          worker processes (default: one per CPU)
+    MAX_REQUESTS             recycle a worker after this many requests
+                             (0, the default, never recycles)
+    MAX_REQUESTS_JITTER      up to this many extra requests per worker, so
+                             workers do not all recycle at once (default:
+                             a tenth of MAX_REQUESTS)
+    PRELOAD_APP              import the app once in the master before
+                             forking the workers (1)
+    GRACEFUL_TIMEOUT         seconds a stopping or recycled worker gets to
+                             finish its in-flight requests (30)
+    KEEPALIVE                HTTP keep-alive timeout in seconds (5)
+    LOG_LEVEL                info
+    METRICS_DIR              where workers share metric snapshots, so
+                             ``/api/metrics`` covers all of them; cleared
+                             on start
+
+Workers are gunicorn ``UvicornWorker``s when gunicorn is installed, which
+gives preloading and recycling. Without it the launcher falls back to
+uvicorn's own process manager, which can do neither. Either way uvicorn
+uses uvloop and httptools when they are installed.
+
+The database is prepared (indexes, seed data, backfills) once here before
+any worker starts, instead of by every worker at the same time. Shared
+state such as data versions lives in the database, so the per-worker
+caches stay correct across workers. The
+in-memory storage backend cannot be shared, so with it there is only
+ever one worker.
+"""
+
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def settings() -> dict:
+    max_requests = int(os.environ.get("MAX_REQUESTS", "0"))
+    return {
+        "host": os.environ.get("HOST", "0.0.0.0"),
+        "port": int(os.environ.get("PORT", "8000")),
+        "workers": int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        "max_requests": max_requests,
+        "max_requests_jitter": int(
+            os.environ.get("MAX_REQUESTS_JITTER", max_requests // 10)
+        ),
+        "preload": os.environ.get("PRELOAD_APP", "1") == "1",
+        "graceful_timeout": int(os.environ.get("GRACEFUL_TIMEOUT", "30")),
+        "keepalive": int(os.environ.get("KEEPALIVE", "5")),
+        "log_level": os.environ.get("LOG_LEVEL", "info"),
+    }
+
+
+def prepare_database() -> None:
+    """Run the app's startup maintenance once, with a storage connection of
+    its own so none is inherited by the forked workers. The app module is
+    not imported here: importing it opens its storage."""
+    from seed import prepare_database as prepare
+    from storage import open_storage
+
+    async def run():
+        store = open_storage()
+        try:
+            await prepare(store)
+        finally:
+            store.close()
+
+    asyncio.run(run())
+    # Inherited by the workers, whose lifespan then skips it
+    os.environ["PREPARE_DATABASE"] = "0"
+
+
+def run_gunicorn(config: dict) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        "bind": f"{config['host']}:{config['port']}",
+        "workers": config["workers"],
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": config["preload"],
+        "max_requests": config["max_requests"],
+        "max_requests_jitter": config["max_requests_jitter"],
+        "graceful_timeout": config["graceful_timeout"],
+        "keepalive": config["keepalive"],
+        "loglevel": config["log_level"],
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from server import app
+
+            return app
+
+    Application().run()
+
+
+def run_uvicorn(config: dict) -> None:
+    import uvicorn
+
+    if config["max_requests"]:
+        logger.warning("MAX_REQUESTS needs gunicorn; workers will not be recycled")
+    uvicorn.run(
+        "server:app",
+        host=config["host"],
+        port=config["port"],
+        workers=config["workers"],
+        loop="auto",
+        http="auto",
+        timeout_keep_alive=config["keepalive"],
+        timeout_graceful_shutdown=config["graceful_timeout"],
+        log_level=config["log_level"],
+    )
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    config = settings()
+    if os.environ.get("STORAGE_BACKEND") == "memory":
+        # Every process would have data of its own; the single worker
+        # prepares it in its lifespan
+        if config["workers"] > 1:
+            logger.warning("STORAGE_BACKEND=memory runs a single worker")
+        config["workers"] = 1
+    else:
+        prepare_database()
+    if os.environ.get("METRICS_DIR"):
+        from metrics import reset_directory
+
+        reset_directory(os.environ["METRICS_DIR"])
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        run_uvicorn(config)
+    else:
+        run_gunicorn(config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""In-process metric primitives and Prometheus text rendering.
+
+``MetricsRegistry`` holds labelled counter, gauge and histogram families.
+Observations may come from any thread (driver event listeners), so every
+update goes through the registry's lock.
+
+Every worker process has its own registry. With ``METRICS_DIR`` set each
+worker periodically writes a snapshot there and ``/api/metrics`` merges
+them, so a scrape that lands on any worker sees the whole server:
+counters and histograms are summed over all snapshots, gauges only over
+the snapshots that are still fresh (live workers).
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Labels = Tuple[str, ...]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket histogram; bucket bounds are inclusive upper bounds.
+
+    Not thread-safe on its own: callers observing from several threads
+    (driver event listeners) hold their own lock.
+    """
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        # One count per bucket plus the overflow (+Inf) bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self) -> Dict[str, int]:
+        """Counts of observations <= each bound, keyed by the bound."""
+        total = 0
+        cumulative = {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            cumulative["+Inf" if bound == float("inf") else f"{bound:g}"] = total
+        return cumulative
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "buckets": self.cumulative(),
+        }
+
+
+class MetricFamily:
+    """One metric name with a value (or histogram) per label combination."""
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        kind: str,
+        name: str,
+        help: str,
+        labels: Labels = (),
+        buckets: Optional[Iterable[float]] = None,
+    ):
+        self._lock = registry.lock
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) if buckets else ()
+        self.samples: Dict[Labels, object] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self.samples[labels] = self.samples.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels = (), value: float = 0.0) -> None:
+        """Set a gauge, or mirror a counter kept elsewhere."""
+        with self._lock:
+            self.samples[labels] = value
+
+    def observe(self, labels: Labels = (), value: float = 0.0) -> None:
+        with self._lock:
+            histogram = self.samples.get(labels)
+            if histogram is None:
+                histogram = self.samples[labels] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def set_histogram(self, labels: Labels, histogram: Histogram) -> None:
+        """Mirror a histogram kept elsewhere (same buckets)."""
+        with self._lock:
+            copy = Histogram(self.buckets)
+            copy.counts = list(histogram.counts)
+            copy.count = histogram.count
+            copy.sum = histogram.sum
+            copy.max = histogram.max
+            self.samples[labels] = copy
+
+    def snapshot(self) -> dict:
+        samples = []
+        for labels, value in self.samples.items():
+            if isinstance(value, Histogram):
+                value = {"counts": list(value.counts), "sum": value.sum}
+            samples.append([list(labels), value])
+        return {
+            "kind": self.kind,
+            "help": self.help,
+            "labels": list(self.labels),
+            "buckets": list(self.buckets),
+            "samples": samples,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _family(self, kind: str, name: str, help: str, labels: Labels, **kwargs):
+        family = self._families.get(name)
+        if family is None:
+            family = MetricFamily(self, kind, name, help, labels, **kwargs)
+            self._families[name] = family
+        return family
+
+    def counter(self, name: str, help: str, labels: Labels = ()) -> MetricFamily:
+        return self._family("counter", name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Labels = ()) -> MetricFamily:
+        return self._family("gauge", name, help, labels)
+
+    def histogram(
+        self, name: str, help: str, labels: Labels, buckets: Iterable[float]
+    ) -> MetricFamily:
+        return self._family("histogram", name, help, labels, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes mirrored metrics right before
+        every snapshot."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        for collector in self._collectors:
+            collector()
+        with self.lock:
+            return {
+                "time": time.time(),
+                "families": {
+                    name: family.snapshot() for name, family in self._families.items()
+                },
+            }
+
+
+def reset_directory(directory: str) -> None:
+    """Create ``directory`` and drop the snapshots of a previous run."""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    for path in Path(directory).glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+def write_snapshot(registry: MetricsRegistry, directory: str) -> None:
+    """Write this process's snapshot to ``directory`` (atomically)."""
+    path = Path(directory) / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(registry.snapshot()))
+    os.replace(tmp, path)
+
+
+def read_snapshots(directory: str) -> List[dict]:
+    """Snapshots written by the other processes."""
+    snapshots = []
+    for path in Path(directory).glob("*.json"):
+        if path.stem == str(os.getpid()):
+            continue
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # being replaced or removed
+    return snapshots
+
+
+def merge_snapshots(snapshots: List[dict], stale_after: float) -> dict:
+    """Sum snapshots; gauges of snapshots older than ``stale_after``
+    seconds (exited workers) are left out."""
+    now = time.time()
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        fresh = now - snapshot["time"] <= stale_after
+        for name, family in snapshot["families"].items():
+            if family["kind"] == "gauge" and not fresh:
+                continue
+            target = merged.setdefault(name, {**family, "samples": {}})
+            samples = target["samples"]
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = (
+                        {"counts": list(value["counts"]), "sum": value["sum"]}
+                        if isinstance(value, dict)
+                        else value
+                    )
+                elif isinstance(value, dict):
+                    current["counts"] = [
+                        a + b for a, b in zip(current["counts"], value["counts"])
+                    ]
+                    current["sum"] += value["sum"]
+                else:
+                    samples[key] = current + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(families: Dict[str, dict]) -> str:
+    """Prometheus text exposition of merged snapshot families."""
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        names = family["labels"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for labels, value in sorted(family["samples"].items()):
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            total = 0
+            bounds = [f"{bound:g}" for bound in family["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, value["counts"]):
+                total += count
+                le = _labels(names, labels, f'le="{bound}"')
+                lines.append(f"{name}_bucket{le} {total}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(value['sum'])}")
+            lines.append(f"{name}_count{_labels(names, labels)} {total}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,174 @@
+"""Motor client settings and connection pool telemetry.
+
+``client_options`` maps environment variables onto the driver's pool,
+timeout and compression options. Unset variables keep the driver default.
+The pool limits apply per worker process:
+
+    MONGO_MAX_POOL_SIZE                   maxPoolSize (100)
+    MONGO_MIN_POOL_SIZE                   minPoolSize (0), also the number of
+                                          connections warmed on startup
+    MONGO_MAX_IDLE_TIME_MS                maxIdleTimeMS
+    MONGO_WAIT_QUEUE_TIMEOUT_MS           waitQueueTimeoutMS
+    MONGO_SERVER_SELECTION_TIMEOUT_MS     serverSelectionTimeoutMS (30000)
+    MONGO_CONNECT_TIMEOUT_MS              connectTimeoutMS (20000)
+    MONGO_COMPRESSORS                     e.g. "zstd,snappy,zlib"; zstd and
+                                          snappy need the zstandard /
+                                          python-snappy packages
+
+``PoolMonitor`` is a CMAP (connection monitoring and pooling) event
+listener. It tracks, per server, the open and in-use connections and how
+long operations wait to check a connection out, which is what the pool
+size should be tuned against: a wait histogram that grows while in-use
+sits at ``maxPoolSize`` means the pool is too small for the concurrency.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict
+
+from pymongo import monitoring
+
+from metrics import Histogram
+
+OPTION_ENV = {
+    "maxPoolSize": "MONGO_MAX_POOL_SIZE",
+    "minPoolSize": "MONGO_MIN_POOL_SIZE",
+    "maxIdleTimeMS": "MONGO_MAX_IDLE_TIME_MS",
+    "waitQueueTimeoutMS": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+    "serverSelectionTimeoutMS": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+    "connectTimeoutMS": "MONGO_CONNECT_TIMEOUT_MS",
+}
+
+WAIT_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def client_options() -> dict:
+    """Keyword arguments for ``AsyncIOMotorClient`` from the environment."""
+    options = {}
+    for option, env in OPTION_ENV.items():
+        value = os.environ.get(env)
+        if value:
+            options[option] = int(value)
+    compressors = os.environ.get("MONGO_COMPRESSORS")
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+class _PoolStats:
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.cleared = 0
+        self.wait_ms = Histogram(WAIT_BUCKETS_MS)
+
+    def snapshot(self) -> dict:
+        return {
+            "open": self.open,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "checkouts": self.checkouts,
+            "checkout_failures": dict(self.checkout_failures),
+            "cleared": self.cleared,
+            "wait_ms": self.wait_ms.snapshot(),
+        }
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection pool statistics, fed by the driver's CMAP events.
+
+    Events arrive on the driver's worker threads. A checkout starts and
+    ends on the same thread, which is how wait times are measured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, _PoolStats] = {}
+        self._checkout_started = threading.local()
+
+    def _pool(self, event) -> _PoolStats:
+        address = "%s:%s" % event.address
+        pool = self._pools.get(address)
+        if pool is None:
+            pool = self._pools[address] = _PoolStats()
+        return pool
+
+    def _wait_ms(self) -> float:
+        started = getattr(self._checkout_started, "value", None)
+        self._checkout_started.value = None
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {address: pool.snapshot() for address, pool in self._pools.items()}
+
+    def each_pool(self, callback) -> None:
+        """Call ``callback(address, stats)`` for every pool, under the lock
+        (for mirroring into a metrics registry)."""
+        with self._lock:
+            for address, pool in self._pools.items():
+                callback(address, pool)
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event).cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event).open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._pool(event).open -= 1
+
+    def connection_check_out_started(self, event):
+        self._checkout_started.value = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        wait_ms = self._wait_ms()
+        with self._lock:
+            pool = self._pool(event)
+            pool.checkout_failures[event.reason] = (
+                pool.checkout_failures.get(event.reason, 0) + 1
+            )
+            pool.wait_ms.observe(wait_ms)
+
+    def connection_checked_out(self, event):
+        wait_ms = self._wait_ms()
+        with self._lock:
+            pool = self._pool(event)
+            pool.checkouts += 1
+            pool.in_use += 1
+            pool.max_in_use = max(pool.max_in_use, pool.in_use)
+            pool.wait_ms.observe(wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event).in_use -= 1
+
+
+async def warm_pool(client, connections: int) -> None:
+    """Open up to ``connections`` pooled connections before serving, by
+    running that many pings at once."""
+    if connections > 0:
+        await asyncio.gather(
+            *(client.admin.command("ping") for _ in range(connections))
+        )
@@ -0,0 +1,54 @@
+"""Keyset (cursor) pagination for the workout history.
+
+History is ordered by ``(date, id)`` descending, which the ``date_id``
+index serves directly. A page cursor is the sort key of the last workout
+on the previous page, so fetching any page is one index range scan no
+matter how deep into the history it is, unlike skip/offset paging.
+
+Cursors are opaque to clients: url-safe base64 of ``[date, id]``.
+"""
+
+import base64
+import binascii
+import json
+from typing import Optional, Tuple
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+WORKOUT_SORT = [("date", -1), ("id", -1)]
+
+
+def encode_cursor(workout: dict) -> str:
+    raw = json.dumps([workout["date"], workout["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Return ``(date, id)``; raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date, workout_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(date, str) or not isinstance(workout_id, str):
+        raise ValueError("Invalid cursor")
+    return date, workout_id
+
+
+def after_key(query: dict, key: Optional[Tuple[str, str]]) -> dict:
+    """Restrict ``query`` to workouts sorting after the ``(date, id)`` key."""
+    if not key:
+        return query
+    date, workout_id = key
+    keyset = {
+        "$or": [
+            {"date": {"$lt": date}},
+            {"date": date, "id": {"$lt": workout_id}},
+        ]
+    }
+    return {"$and": [query, keyset]} if query else keyset
+
+
+def after_cursor(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict ``query`` to workouts sorting after ``cursor``."""
+    return after_key(query, decode_cursor(cursor) if cursor else None)
@@ -0,0 +1,129 @@
+"""Per-collection data versions and a versioned response cache.
+
+``DataVersions`` counts writes per collection; the write paths call
+``bump`` for the collections they touch. Versions are what both the
+response cache and the ETags of the read endpoints are derived from.
+
+The counters live in Mongo (``db.data_versions``, one tiny document per
+collection) rather than in the process, so every worker of a multi-worker
+deployment sees the writes of the others:
+
+    {"_id": "workouts", "version": 42, "epoch": "<uuid hex>"}
+
+The ``epoch`` is set when a counter is created, so counters that start
+over (the collection was dropped) never repeat a version handed out
+before. ``DataVersions`` is the Mongo implementation; the other storage
+backends keep the same counters their own way (see ``storage``).
+
+Every read is checked against the counters as they are in the database
+at that moment, never a copy held by the worker, so no worker serves a
+304 or a cached response from before another worker's write. A request
+reads them once (the ETag check) and hands what it read to the response
+cache and the exercise catalog rather than reading them again.
+
+Every cached response is keyed on ``(endpoint, params, data version)``
+where the data version is the tuple of counters of the collections the
+endpoint reads, so a read after a write always misses and recomputes;
+entries cached under an older version are simply never looked up again
+and age out of the LRU.
+
+Entries also expire after ``ttl`` seconds. Analytics depend on the
+current date (streaks, default date windows), so callers include the day
+in ``params`` and the TTL bounds anything else that drifts with time.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Tuple,
+)
+
+from storage.base import DataVersionStore, Version
+
+
+class DataVersions(DataVersionStore):
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def get(self, collections: Iterable[str]) -> Tuple[Version, ...]:
+        """The current ``(epoch, version)`` of each of ``collections``."""
+        collections = list(collections)
+        docs = await self._collection.find({"_id": {"$in": collections}}).to_list(None)
+        versions = {doc["_id"]: (doc["epoch"], doc["version"]) for doc in docs}
+        return tuple(versions.get(name, ("", 0)) for name in collections)
+
+    async def bump(self, *collections: str) -> None:
+        """Record a write to ``collections``."""
+        for name in collections:
+            await self._collection.update_one(
+                {"_id": name},
+                {"$inc": {"version": 1}, "$setOnInsert": {"epoch": uuid.uuid4().hex}},
+                upsert=True,
+            )
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        versions: DataVersionStore,
+        maxsize: int = 256,
+        ttl: float = 60.0,
+        clock=time.monotonic,
+    ):
+        self.versions = versions
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        collections: Tuple[str, ...],
+        compute: Callable[[], Awaitable[Any]],
+        versions: Optional[Tuple[Version, ...]] = None,
+    ) -> Any:
+        """Return the cached response for ``endpoint``/``params`` at the
+        current version of ``collections``, computing it on a miss.
+
+        ``versions`` are those versions when the caller has just read them.
+        """
+        if versions is None:
+            versions = await self.versions.get(collections)
+        key = (endpoint, tuple(sorted(params.items())), collections, versions)
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = await compute()
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,122 @@
+"""Materialized per-day workout rollups.
+
+``db.daily_rollups`` holds one small document per calendar day:
+
+    {"_id": "2026-01-31", "date": "2026-01-31",
+     "workouts": 2, "sets": 24, "volume": 5310.0, "calories": 402.3}
+
+The workout write paths keep it current with ``$inc`` deltas so the trend
+charts never have to touch ``db.workouts``. ``rebuild_daily_rollups``
+regenerates the collection from scratch for backfills and drift repair.
+"""
+
+import logging
+from collections import defaultdict
+from typing import List
+
+from pymongo import ReplaceOne, UpdateOne
+
+from aggregations import daily_totals_pipeline
+
+ROLLUP_FIELDS = ("workouts", "sets", "volume", "calories")
+
+logger = logging.getLogger(__name__)
+
+
+def workout_rollup(workout: dict) -> dict:
+    """A workout's contribution to its day, from its stored totals."""
+    return {
+        "workouts": 1,
+        "sets": workout["total_sets"],
+        "volume": workout["total_volume"],
+        "calories": workout["total_calories"],
+    }
+
+
+async def apply_workout(db, workout: dict, sign: int = 1) -> None:
+    """Add (``sign=1``) or remove (``sign=-1``) a workout from its day."""
+    day = workout.get("date", "")[:10]
+    totals = workout_rollup(workout)
+    await db.daily_rollups.update_one(
+        {"_id": day},
+        {
+            "$inc": {field: sign * totals[field] for field in ROLLUP_FIELDS},
+            "$setOnInsert": {"date": day},
+        },
+        upsert=True,
+    )
+    if sign < 0:
+        # Drop days that no longer have any workouts
+        await db.daily_rollups.delete_one({"_id": day, "workouts": {"$lte": 0}})
+
+
+async def add_workouts(db, workouts: List[dict]) -> None:
+    """Fold many new workouts in with a single bulk write (bulk imports)."""
+    days = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+    for workout in workouts:
+        totals = workout_rollup(workout)
+        day = days[workout.get("date", "")[:10]]
+        for field in ROLLUP_FIELDS:
+            day[field] += totals[field]
+    if days:
+        await db.daily_rollups.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": day},
+                    {"$inc": totals, "$setOnInsert": {"date": day}},
+                    upsert=True,
+                )
+                for day, totals in days.items()
+            ],
+            ordered=False,
+        )
+
+
+def rounded_rollup(rollup: dict) -> dict:
+    rollup["volume"] = round(rollup["volume"], 1)
+    rollup["calories"] = round(rollup["calories"], 1)
+    return rollup
+
+
+async def get_daily_rollups(db, start_date: str, end_date: str) -> List[dict]:
+    """Rollups for every day with workouts in [start_date, end_date], by date."""
+    rollups = (
+        await db.daily_rollups.find(
+            {"_id": {"$gte": start_date[:10], "$lte": end_date[:10]}}, {"_id": 0}
+        )
+        .sort("_id", 1)
+        .to_list(None)
+    )
+    return [rounded_rollup(rollup) for rollup in rollups]
+
+
+async def rebuild_daily_rollups(db) -> int:
+    """Regenerate ``db.daily_rollups`` from ``db.workouts``.
+
+    Existing rollup documents are replaced in place and days without any
+    workouts are removed, so readers never see an empty collection while
+    the rebuild runs. Returns the number of days written.
+    """
+    rollups = await db.workouts.aggregate(daily_totals_pipeline()).to_list(None)
+    days = [rollup["_id"] for rollup in rollups]
+
+    if rollups:
+        await db.daily_rollups.bulk_write(
+            [
+                ReplaceOne({"_id": rollup["_id"]}, rollup, upsert=True)
+                for rollup in rollups
+            ],
+            ordered=False,
+        )
+    await db.daily_rollups.delete_many({"_id": {"$nin": days}})
+    logger.info(f"Rebuilt daily rollups for {len(days)} days")
+    return len(days)
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from storage import open_mongo_database
+
+    db = open_mongo_database("Rebuilding the daily rollups")
+    asyncio.run(rebuild_daily_rollups(db))
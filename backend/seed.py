@@ -0,0 +1,639 @@
+"""The exercise catalog every new database starts with, and the one-off
+startup work that puts it there.
+
+Kept apart from ``server.py`` so the launcher can prepare the database
+before any worker starts without importing the app, which would open the
+app's own storage connection in the master process.
+"""
+
+import logging
+import uuid
+
+# Pre-populated exercises data
+INITIAL_EXERCISES = [
+    # Chest
+    {
+        "name": "Bench Press",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Classic chest compound movement",
+    },
+    {
+        "name": "Incline Bench Press",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Upper chest focused press",
+    },
+    {
+        "name": "Decline Bench Press",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Lower chest focused press",
+    },
+    {
+        "name": "Dumbbell Fly",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Chest isolation movement",
+    },
+    {
+        "name": "Cable Crossover",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Cable chest isolation",
+    },
+    {
+        "name": "Push-Up",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Bodyweight chest exercise",
+    },
+    {
+        "name": "Chest Dip",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Weighted dip for chest",
+    },
+    {
+        "name": "Dumbbell Press",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Dumbbell bench press variation",
+    },
+    {
+        "name": "Machine Chest Press",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Machine guided chest press",
+    },
+    {
+        "name": "Pec Deck Fly",
+        "category": "strength",
+        "muscle_group": "chest",
+        "description": "Machine fly for chest",
+    },
+    # Back
+    {
+        "name": "Deadlift",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Full body posterior chain movement",
+    },
+    {
+        "name": "Pull-Up",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Bodyweight back exercise",
+    },
+    {
+        "name": "Lat Pulldown",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Machine lat exercise",
+    },
+    {
+        "name": "Barbell Row",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Compound back movement",
+    },
+    {
+        "name": "Dumbbell Row",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Single arm back row",
+    },
+    {
+        "name": "Seated Cable Row",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Cable back exercise",
+    },
+    {
+        "name": "T-Bar Row",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Barbell row variation",
+    },
+    {
+        "name": "Face Pull",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Rear delt and upper back",
+    },
+    {
+        "name": "Chin-Up",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Underhand pull-up variation",
+    },
+    {
+        "name": "Rack Pull",
+        "category": "strength",
+        "muscle_group": "back",
+        "description": "Partial deadlift from rack",
+    },
+    # Shoulders
+    {
+        "name": "Overhead Press",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Standing barbell press",
+    },
+    {
+        "name": "Dumbbell Shoulder Press",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Seated dumbbell press",
+    },
+    {
+        "name": "Lateral Raise",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Side delt isolation",
+    },
+    {
+        "name": "Front Raise",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Front delt isolation",
+    },
+    {
+        "name": "Rear Delt Fly",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Rear delt isolation",
+    },
+    {
+        "name": "Arnold Press",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Rotating shoulder press",
+    },
+    {
+        "name": "Upright Row",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Barbell shoulder movement",
+    },
+    {
+        "name": "Shrugs",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Trap isolation",
+    },
+    {
+        "name": "Machine Shoulder Press",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Machine guided press",
+    },
+    {
+        "name": "Cable Lateral Raise",
+        "category": "strength",
+        "muscle_group": "shoulders",
+        "description": "Cable side delt work",
+    },
+    # Biceps
+    {
+        "name": "Barbell Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Classic bicep exercise",
+    },
+    {
+        "name": "Dumbbell Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Alternating dumbbell curls",
+    },
+    {
+        "name": "Hammer Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Neutral grip curl",
+    },
+    {
+        "name": "Preacher Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Isolated bicep curl",
+    },
+    {
+        "name": "Concentration Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Single arm focused curl",
+    },
+    {
+        "name": "Cable Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Cable bicep exercise",
+    },
+    {
+        "name": "Incline Dumbbell Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Stretched bicep curl",
+    },
+    {
+        "name": "EZ Bar Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Angled bar curl",
+    },
+    {
+        "name": "Spider Curl",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Incline bench curl",
+    },
+    {
+        "name": "21s",
+        "category": "strength",
+        "muscle_group": "biceps",
+        "description": "Partial rep bicep finisher",
+    },
+    # Triceps
+    {
+        "name": "Tricep Pushdown",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Cable tricep exercise",
+    },
+    {
+        "name": "Skull Crusher",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Lying tricep extension",
+    },
+    {
+        "name": "Close Grip Bench Press",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Tricep focused press",
+    },
+    {
+        "name": "Overhead Tricep Extension",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Cable or dumbbell overhead",
+    },
+    {
+        "name": "Dips",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Tricep focused dips",
+    },
+    {
+        "name": "Kickback",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Dumbbell kickback",
+    },
+    {
+        "name": "Diamond Push-Up",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Close hand push-up",
+    },
+    {
+        "name": "Rope Pushdown",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Rope attachment pushdown",
+    },
+    {
+        "name": "JM Press",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Hybrid press movement",
+    },
+    {
+        "name": "Bench Dip",
+        "category": "strength",
+        "muscle_group": "triceps",
+        "description": "Bodyweight tricep dip",
+    },
+    # Legs
+    {
+        "name": "Squat",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Barbell back squat",
+    },
+    {
+        "name": "Front Squat",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Barbell front squat",
+    },
+    {
+        "name": "Leg Press",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Machine leg press",
+    },
+    {
+        "name": "Lunges",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Walking or stationary lunges",
+    },
+    {
+        "name": "Romanian Deadlift",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Hamstring focused deadlift",
+    },
+    {
+        "name": "Leg Extension",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Quad isolation",
+    },
+    {
+        "name": "Leg Curl",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Hamstring isolation",
+    },
+    {
+        "name": "Calf Raise",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Standing calf raise",
+    },
+    {
+        "name": "Bulgarian Split Squat",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Single leg squat",
+    },
+    {
+        "name": "Hack Squat",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Machine squat variation",
+    },
+    {
+        "name": "Hip Thrust",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Glute focused movement",
+    },
+    {
+        "name": "Goblet Squat",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Dumbbell front squat",
+    },
+    {
+        "name": "Step-Up",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Single leg step exercise",
+    },
+    {
+        "name": "Seated Calf Raise",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Seated calf exercise",
+    },
+    {
+        "name": "Good Morning",
+        "category": "strength",
+        "muscle_group": "legs",
+        "description": "Hamstring and back exercise",
+    },
+    # Core
+    {
+        "name": "Plank",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Isometric core hold",
+    },
+    {
+        "name": "Crunch",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Basic ab exercise",
+    },
+    {
+        "name": "Russian Twist",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Rotational core work",
+    },
+    {
+        "name": "Leg Raise",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Hanging or lying leg raise",
+    },
+    {
+        "name": "Ab Rollout",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Wheel rollout exercise",
+    },
+    {
+        "name": "Cable Crunch",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Weighted cable crunch",
+    },
+    {
+        "name": "Dead Bug",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Core stability exercise",
+    },
+    {
+        "name": "Mountain Climber",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Dynamic core exercise",
+    },
+    {
+        "name": "Bicycle Crunch",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Rotational crunch",
+    },
+    {
+        "name": "Side Plank",
+        "category": "strength",
+        "muscle_group": "core",
+        "description": "Oblique isometric hold",
+    },
+    # Full Body
+    {
+        "name": "Clean and Jerk",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Olympic lift",
+    },
+    {
+        "name": "Snatch",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Olympic lift",
+    },
+    {
+        "name": "Thruster",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Squat to press",
+    },
+    {
+        "name": "Burpee",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Full body conditioning",
+    },
+    {
+        "name": "Kettlebell Swing",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Hip hinge explosive movement",
+    },
+    {
+        "name": "Turkish Get-Up",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Complex full body movement",
+    },
+    {
+        "name": "Farmer's Walk",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Loaded carry",
+    },
+    {
+        "name": "Battle Ropes",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Conditioning exercise",
+    },
+    {
+        "name": "Box Jump",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Plyometric exercise",
+    },
+    {
+        "name": "Man Maker",
+        "category": "strength",
+        "muscle_group": "full_body",
+        "description": "Complex dumbbell movement",
+    },
+    # Cardio
+    {
+        "name": "Running",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Outdoor or treadmill running",
+    },
+    {
+        "name": "Cycling",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Bike or stationary cycling",
+    },
+    {
+        "name": "Rowing",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Rowing machine",
+    },
+    {
+        "name": "Swimming",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Pool swimming",
+    },
+    {
+        "name": "Jump Rope",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Skipping rope cardio",
+    },
+    {
+        "name": "Stair Climber",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Stair machine",
+    },
+    {
+        "name": "Elliptical",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Elliptical machine",
+    },
+    {
+        "name": "Walking",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Brisk walking",
+    },
+    {
+        "name": "HIIT",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "High intensity interval training",
+    },
+    {
+        "name": "Sprints",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Sprint intervals",
+    },
+    {
+        "name": "Boxing",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Boxing workout",
+    },
+    {
+        "name": "Kickboxing",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Kickboxing cardio",
+    },
+    {
+        "name": "Dance Cardio",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Dance based cardio",
+    },
+    {
+        "name": "Assault Bike",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Air bike workout",
+    },
+    {
+        "name": "Ski Erg",
+        "category": "cardio",
+        "muscle_group": "cardio",
+        "description": "Ski ergometer",
+    },
+]
+
+
+# Seed exercises
+async def seed_exercises(store):
+    count = await store.exercises.count()
+    if count == 0:
+        exercises = [{"id": str(uuid.uuid4()), **ex} for ex in INITIAL_EXERCISES]
+        await store.exercises.add_many(exercises)
+        logging.info(f"Seeded {len(exercises)} exercises")
+
+
+async def prepare_database(store):
+    """Idempotent one-off startup work: schema, indexes, seed data and
+    backfills."""
+    await store.prepare()
+    await seed_exercises(store)
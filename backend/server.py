@@ -1,28 +1,125 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import (
+    FastAPI,
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from dotenv import load_dotenv
-import uvicorn
 from fastapi.concurrency import asynccontextmanager
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import functools
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, ValidationError
+from typing import List, Optional, Tuple, Union
 import uuid
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 
+from analytics import ColumnarAnalytics
+from compression import CompressionMiddleware
+from export import stream_workouts_csv, stream_workouts_ndjson
+from etags import etag_matches, make_etag
+from exercise_catalog import ExerciseCatalog
+from instrumentation import CommandMetrics, MetricsMiddleware
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    MetricsRegistry,
+    merge_snapshots,
+    read_snapshots,
+    render,
+    write_snapshot,
+)
+from mongo_pool import PoolMonitor
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from response_cache import ResponseCache
+from seed import prepare_database
+from slow_commands import SlowCommandLogger
+from storage import open_storage
+from storage.base import Version
+from streaks import count_days, streak_stats, streaks_since
+from workout_import import PARSERS, detect_format
+from workout_totals import add_totals
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR.parent / ".env")
 
-mongo_url = os.environ["MONGO_URL"]
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ["DB_NAME"]]
+# Per-process metrics; with METRICS_DIR set, workers share snapshots there
+metrics_registry = MetricsRegistry()
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "5"))
+
+pool_monitor = PoolMonitor()
+slow_commands = SlowCommandLogger(
+    threshold_ms=float(os.environ.get("SLOW_COMMAND_MS", "100")),
+    explain_rate=float(os.environ.get("SLOW_COMMAND_EXPLAIN_RATE", "0.1")),
+    explain_interval=float(os.environ.get("SLOW_COMMAND_EXPLAIN_INTERVAL", "300")),
+)
+# The backend is picked by STORAGE_BACKEND (see ``storage``); the pymongo
+# listeners only see traffic when it is MongoDB
+storage = open_storage(
+    event_listeners=[pool_monitor, CommandMetrics(metrics_registry), slow_commands]
+)
+if storage.name == "mongodb":
+    # Explains run on the driver client underneath Motor, off the event loop
+    slow_commands.bind(storage.client.delegate)
 
 api_router = APIRouter(prefix="/api")
 
+exercise_catalog = ExerciseCatalog()
+
+# Write counters per collection, bumped by the write paths; kept in the
+# database so every worker process sees every write
+data_versions = storage.versions
+
+# ANALYTICS_ENGINE=columnar answers the analytics from NumPy columns held
+# in each worker (``analytics.py``) instead of from the storage backend
+columnar_analytics = (
+    ColumnarAnalytics() if os.environ.get("ANALYTICS_ENGINE") == "columnar" else None
+)
+
+# Responses of the analytics endpoints, keyed on the data versions
+response_cache = ResponseCache(
+    data_versions,
+    maxsize=int(os.environ.get("RESPONSE_CACHE_SIZE", "256")),
+    ttl=float(os.environ.get("RESPONSE_CACHE_TTL", "60")),
+)
+
+
+def conditional_get(*collections: str, daily: bool = False):
+    """Route dependency for ETag / If-None-Match on a GET route.
+
+    The ETag is derived from the request and the data versions of
+    ``collections`` (plus today's date with ``daily``), so a matching
+    ``If-None-Match`` is answered with 304 before the route runs. The
+    dependency's value is the versions it read, for routes that need them.
+    """
+
+    async def check(request: Request, response: Response):
+        versions = await data_versions.get(collections)
+        etag = make_etag(
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            collections,
+            versions,
+            datetime.now(timezone.utc).date() if daily else "",
+        )
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        # Let browsers keep the body but always revalidate it
+        response.headers["Cache-Control"] = "no-cache"
+        return versions
+
+    return Depends(check)
+
 
 # Enums
 class ExerciseCategory(str, Enum):
@@ -88,12 +185,42 @@ class WorkoutLog(BaseModel):
     )
 
 
+class WorkoutView(str, Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class WorkoutSummary(BaseModel):
+    """List view of a workout: what a collapsed history card shows."""
+
+    id: str
+    date: str
+    notes: Optional[str] = None
+    created_at: str
+    exercise_names: List[str]
+    total_exercises: int
+    total_sets: int
+    total_volume: float
+    total_calories: float
+
+
 class WorkoutLogCreate(BaseModel):
     date: str
     entries: List[WorkoutLogEntry]
     notes: Optional[str] = None
 
 
+class ImportRecordError(BaseModel):
+    record: int  # zero-based position of the workout in the upload
+    error: str
+
+
+class WorkoutImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRecordError]  # first MAX_REPORTED_IMPORT_ERRORS only
+
+
 class DashboardStats(BaseModel):
     total_workouts: int
     total_exercises_logged: int
@@ -116,35 +243,6 @@ class ProgressData(BaseModel):
     calories: Optional[float] = None
 
 
-# Calorie calculation helpers
-def calculate_strength_calories(weight_kg: float, reps: int, sets: int = 1) -> float:
-    """
-    Estimate calories burned for strength training.
-    Formula: ~0.05 calories per kg lifted per rep (rough estimate)
-    Also factors in metabolic cost of the movement.
-    """
-    base_calories = weight_kg * reps * 0.05 * sets
-    # Add metabolic overhead (rest, recovery between sets)
-    return round(base_calories * 1.3, 1)
-
-
-def calculate_cardio_calories(
-    duration_minutes: float, intensity: str = "moderate"
-) -> float:
-    """
-    Estimate calories burned for cardio.
-    Based on average 70kg person, MET values:
-    - Light (walking): 3.5 MET
-    - Moderate (jogging): 7 MET
-    - Vigorous (running/HIIT): 10 MET
-    """
-    met_values = {"light": 3.5, "moderate": 7, "vigorous": 10}
-    met = met_values.get(intensity, 7)
-    # Calories = MET × weight(kg) × duration(hours)
-    # Using 70kg as average
-    return round(met * 70 * (duration_minutes / 60), 1)
-
-
 # Template Models
 class TemplateExercise(BaseModel):
     exercise_id: str
@@ -176,627 +274,27 @@ class WorkoutTemplateUpdate(BaseModel):
     exercises: Optional[List[TemplateExercise]] = None
 
 
-# Pre-populated exercises data
-INITIAL_EXERCISES = [
-    # Chest
-    {
-        "name": "Bench Press",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Classic chest compound movement",
-    },
-    {
-        "name": "Incline Bench Press",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Upper chest focused press",
-    },
-    {
-        "name": "Decline Bench Press",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Lower chest focused press",
-    },
-    {
-        "name": "Dumbbell Fly",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Chest isolation movement",
-    },
-    {
-        "name": "Cable Crossover",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Cable chest isolation",
-    },
-    {
-        "name": "Push-Up",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Bodyweight chest exercise",
-    },
-    {
-        "name": "Chest Dip",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Weighted dip for chest",
-    },
-    {
-        "name": "Dumbbell Press",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Dumbbell bench press variation",
-    },
-    {
-        "name": "Machine Chest Press",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Machine guided chest press",
-    },
-    {
-        "name": "Pec Deck Fly",
-        "category": "strength",
-        "muscle_group": "chest",
-        "description": "Machine fly for chest",
-    },
-    # Back
-    {
-        "name": "Deadlift",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Full body posterior chain movement",
-    },
-    {
-        "name": "Pull-Up",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Bodyweight back exercise",
-    },
-    {
-        "name": "Lat Pulldown",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Machine lat exercise",
-    },
-    {
-        "name": "Barbell Row",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Compound back movement",
-    },
-    {
-        "name": "Dumbbell Row",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Single arm back row",
-    },
-    {
-        "name": "Seated Cable Row",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Cable back exercise",
-    },
-    {
-        "name": "T-Bar Row",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Barbell row variation",
-    },
-    {
-        "name": "Face Pull",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Rear delt and upper back",
-    },
-    {
-        "name": "Chin-Up",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Underhand pull-up variation",
-    },
-    {
-        "name": "Rack Pull",
-        "category": "strength",
-        "muscle_group": "back",
-        "description": "Partial deadlift from rack",
-    },
-    # Shoulders
-    {
-        "name": "Overhead Press",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Standing barbell press",
-    },
-    {
-        "name": "Dumbbell Shoulder Press",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Seated dumbbell press",
-    },
-    {
-        "name": "Lateral Raise",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Side delt isolation",
-    },
-    {
-        "name": "Front Raise",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Front delt isolation",
-    },
-    {
-        "name": "Rear Delt Fly",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Rear delt isolation",
-    },
-    {
-        "name": "Arnold Press",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Rotating shoulder press",
-    },
-    {
-        "name": "Upright Row",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Barbell shoulder movement",
-    },
-    {
-        "name": "Shrugs",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Trap isolation",
-    },
-    {
-        "name": "Machine Shoulder Press",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Machine guided press",
-    },
-    {
-        "name": "Cable Lateral Raise",
-        "category": "strength",
-        "muscle_group": "shoulders",
-        "description": "Cable side delt work",
-    },
-    # Biceps
-    {
-        "name": "Barbell Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Classic bicep exercise",
-    },
-    {
-        "name": "Dumbbell Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Alternating dumbbell curls",
-    },
-    {
-        "name": "Hammer Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Neutral grip curl",
-    },
-    {
-        "name": "Preacher Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Isolated bicep curl",
-    },
-    {
-        "name": "Concentration Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Single arm focused curl",
-    },
-    {
-        "name": "Cable Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Cable bicep exercise",
-    },
-    {
-        "name": "Incline Dumbbell Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Stretched bicep curl",
-    },
-    {
-        "name": "EZ Bar Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Angled bar curl",
-    },
-    {
-        "name": "Spider Curl",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Incline bench curl",
-    },
-    {
-        "name": "21s",
-        "category": "strength",
-        "muscle_group": "biceps",
-        "description": "Partial rep bicep finisher",
-    },
-    # Triceps
-    {
-        "name": "Tricep Pushdown",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Cable tricep exercise",
-    },
-    {
-        "name": "Skull Crusher",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Lying tricep extension",
-    },
-    {
-        "name": "Close Grip Bench Press",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Tricep focused press",
-    },
-    {
-        "name": "Overhead Tricep Extension",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Cable or dumbbell overhead",
-    },
-    {
-        "name": "Dips",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Tricep focused dips",
-    },
-    {
-        "name": "Kickback",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Dumbbell kickback",
-    },
-    {
-        "name": "Diamond Push-Up",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Close hand push-up",
-    },
-    {
-        "name": "Rope Pushdown",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Rope attachment pushdown",
-    },
-    {
-        "name": "JM Press",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Hybrid press movement",
-    },
-    {
-        "name": "Bench Dip",
-        "category": "strength",
-        "muscle_group": "triceps",
-        "description": "Bodyweight tricep dip",
-    },
-    # Legs
-    {
-        "name": "Squat",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Barbell back squat",
-    },
-    {
-        "name": "Front Squat",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Barbell front squat",
-    },
-    {
-        "name": "Leg Press",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Machine leg press",
-    },
-    {
-        "name": "Lunges",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Walking or stationary lunges",
-    },
-    {
-        "name": "Romanian Deadlift",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Hamstring focused deadlift",
-    },
-    {
-        "name": "Leg Extension",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Quad isolation",
-    },
-    {
-        "name": "Leg Curl",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Hamstring isolation",
-    },
-    {
-        "name": "Calf Raise",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Standing calf raise",
-    },
-    {
-        "name": "Bulgarian Split Squat",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Single leg squat",
-    },
-    {
-        "name": "Hack Squat",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Machine squat variation",
-    },
-    {
-        "name": "Hip Thrust",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Glute focused movement",
-    },
-    {
-        "name": "Goblet Squat",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Dumbbell front squat",
-    },
-    {
-        "name": "Step-Up",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Single leg step exercise",
-    },
-    {
-        "name": "Seated Calf Raise",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Seated calf exercise",
-    },
-    {
-        "name": "Good Morning",
-        "category": "strength",
-        "muscle_group": "legs",
-        "description": "Hamstring and back exercise",
-    },
-    # Core
-    {
-        "name": "Plank",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Isometric core hold",
-    },
-    {
-        "name": "Crunch",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Basic ab exercise",
-    },
-    {
-        "name": "Russian Twist",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Rotational core work",
-    },
-    {
-        "name": "Leg Raise",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Hanging or lying leg raise",
-    },
-    {
-        "name": "Ab Rollout",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Wheel rollout exercise",
-    },
-    {
-        "name": "Cable Crunch",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Weighted cable crunch",
-    },
-    {
-        "name": "Dead Bug",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Core stability exercise",
-    },
-    {
-        "name": "Mountain Climber",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Dynamic core exercise",
-    },
-    {
-        "name": "Bicycle Crunch",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Rotational crunch",
-    },
-    {
-        "name": "Side Plank",
-        "category": "strength",
-        "muscle_group": "core",
-        "description": "Oblique isometric hold",
-    },
-    # Full Body
-    {
-        "name": "Clean and Jerk",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Olympic lift",
-    },
-    {
-        "name": "Snatch",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Olympic lift",
-    },
-    {
-        "name": "Thruster",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Squat to press",
-    },
-    {
-        "name": "Burpee",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Full body conditioning",
-    },
-    {
-        "name": "Kettlebell Swing",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Hip hinge explosive movement",
-    },
-    {
-        "name": "Turkish Get-Up",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Complex full body movement",
-    },
-    {
-        "name": "Farmer's Walk",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Loaded carry",
-    },
-    {
-        "name": "Battle Ropes",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Conditioning exercise",
-    },
-    {
-        "name": "Box Jump",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Plyometric exercise",
-    },
-    {
-        "name": "Man Maker",
-        "category": "strength",
-        "muscle_group": "full_body",
-        "description": "Complex dumbbell movement",
-    },
-    # Cardio
-    {
-        "name": "Running",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Outdoor or treadmill running",
-    },
-    {
-        "name": "Cycling",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Bike or stationary cycling",
-    },
-    {
-        "name": "Rowing",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Rowing machine",
-    },
-    {
-        "name": "Swimming",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Pool swimming",
-    },
-    {
-        "name": "Jump Rope",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Skipping rope cardio",
-    },
-    {
-        "name": "Stair Climber",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Stair machine",
-    },
-    {
-        "name": "Elliptical",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Elliptical machine",
-    },
-    {
-        "name": "Walking",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Brisk walking",
-    },
-    {
-        "name": "HIIT",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "High intensity interval training",
-    },
-    {
-        "name": "Sprints",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Sprint intervals",
-    },
-    {
-        "name": "Boxing",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Boxing workout",
-    },
-    {
-        "name": "Kickboxing",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Kickboxing cardio",
-    },
-    {
-        "name": "Dance Cardio",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Dance based cardio",
-    },
-    {
-        "name": "Assault Bike",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Air bike workout",
-    },
-    {
-        "name": "Ski Erg",
-        "category": "cardio",
-        "muscle_group": "cardio",
-        "description": "Ski ergometer",
-    },
-]
-
-
-# Seed exercises
-async def seed_exercises():
-    count = await db.exercises.count_documents({})
-    if count == 0:
-        exercises = [{"id": str(uuid.uuid4()), **ex} for ex in INITIAL_EXERCISES]
-        await db.exercises.insert_many(exercises)
-        logging.info(f"Seeded {len(exercises)} exercises")
+# Fast path for reads from our own collections: a cached TypeAdapter
+# validates and serializes straight to JSON bytes inside pydantic-core,
+# instead of FastAPI validating, dumping to dicts and re-encoding them.
+# The output is the same as going through ``response_model``.
+EXERCISE_ADAPTER = TypeAdapter(Exercise)
+EXERCISE_LIST_ADAPTER = TypeAdapter(List[Exercise])
+WORKOUT_ADAPTER = TypeAdapter(WorkoutLog)
+WORKOUT_LIST_ADAPTER = TypeAdapter(List[WorkoutLog])
+WORKOUT_SUMMARY_LIST_ADAPTER = TypeAdapter(List[WorkoutSummary])
+TEMPLATE_ADAPTER = TypeAdapter(WorkoutTemplate)
+TEMPLATE_LIST_ADAPTER = TypeAdapter(List[WorkoutTemplate])
+
+
+def model_response(adapter: TypeAdapter, data, response: Response) -> Response:
+    """Serialize ``data`` with ``adapter``, keeping headers set on ``response``."""
+    fast = Response(
+        content=adapter.dump_json(adapter.validate_python(data)),
+        media_type="application/json",
+    )
+    fast.raw_headers.extend(response.headers.raw)
+    return fast
 
 
 # @app.on_event("startup")
@@ -804,181 +302,301 @@ async def seed_exercises():
     
 
 
+async def load_exercise_catalog(
+    versions: Optional[Tuple[Version, ...]] = None,
+) -> None:
+    """Make sure the in-process catalog includes writes from any worker.
+
+    ``versions`` is the ``exercises`` version the caller already read.
+    """
+    if versions is None:
+        versions = await data_versions.get(["exercises"])
+    await exercise_catalog.ensure_loaded(storage.exercises, versions)
+
+
+async def workout_analytics(versions: Tuple[Version, ...]):
+    """Where the analytics reads go: the columnar engine, loaded as of the
+    ``workouts`` ``versions`` the caller read, or the workout repository."""
+    if columnar_analytics is None:
+        return storage.workouts
+    await columnar_analytics.ensure_loaded(storage.workouts, versions)
+    return columnar_analytics
+
+
 # Exercise Routes
 @api_router.get("/exercises", response_model=List[Exercise])
 async def get_exercises(
+    response: Response,
     category: Optional[ExerciseCategory] = None,
     muscle_group: Optional[MuscleGroup] = None,
     search: Optional[str] = None,
+    versions: tuple = conditional_get("exercises"),
 ):
-    query = {}
-    if category:
-        query["category"] = category.value
-    if muscle_group:
-        query["muscle_group"] = muscle_group.value
+    await load_exercise_catalog(versions)
+    category_value = category.value if category else None
+    muscle_group_value = muscle_group.value if muscle_group else None
     if search:
-        query["name"] = {"$regex": search, "$options": "i"}
-
-    exercises = await db.exercises.find(query, {"_id": 0}).to_list(500)
-    return exercises
+        exercises = exercise_catalog.search(search, category_value, muscle_group_value)
+    else:
+        exercises = exercise_catalog.filter(category_value, muscle_group_value)
+    return model_response(EXERCISE_LIST_ADAPTER, exercises, response)
 
 
 @api_router.post("/exercises", response_model=Exercise)
 async def create_exercise(exercise: ExerciseCreate):
+    await load_exercise_catalog()
     exercise_obj = Exercise(**exercise.model_dump())
-    doc = exercise_obj.model_dump()
-    await db.exercises.insert_one(doc)
+    await storage.exercises.add(exercise_obj.model_dump())
+    exercise_catalog.add(exercise_obj.model_dump(mode="json"))
+    await data_versions.bump("exercises")
     return exercise_obj
 
 
 @api_router.get("/exercises/{exercise_id}", response_model=Exercise)
-async def get_exercise(exercise_id: str):
-    exercise = await db.exercises.find_one({"id": exercise_id}, {"_id": 0})
+async def get_exercise(
+    response: Response,
+    exercise_id: str,
+    versions: tuple = conditional_get("exercises"),
+):
+    await load_exercise_catalog(versions)
+    exercise = exercise_catalog.get(exercise_id)
     if not exercise:
         raise HTTPException(status_code=404, detail="Exercise not found")
-    return exercise
+    return model_response(EXERCISE_ADAPTER, exercise, response)
+
+
+def cached_response(endpoint: str, collections: Tuple[str, ...] = ("workouts",)):
+    """Serve a GET route from ``response_cache``.
+
+    The cache key is the route's query/path parameters plus today's date,
+    since analytics windows and streaks are relative to the current day.
+    The route takes the ``versions`` of ``collections`` its
+    ``conditional_get`` read, which the cache is checked against.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(**params):
+            key = {name: value for name, value in params.items() if name != "versions"}
+            key["today"] = datetime.now(timezone.utc).date().isoformat()
+            return await response_cache.get_or_compute(
+                endpoint,
+                key,
+                collections,
+                lambda: func(**params),
+                versions=params["versions"],
+            )
+
+        return wrapper
+
+    return decorator
 
 
 # Workout Routes
 @api_router.post("/workouts", response_model=WorkoutLog)
 async def create_workout(workout: WorkoutLogCreate):
     workout_obj = WorkoutLog(**workout.model_dump())
-    doc = workout_obj.model_dump()
-    await db.workouts.insert_one(doc)
+    await storage.workouts.add(add_totals(workout_obj.model_dump()))
+    await data_versions.bump("workouts")
     return workout_obj
 
 
-@api_router.get("/workouts", response_model=List[WorkoutLog])
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_IMPORT_ERRORS = 1000
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+async def _upload_chunks(upload, chunk_size: int = 64 * 1024):
+    while chunk := await upload.read(chunk_size):
+        yield chunk
+
+
+async def _insert_import_batch(docs: List[dict], records: List[int]) -> List[tuple]:
+    """Insert a batch of validated workouts; return (record, error) failures."""
+    failed = await storage.workouts.add_many(docs)
+    await data_versions.bump("workouts")
+    return [(records[i], message) for i, message in failed.items()]
+
+
+@api_router.post("/workouts/import", response_model=WorkoutImportResult)
+async def import_workouts(
+    request: Request,
+    import_format: Optional[str] = Query(
+        default=None, alias="format", pattern="^(json|ndjson|csv)$"
+    ),
+):
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing 'file' upload")
+        chunks = _upload_chunks(upload)
+        if not import_format:
+            import_format = detect_format(upload.content_type)
+        if not import_format and upload.filename:
+            import_format = upload.filename.rsplit(".", 1)[-1].lower()
+            import_format = "ndjson" if import_format == "jsonl" else import_format
+    else:
+        chunks = request.stream()
+        import_format = import_format or detect_format(content_type)
+    if import_format not in PARSERS:
+        raise HTTPException(
+            status_code=415, detail="Upload JSON, NDJSON or CSV workouts"
+        )
+
+    result = WorkoutImportResult(imported=0, failed=0, errors=[])
+
+    def fail(record: int, error: str) -> None:
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_IMPORT_ERRORS:
+            result.errors.append(ImportRecordError(record=record, error=error))
+
+    async def flush(docs: List[dict], records: List[int]) -> None:
+        failures = await _insert_import_batch(docs, records)
+        result.imported += len(docs) - len(failures)
+        for record, error in failures:
+            fail(record, error)
+
+    batch, batch_records = [], []
+    async for record, raw in PARSERS[import_format](chunks):
+        if isinstance(raw, ValueError):
+            fail(record, str(raw))
+            continue
+        try:
+            workout = WorkoutLogCreate.model_validate(raw)
+        except ValidationError as e:
+            fail(record, _validation_message(e))
+            continue
+        batch.append(
+            add_totals(
+                {
+                    "id": str(uuid.uuid4()),
+                    **workout.model_dump(),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                }
+            )
+        )
+        batch_records.append(record)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush(batch, batch_records)
+            batch, batch_records = [], []
+    if batch:
+        await flush(batch, batch_records)
+
+    return result
+
+
+def workout_summary(workout: dict) -> dict:
+    entries = workout.get("entries", [])
+    return {
+        "id": workout["id"],
+        "date": workout["date"],
+        "notes": workout.get("notes"),
+        "created_at": workout["created_at"],
+        "exercise_names": [entry["exercise_name"] for entry in entries],
+        "total_exercises": len(entries),
+        "total_sets": workout["total_sets"],
+        "total_volume": round(workout["total_volume"], 1),
+        "total_calories": round(workout["total_calories"], 1),
+    }
+
+
+@api_router.get(
+    "/workouts",
+    response_model=Union[List[WorkoutLog], List[WorkoutSummary]],
+    dependencies=[conditional_get("workouts")],
+)
 async def get_workouts(
+    response: Response,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     limit: int = Query(default=50, le=100),
+    cursor: Optional[str] = None,
+    view: WorkoutView = WorkoutView.FULL,
 ):
-    query = {}
-    if start_date:
-        query["date"] = {"$gte": start_date}
-    if end_date:
-        if "date" in query:
-            query["date"]["$lte"] = end_date
-        else:
-            query["date"] = {"$lte": end_date}
-
-    workouts = await db.workouts.find(query, {"_id": 0}).sort("date", -1).to_list(limit)
-    return workouts
-
-
-@api_router.get("/workouts/{workout_id}", response_model=WorkoutLog)
-async def get_workout(workout_id: str):
-    workout = await db.workouts.find_one({"id": workout_id}, {"_id": 0})
+    """Workouts, newest first. ``view=summary`` returns ``WorkoutSummary``
+    rows instead of full documents; fetch ``/workouts/{id}`` for the sets."""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # One extra row tells us whether there is a next page
+    summary = view == WorkoutView.SUMMARY
+    workouts = await storage.workouts.page(
+        start_date, end_date, after, limit + 1, summary=summary
+    )
+    if len(workouts) > limit:
+        workouts = workouts[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(workouts[-1])
+    if summary:
+        return model_response(
+            WORKOUT_SUMMARY_LIST_ADAPTER,
+            [workout_summary(workout) for workout in workouts],
+            response,
+        )
+    return model_response(WORKOUT_LIST_ADAPTER, workouts, response)
+
+
+@api_router.get(
+    "/workouts/{workout_id}",
+    response_model=WorkoutLog,
+    dependencies=[conditional_get("workouts")],
+)
+async def get_workout(response: Response, workout_id: str):
+    workout = await storage.workouts.get(workout_id)
     if not workout:
         raise HTTPException(status_code=404, detail="Workout not found")
-    return workout
+    return model_response(WORKOUT_ADAPTER, workout, response)
 
 
 @api_router.delete("/workouts/{workout_id}")
 async def delete_workout(workout_id: str):
-    result = await db.workouts.delete_one({"id": workout_id})
-    if result.deleted_count == 0:
+    workout = await storage.workouts.delete(workout_id)
+    if not workout:
         raise HTTPException(status_code=404, detail="Workout not found")
+    await data_versions.bump("workouts")
     return {"message": "Workout deleted"}
 
 
 # Stats Routes
-@api_router.get("/stats", response_model=DashboardStats)
-async def get_stats(start_date: Optional[str] = None, end_date: Optional[str] = None):
-    query = {}
-    if start_date:
-        query["date"] = {"$gte": start_date}
-    if end_date:
-        if "date" in query:
-            query["date"]["$lte"] = end_date
-        else:
-            query["date"] = {"$lte": end_date}
-
-    workouts = await db.workouts.find(query, {"_id": 0}).to_list(10000)
-
-    total_workouts = len(workouts)
-    total_exercises_logged = 0
-    total_sets = 0
-    total_volume = 0.0
-    total_calories = 0.0
-
-    # Calculate totals
-    for workout in workouts:
-        for entry in workout.get("entries", []):
-            total_exercises_logged += 1
-            entry_category = entry.get("category", "strength")
-            for set_data in entry.get("sets", []):
-                total_sets += 1
-                if entry_category == "cardio":
-                    duration = set_data.get("duration_minutes", 0) or 0
-                    if duration > 0:
-                        total_calories += calculate_cardio_calories(duration)
-                else:
-                    weight = set_data.get("weight", 0) or 0
-                    reps = set_data.get("reps", 0) or 0
-                    if weight > 0 and reps > 0:
-                        total_volume += weight * reps
-                        total_calories += calculate_strength_calories(weight, reps)
-
-    # Calculate streaks
+def dashboard_stats(
+    totals: dict,
+    streaks: dict,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> DashboardStats:
+    """Build ``DashboardStats`` from the range ``totals`` of the workout
+    repository (empty when nothing matched) and the streaks document, for
+    the given date range."""
+
     today = datetime.now(timezone.utc).date()
-    workout_dates = sorted(set(w.get("date", "")[:10] for w in workouts), reverse=True)
-
-    current_streak = 0
-    longest_streak = 0
-    temp_streak = 0
-
-    if workout_dates:
-        # Check current streak
-        check_date = today
-        for i in range(len(workout_dates)):
-            date_str = workout_dates[i] if i < len(workout_dates) else None
-            if date_str and date_str == check_date.isoformat():
-                current_streak += 1
-                check_date = check_date - timedelta(days=1)
-            elif (
-                date_str
-                and date_str == (today - timedelta(days=1)).isoformat()
-                and current_streak == 0
-            ):
-                check_date = today - timedelta(days=1)
-                if date_str == check_date.isoformat():
-                    current_streak += 1
-                    check_date = check_date - timedelta(days=1)
-            else:
-                break
-
-        # Calculate longest streak
-        prev_date = None
-        for date_str in sorted(workout_dates):
-            try:
-                curr_date = datetime.fromisoformat(date_str).date()
-                if prev_date is None:
-                    temp_streak = 1
-                elif (curr_date - prev_date).days == 1:
-                    temp_streak += 1
-                else:
-                    longest_streak = max(longest_streak, temp_streak)
-                    temp_streak = 1
-                prev_date = curr_date
-            except:
-                continue
-        longest_streak = max(longest_streak, temp_streak, current_streak)
+    current_streak, longest_streak = streak_stats(streaks, today, start_date, end_date)
 
     # This week/month counts
-    week_start = today - timedelta(days=today.weekday())
-    month_start = today.replace(day=1)
+    week_start = (today - timedelta(days=today.weekday())).isoformat()
+    month_start = today.replace(day=1).isoformat()
 
-    workouts_this_week = sum(1 for d in workout_dates if d >= week_start.isoformat())
-    workouts_this_month = sum(1 for d in workout_dates if d >= month_start.isoformat())
+    workouts_this_week = count_days(
+        streaks, max(start_date or "", week_start), end_date
+    )
+    workouts_this_month = count_days(
+        streaks, max(start_date or "", month_start), end_date
+    )
 
     return DashboardStats(
-        total_workouts=total_workouts,
-        total_exercises_logged=total_exercises_logged,
-        total_sets=total_sets,
-        total_volume=round(total_volume, 1),
-        total_calories=round(total_calories, 1),
+        total_workouts=totals.get("workouts", 0),
+        total_exercises_logged=totals.get("exercises", 0),
+        total_sets=totals.get("sets", 0),
+        total_volume=round(totals.get("volume", 0.0), 1),
+        total_calories=round(totals.get("calories", 0.0), 1),
         current_streak=current_streak,
         longest_streak=longest_streak,
         workouts_this_week=workouts_this_week,
@@ -986,56 +604,33 @@ async def get_stats(start_date: Optional[str] = None, end_date: Optional[str] =
     )
 
 
+@api_router.get("/stats", response_model=DashboardStats)
+@cached_response("stats")
+async def get_stats(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    versions: tuple = conditional_get("workouts", daily=True),
+):
+    today = datetime.now(timezone.utc).date()
+    analytics = await workout_analytics(versions)
+    totals, streaks = await asyncio.gather(
+        analytics.totals(start_date, end_date),
+        storage.workouts.streaks(streaks_since(today, start_date, end_date)),
+    )
+    return dashboard_stats(totals, streaks, start_date, end_date)
+
+
 @api_router.get("/progress/{exercise_id}", response_model=List[ProgressData])
-async def get_progress(exercise_id: str, days: int = Query(default=30, le=365)):
+@cached_response("progress")
+async def get_progress(
+    exercise_id: str,
+    days: int = Query(default=30, le=365),
+    versions: tuple = conditional_get("workouts", daily=True),
+):
     start_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()[:10]
 
-    workouts = await db.workouts.find(
-        {"date": {"$gte": start_date}}, {"_id": 0}
-    ).to_list(10000)
-
-    progress_by_date = {}
-
-    for workout in workouts:
-        date = workout.get("date", "")[:10]
-        for entry in workout.get("entries", []):
-            if entry.get("exercise_id") == exercise_id:
-                entry_category = entry.get("category", "strength")
-                if date not in progress_by_date:
-                    progress_by_date[date] = {
-                        "date": date,
-                        "max_weight": 0,
-                        "total_volume": 0,
-                        "total_reps": 0,
-                        "duration": 0,
-                        "distance": 0,
-                        "calories": 0,
-                    }
-
-                for set_data in entry.get("sets", []):
-                    weight = set_data.get("weight", 0) or 0
-                    reps = set_data.get("reps", 0) or 0
-                    duration = set_data.get("duration_minutes", 0) or 0
-                    distance = set_data.get("distance_km", 0) or 0
-
-                    if weight > progress_by_date[date]["max_weight"]:
-                        progress_by_date[date]["max_weight"] = weight
-                    progress_by_date[date]["total_volume"] += weight * reps
-                    progress_by_date[date]["total_reps"] += reps
-                    progress_by_date[date]["duration"] += duration
-                    progress_by_date[date]["distance"] += distance
-
-                    # Calculate calories
-                    if entry_category == "cardio":
-                        progress_by_date[date]["calories"] += calculate_cardio_calories(
-                            duration
-                        )
-                    else:
-                        progress_by_date[date][
-                            "calories"
-                        ] += calculate_strength_calories(weight, reps)
-
-    return sorted(progress_by_date.values(), key=lambda x: x["date"])
+    analytics = await workout_analytics(versions)
+    return await analytics.exercise_progress(exercise_id, start_date)
 
 
 # Daily trends for dashboard charts
@@ -1047,12 +642,9 @@ class DailyTrend(BaseModel):
     calories: float
 
 
-@api_router.get("/trends", response_model=List[DailyTrend])
-async def get_trends(
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    days: int = Query(default=30, le=365),
-):
+def trend_window(
+    start_date: Optional[str], end_date: Optional[str], days: int
+) -> Tuple[str, str]:
     # If no dates provided, use last N days
     if not start_date:
         start_date = (datetime.now(timezone.utc) - timedelta(days=days)).strftime(
@@ -1060,109 +652,206 @@ async def get_trends(
         )
     if not end_date:
         end_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return start_date, end_date
 
-    workouts = await db.workouts.find(
-        {"date": {"$gte": start_date, "$lte": end_date}}, {"_id": 0}
-    ).to_list(10000)
-
-    # Group by date
-    trends_by_date = {}
-
-    for workout in workouts:
-        date = workout.get("date", "")[:10]
-        if date not in trends_by_date:
-            trends_by_date[date] = {
-                "date": date,
-                "workouts": 0,
-                "sets": 0,
-                "volume": 0.0,
-                "calories": 0.0,
-            }
-
-        trends_by_date[date]["workouts"] += 1
-
-        for entry in workout.get("entries", []):
-            entry_category = entry.get("category", "strength")
-            for set_data in entry.get("sets", []):
-                trends_by_date[date]["sets"] += 1
-
-                if entry_category == "cardio":
-                    duration = set_data.get("duration_minutes", 0) or 0
-                    if duration > 0:
-                        trends_by_date[date]["calories"] += calculate_cardio_calories(
-                            duration
-                        )
-                else:
-                    weight = set_data.get("weight", 0) or 0
-                    reps = set_data.get("reps", 0) or 0
-                    if weight > 0 and reps > 0:
-                        trends_by_date[date]["volume"] += weight * reps
-                        trends_by_date[date]["calories"] += calculate_strength_calories(
-                            weight, reps
-                        )
-
-    # Round values
-    for date in trends_by_date:
-        trends_by_date[date]["volume"] = round(trends_by_date[date]["volume"], 1)
-        trends_by_date[date]["calories"] = round(trends_by_date[date]["calories"], 1)
-
-    return sorted(trends_by_date.values(), key=lambda x: x["date"])
+
+@api_router.get("/trends", response_model=List[DailyTrend])
+@cached_response("trends")
+async def get_trends(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    days: int = Query(default=30, le=365),
+    versions: tuple = conditional_get("workouts", daily=True),
+):
+    start_date, end_date = trend_window(start_date, end_date, days)
+    analytics = await workout_analytics(versions)
+    return await analytics.daily_totals(start_date, end_date)
 
 
 # Recent workouts for dashboard
-@api_router.get("/recent-workouts", response_model=List[WorkoutLog])
-async def get_recent_workouts():
-    workouts = await db.workouts.find({}, {"_id": 0}).sort("date", -1).to_list(5)
-    return workouts
+@api_router.get(
+    "/recent-workouts",
+    response_model=List[WorkoutLog],
+    dependencies=[conditional_get("workouts")],
+)
+async def get_recent_workouts(response: Response):
+    workouts = await storage.workouts.recent(5)
+    return model_response(WORKOUT_LIST_ADAPTER, workouts, response)
 
 
-# Template Routes
-@api_router.get("/templates", response_model=List[WorkoutTemplate])
-async def get_templates():
-    templates = (
-        await db.templates.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
+class DashboardData(BaseModel):
+    stats: DashboardStats
+    trends: List[DailyTrend]
+    recent_workouts: List[WorkoutLog]
+
+
+# Everything the dashboard page shows, in one request
+@api_router.get("/dashboard", response_model=DashboardData)
+@cached_response("dashboard")
+async def get_dashboard(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    days: int = Query(default=30, le=365),
+    versions: tuple = conditional_get("workouts", daily=True),
+):
+    trend_start, trend_end = trend_window(start_date, end_date, days)
+    today = datetime.now(timezone.utc).date()
+    analytics = await workout_analytics(versions)
+
+    # Recent workouts are not limited to the date range, so they come from
+    # their own (index-backed, five document) query run alongside
+    (totals, trends), recent_workouts, streaks = await asyncio.gather(
+        analytics.dashboard(start_date, end_date, trend_start, trend_end),
+        storage.workouts.recent(5),
+        storage.workouts.streaks(streaks_since(today, start_date, end_date)),
+    )
+
+    return DashboardData(
+        stats=dashboard_stats(totals, streaks, start_date, end_date),
+        trends=trends,
+        recent_workouts=recent_workouts,
+    )
+
+
+# Export Routes
+@api_router.get("/export/workouts.ndjson")
+async def export_workouts_ndjson(
+    start_date: Optional[str] = None, end_date: Optional[str] = None
+):
+    return StreamingResponse(
+        stream_workouts_ndjson(storage.workouts.export(start_date, end_date)),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="workouts.ndjson"'},
+    )
+
+
+@api_router.get("/export/workouts.csv")
+async def export_workouts_csv(
+    start_date: Optional[str] = None, end_date: Optional[str] = None
+):
+    return StreamingResponse(
+        stream_workouts_csv(storage.workouts.export(start_date, end_date)),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="workouts.csv"'},
     )
-    return templates
+
+
+# Template Routes
+@api_router.get(
+    "/templates",
+    response_model=List[WorkoutTemplate],
+    dependencies=[conditional_get("templates")],
+)
+async def get_templates(response: Response):
+    templates = await storage.templates.list(100)
+    return model_response(TEMPLATE_LIST_ADAPTER, templates, response)
 
 
 @api_router.post("/templates", response_model=WorkoutTemplate)
 async def create_template(template: WorkoutTemplateCreate):
     template_obj = WorkoutTemplate(**template.model_dump())
-    doc = template_obj.model_dump()
-    await db.templates.insert_one(doc)
+    await storage.templates.add(template_obj.model_dump())
+    await data_versions.bump("templates")
     return template_obj
 
 
-@api_router.get("/templates/{template_id}", response_model=WorkoutTemplate)
-async def get_template(template_id: str):
-    template = await db.templates.find_one({"id": template_id}, {"_id": 0})
+@api_router.get(
+    "/templates/{template_id}",
+    response_model=WorkoutTemplate,
+    dependencies=[conditional_get("templates")],
+)
+async def get_template(response: Response, template_id: str):
+    template = await storage.templates.get(template_id)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
-    return template
+    return model_response(TEMPLATE_ADAPTER, template, response)
 
 
 @api_router.put("/templates/{template_id}", response_model=WorkoutTemplate)
 async def update_template(template_id: str, update: WorkoutTemplateUpdate):
-    template = await db.templates.find_one({"id": template_id}, {"_id": 0})
+    template = await storage.templates.get(template_id)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
 
     update_data = {k: v for k, v in update.model_dump().items() if v is not None}
-    if update_data:
-        await db.templates.update_one({"id": template_id}, {"$set": update_data})
-
-    updated = await db.templates.find_one({"id": template_id}, {"_id": 0})
+    if not update_data:
+        return template
+    updated = await storage.templates.update(template_id, update_data)
+    await data_versions.bump("templates")
     return updated
 
 
 @api_router.delete("/templates/{template_id}")
 async def delete_template(template_id: str):
-    result = await db.templates.delete_one({"id": template_id})
-    if result.deleted_count == 0:
+    if not await storage.templates.delete(template_id):
         raise HTTPException(status_code=404, detail="Template not found")
+    await data_versions.bump("templates")
     return {"message": "Template deleted"}
 
 
+@api_router.get("/cache-stats")
+async def get_cache_stats():
+    return response_cache.stats()
+
+
+# Connection pool telemetry of this worker process
+@api_router.get("/pool-stats")
+async def get_pool_stats():
+    return {"options": storage.options, "pools": pool_monitor.stats()}
+
+
+def collect_app_metrics() -> None:
+    """Mirror the response cache and pool statistics into the registry."""
+    cache = response_cache.stats()
+    for name in ("hits", "misses"):
+        metrics_registry.counter(
+            f"response_cache_{name}_total", f"Response cache {name}."
+        ).set((), cache[name])
+    metrics_registry.gauge("response_cache_entries", "Cached responses.").set(
+        (), cache["size"]
+    )
+
+    def mirror_pool(address, pool):
+        labels = (address,)
+        for name, help in (
+            ("open", "Open pooled connections."),
+            ("in_use", "Checked out connections."),
+        ):
+            metrics_registry.gauge(
+                f"mongo_pool_connections_{name}", help, ("address",)
+            ).set(labels, getattr(pool, name))
+        metrics_registry.counter(
+            "mongo_pool_checkouts_total", "Connection checkouts.", ("address",)
+        ).set(labels, pool.checkouts)
+        metrics_registry.histogram(
+            "mongo_pool_checkout_wait_milliseconds",
+            "Time waiting to check out a connection.",
+            ("address",),
+            pool.wait_ms.buckets,
+        ).set_histogram(labels, pool.wait_ms)
+
+    pool_monitor.each_pool(mirror_pool)
+
+
+metrics_registry.add_collector(collect_app_metrics)
+
+
+async def flush_metrics():
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+        await asyncio.to_thread(write_snapshot, metrics_registry, METRICS_DIR)
+
+
+# Prometheus scrape endpoint
+@api_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    snapshots = [metrics_registry.snapshot()]
+    if METRICS_DIR:
+        snapshots += await asyncio.to_thread(read_snapshots, METRICS_DIR)
+    families = merge_snapshots(snapshots, stale_after=3 * METRICS_FLUSH_INTERVAL)
+    return Response(render(families), media_type=METRICS_CONTENT_TYPE)
+
+
 # Health check
 @api_router.get("/health")
 async def health_check():
@@ -1172,15 +861,23 @@ async def health_check():
 async def lifespan(app: FastAPI):
     # Startup logic (optional)
     # await connect_to_db()
-    await seed_exercises()
+    # The launcher prepares the database once before starting its workers
+    if os.environ.get("PREPARE_DATABASE", "1") == "1":
+        await prepare_database(storage)
+    await storage.start()
+    await load_exercise_catalog()
+    flusher = asyncio.create_task(flush_metrics()) if METRICS_DIR else None
 
     yield  # 👈 app runs here
 
     # Shutdown logic
-    client.close()
+    if flusher:
+        flusher.cancel()
+        write_snapshot(metrics_registry, METRICS_DIR)
+    storage.close()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 frontend_build = ROOT_DIR / "build"
@@ -1193,26 +890,35 @@ app.mount(
     name="frontend",
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("COMPRESSION_MINIMUM_SIZE", "1024")),
+    gzip_level=int(os.environ.get("GZIP_LEVEL", "6")),
+    brotli_quality=int(os.environ.get("BROTLI_QUALITY", "4")),
+    zstd_level=int(os.environ.get("ZSTD_LEVEL", "3")),
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get("CORS_ORIGINS", "*").split(","),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Outermost, so it times the whole stack and counts bytes as sent
+app.add_middleware(MetricsMiddleware, registry=metrics_registry, routes=app.routes)
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "server:app",   # module:app
-        host="0.0.0.0",
-        port=8000,
-        reload=False,    # ❌ disable in production
-    )
+    from launcher import main
+
+    main()
 # @app.on_event("shutdown")
 # async def shutdown_db_client():
 #     client.close()
@@ -0,0 +1,266 @@
+"""Slow MongoDB command log, with sampled ``explain`` output.
+
+``SlowCommandLogger`` is a pymongo ``CommandListener`` on the Motor client.
+Every command slower than the threshold is logged as one JSON record on
+the ``slow_commands`` logger:
+
+    command      find, aggregate, ...
+    collection   the collection it ran on
+    shape        the command with every literal value replaced by "?", so
+                 records group by query shape and no user data is logged
+    duration_ms  server round trip
+    returned     documents in the reply
+    outcome      success or failure
+    explain      for sampled reads: the winning plan's stages and the keys
+                 and documents examined (``executionStats``)
+
+A plan with a ``COLLSCAN`` stage, or ``docs_examined`` far above
+``returned``, is a query without a usable index.
+
+Explains re-run the query, so they are sampled: at most one runs at a
+time, on a background thread, and each query shape is explained at most
+once per interval. The record of a sampled command is logged when its
+explain is done. Settings come from the environment (see ``server.py``):
+
+    SLOW_COMMAND_MS                    threshold (100; 0 disables the log)
+    SLOW_COMMAND_EXPLAIN_RATE          share of slow reads explained (0.1)
+    SLOW_COMMAND_EXPLAIN_INTERVAL      seconds between explains of the same
+                                       query shape (300)
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from instrumentation import command_collection, documents_returned
+
+logger = logging.getLogger("slow_commands")
+
+# Reads ``explain`` can run
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+
+# Added to every command by the driver; not part of the query
+DRIVER_FIELDS = {
+    "lsid",
+    "txnNumber",
+    "$clusterTime",
+    "$db",
+    "$readPreference",
+    "readConcern",
+    "writeConcern",
+    "apiVersion",
+    "apiStrict",
+    "apiDeprecationErrors",
+}
+
+# Command options and pipeline stages whose values are structure (field
+# names, sort directions, sizes), not data, and are logged as they are
+KEEP_VALUES = {
+    "projection",
+    "sort",
+    "hint",
+    "limit",
+    "skip",
+    "batchSize",
+    "key",
+    "$project",
+    "$sort",
+    "$limit",
+    "$skip",
+    "$count",
+    "$unwind",
+}
+
+# Write batches (imports can send thousands): only the first is logged
+BATCH_FIELDS = {"documents", "updates", "deletes"}
+
+
+def redact(value, key: Optional[str] = None):
+    """``value`` with its literals replaced by "?", keeping keys, operators
+    and field paths ("$field")."""
+    if key in KEEP_VALUES:
+        return value
+    if isinstance(value, dict):
+        return {k: redact(v, k) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [redact(item) for item in value]
+        return "?"  # a list of literals, e.g. an $in
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    if isinstance(value, bool) or value is None:
+        return value  # flags, not data
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> dict:
+    shape = {command_name: command.get(command_name)}
+    for key, value in command.items():
+        if key in BATCH_FIELDS and isinstance(value, list) and len(value) > 1:
+            shape[key] = [redact(value[0]), f"... {len(value)} in all"]
+        elif key != command_name and key not in DRIVER_FIELDS:
+            shape[key] = redact(value, key)
+    return shape
+
+
+def _find_key(document, key: str):
+    """The first value of ``key`` anywhere in a nested explain output."""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = _find_key(value, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _plan_stages(plan) -> List[str]:
+    """Stage names of a (winning) plan, from the root down."""
+    stages = []
+    while isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        children = plan.get("inputStages")
+        if children:
+            for child in children:
+                stages.extend(_plan_stages(child))
+            break
+        plan = plan.get("inputStage") or plan.get("queryPlan")
+    return stages
+
+
+def explain_summary(explain: dict) -> dict:
+    """The parts of an ``executionStats`` explain worth logging."""
+    stats = _find_key(explain, "executionStats") or {}
+    return {
+        "plan": _plan_stages(_find_key(explain, "winningPlan")),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowCommandLogger(monitoring.CommandListener):
+    """Logs commands slower than ``threshold_ms``; see the module docstring.
+
+    Explains need a synchronous client to run on: ``bind`` it once the
+    Motor client exists (``motor_client.delegate``).
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 100,
+        explain_rate: float = 0.1,
+        explain_interval: float = 300,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.explain_interval = explain_interval
+        self._client = None
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple, tuple] = {}
+        self._explained: Dict[str, float] = {}
+        self._explaining = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="slow-command-explain"
+        )
+
+    def bind(self, client) -> None:
+        self._client = client
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        # Our own explains are never slow commands worth explaining
+        if self.threshold_ms <= 0 or event.command_name == "explain":
+            return
+        with self._lock:
+            self._pending[self._key(event)] = (
+                event.database_name,
+                command_collection(event),
+                event.command,
+            )
+
+    def succeeded(self, event):
+        self._finished(event, "success", documents_returned(event.reply))
+
+    def failed(self, event):
+        self._finished(event, "failure", 0)
+
+    def _finished(self, event, outcome: str, returned: int) -> None:
+        with self._lock:
+            pending = self._pending.pop(self._key(event), None)
+        duration_ms = event.duration_micros / 1000
+        if pending is None or duration_ms < self.threshold_ms:
+            return
+
+        database, collection, command = pending
+        shape = command_shape(event.command_name, command)
+        record = {
+            "command": event.command_name,
+            "collection": collection,
+            "shape": shape,
+            "duration_ms": round(duration_ms, 1),
+            "returned": returned,
+            "outcome": outcome,
+        }
+        if outcome == "success" and self._should_explain(event.command_name, shape):
+            self._executor.submit(self._explain, database, command, record)
+        else:
+            self._log(record)
+
+    def _should_explain(self, command_name: str, shape: dict) -> bool:
+        if self._client is None or command_name not in EXPLAINABLE:
+            return False
+        # $out / $merge pipelines write; explaining them is not safe
+        pipeline = json.dumps(shape.get("pipeline", []), default=str)
+        if '"$out"' in pipeline or '"$merge"' in pipeline:
+            return False
+        if random.random() >= self.explain_rate:
+            return False
+
+        key = json.dumps(shape, sort_keys=True, default=str)
+        now = time.monotonic()
+        with self._lock:
+            if self._explaining:
+                return False
+            if now - self._explained.get(key, -self.explain_interval) < (
+                self.explain_interval
+            ):
+                return False
+            self._explaining = True
+            self._explained[key] = now
+        return True
+
+    def _explain(self, database: str, command: dict, record: dict) -> None:
+        query = {k: v for k, v in command.items() if k not in DRIVER_FIELDS}
+        try:
+            explain = self._client[database].command(
+                {"explain": query, "verbosity": "executionStats"}
+            )
+            record["explain"] = explain_summary(explain)
+        except Exception as e:
+            record["explain"] = {"error": str(e)}
+        finally:
+            with self._lock:
+                self._explaining = False
+        self._log(record)
+
+    @staticmethod
+    def _log(record: dict) -> None:
+        logger.warning(f"Slow Mongo command: {json.dumps(record, default=str)}")
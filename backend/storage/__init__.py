@@ -0,0 +1,64 @@
+"""Pluggable storage backends.
+
+The routes only talk to the repositories of ``storage.base``; which
+backend implements them is chosen at startup by ``STORAGE_BACKEND``:
+
+    mongodb   MongoDB through Motor (default): MONGO_URL, DB_NAME and the
+              pool settings of ``mongo_pool.client_options``
+    sqlite    a SQLite file: SQLITE_PATH (workouts.sqlite3)
+    memory    in-process only, for tests and benchmarks; the data is lost
+              on exit and not shared between workers
+
+Backends are imported on demand, so e.g. the SQLite and memory backends
+do not need a MongoDB server to connect to.
+"""
+
+import os
+from typing import Iterable, Optional
+
+from storage.base import Storage
+
+BACKENDS = ("mongodb", "sqlite", "memory")
+
+
+def open_storage(
+    backend: Optional[str] = None, event_listeners: Iterable = ()
+) -> Storage:
+    """Create the configured backend. ``event_listeners`` are pymongo
+    monitoring listeners, used by the Mongo backend only."""
+    backend = backend or os.environ.get("STORAGE_BACKEND", "mongodb")
+    if backend == "mongodb":
+        from mongo_pool import client_options
+        from storage.mongo import MongoStorage
+
+        return MongoStorage(
+            os.environ["MONGO_URL"],
+            os.environ["DB_NAME"],
+            client_options(),
+            event_listeners,
+        )
+    if backend == "sqlite":
+        from storage.sqlite import SqliteStorage
+
+        return SqliteStorage(os.environ.get("SQLITE_PATH", "workouts.sqlite3"))
+    if backend == "memory":
+        from storage.memory import MemoryStorage
+
+        return MemoryStorage()
+    raise ValueError(
+        f"Unknown STORAGE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}"
+    )
+
+
+def open_mongo_database(task: str):
+    """The database of the configured MongoDB backend, for the maintenance
+    scripts (``python rollups.py`` and the like). The other backends keep
+    their derived data current in their own write path, so ``task`` does
+    not apply to them and the script exits with a message instead."""
+    storage = open_storage()
+    if storage.name != "mongodb":
+        storage.close()
+        raise SystemExit(
+            f"{task} only applies to STORAGE_BACKEND=mongodb, not {storage.name}"
+        )
+    return storage.db
@@ -0,0 +1,171 @@
+"""Repository interfaces every storage backend implements.
+
+Documents are plain dicts in the shape of the API models (``Exercise``,
+``WorkoutLog`` with the stored totals of ``workout_totals.py``,
+``WorkoutTemplate``), without any backend-specific fields such as Mongo's
+``_id``. Date ranges compare the ``date`` strings as the Mongo queries
+always have: ``start_date <= date <= end_date``, so a bare end day does
+not include workouts logged with a time later that day. Analytics that
+work per calendar day (rollups, progress, streaks) use ``date[:10]``.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+# (date, id): the sort key of the workout history, and of page cursors
+WorkoutKey = Tuple[str, str]
+
+# (epoch, version) of one collection, see ``response_cache.DataVersions``
+Version = Tuple[str, int]
+
+
+class ExerciseRepository(ABC):
+    @abstractmethod
+    async def list(self) -> List[dict]:
+        """Every exercise, in insertion order."""
+
+    @abstractmethod
+    async def count(self) -> int: ...
+
+    @abstractmethod
+    async def add(self, exercise: dict) -> None: ...
+
+    @abstractmethod
+    async def add_many(self, exercises: List[dict]) -> None: ...
+
+
+class WorkoutRepository(ABC):
+    """Workouts and the analytics derived from them.
+
+    Writes keep every derived view (daily rollups, exercise progress,
+    streaks) current, however the backend stores them.
+    """
+
+    @abstractmethod
+    async def add(self, workout: dict) -> None: ...
+
+    @abstractmethod
+    async def add_many(self, workouts: List[dict]) -> Dict[int, str]:
+        """Store a batch; returns the errors of the workouts that could not
+        be stored (duplicate ids), by position in ``workouts``."""
+
+    @abstractmethod
+    async def get(self, workout_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def delete(self, workout_id: str) -> Optional[dict]:
+        """Remove a workout; returns it, or None if there was none."""
+
+    @abstractmethod
+    async def page(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        after: Optional[WorkoutKey],
+        limit: int,
+        summary: bool = False,
+    ) -> List[dict]:
+        """Up to ``limit`` workouts in the range, sorting after ``after``
+        in ``(date, id)`` descending order. With ``summary`` only the
+        fields of ``server.workout_summary`` need to be present."""
+
+    @abstractmethod
+    async def recent(self, limit: int) -> List[dict]:
+        """The ``limit`` newest workouts."""
+
+    @abstractmethod
+    def export(
+        self, start_date: Optional[str], end_date: Optional[str]
+    ) -> AsyncIterator[dict]:
+        """Workouts in the range, oldest first, without the stored totals
+        (they are derived data; exports carry what was logged)."""
+
+    @abstractmethod
+    async def totals(self, start_date: Optional[str], end_date: Optional[str]) -> dict:
+        """``workouts``, ``exercises`` (entries), ``sets``, ``volume`` and
+        ``calories`` of the workouts in the range; empty if there are none."""
+
+    @abstractmethod
+    async def daily_totals(self, start_date: str, end_date: str) -> List[dict]:
+        """A rollup (``date``, ``workouts``, ``sets``, ``volume``,
+        ``calories``; see ``rollups.rounded_rollup``) for every day in
+        ``[start_date[:10], end_date[:10]]`` with workouts, by date."""
+
+    async def dashboard(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        trend_start: str,
+        trend_end: str,
+    ) -> Tuple[dict, List[dict]]:
+        """``totals`` of the range and ``daily_totals`` of the trend window."""
+        return await asyncio.gather(
+            self.totals(start_date, end_date),
+            self.daily_totals(trend_start, trend_end),
+        )
+
+    @abstractmethod
+    async def exercise_progress(self, exercise_id: str, start_date: str) -> List[dict]:
+        """Per-day progress of one exercise from ``start_date[:10]`` on, by
+        date, in the shape of ``ProgressData``."""
+
+    @abstractmethod
+    async def streaks(self, since: Optional[str] = None) -> dict:
+        """The streaks document (see ``streaks.py``) with the runs ending on
+        or after ``since`` (all runs without it) and the longest run."""
+
+
+class TemplateRepository(ABC):
+    @abstractmethod
+    async def list(self, limit: int) -> List[dict]:
+        """The ``limit`` newest templates."""
+
+    @abstractmethod
+    async def get(self, template_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def add(self, template: dict) -> None: ...
+
+    @abstractmethod
+    async def update(self, template_id: str, fields: dict) -> Optional[dict]:
+        """Set ``fields``; returns the updated template, or None if there
+        was none."""
+
+    @abstractmethod
+    async def delete(self, template_id: str) -> bool: ...
+
+
+class DataVersionStore(ABC):
+    """Per-collection write counters behind the response cache and ETags."""
+
+    @abstractmethod
+    async def get(self, collections: Iterable[str]) -> Tuple[Version, ...]: ...
+
+    @abstractmethod
+    async def bump(self, *collections: str) -> None: ...
+
+
+class Storage(ABC):
+    name: str
+    # Client options reported by /api/pool-stats
+    options: dict = {}
+
+    exercises: ExerciseRepository
+    workouts: WorkoutRepository
+    templates: TemplateRepository
+    versions: DataVersionStore
+
+    @abstractmethod
+    async def prepare(self) -> None:
+        """Idempotent one-off setup: schema, indexes and backfills."""
+
+    async def start(self) -> None:
+        """Per-process startup, before serving requests."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Delete every document (tests and benchmarks)."""
+
+    @abstractmethod
+    def close(self) -> None: ...
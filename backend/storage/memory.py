@@ -0,0 +1,314 @@
+"""In-process storage: everything in Python data structures, nothing on disk.
+
+Meant for tests, benchmarks and trying the app out without a database.
+Data lives in one process and is gone when it exits, so run a single
+worker (the launcher skips the shared preparation for this backend).
+
+Documents are kept as orjson bytes, so callers can never mutate what is
+stored through a returned dict, just as with a real database. Workouts are
+indexed by a sorted list of their ``(date, id)`` keys: date ranges and
+history pages are two bisections. The derived views are maintained on
+write, like the Mongo ones: per-workout totals, per-day rollups, per
+(exercise, day) progress and the streak runs of ``streaks.py``.
+"""
+
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from exercise_progress import DAY_END, merge_progress, summarize_workout_progress
+from rollups import ROLLUP_FIELDS, rounded_rollup, workout_rollup
+from storage.base import (
+    DataVersionStore,
+    ExerciseRepository,
+    Storage,
+    TemplateRepository,
+    Version,
+    WorkoutKey,
+    WorkoutRepository,
+)
+from streaks import add_day, parse_day, remove_day
+from workout_totals import without_totals
+
+
+def _dump(doc: dict) -> bytes:
+    return orjson.dumps(doc)
+
+
+def _load(raw: bytes) -> dict:
+    return orjson.loads(raw)
+
+
+class MemoryExercises(ExerciseRepository):
+    def __init__(self):
+        self._docs: Dict[str, bytes] = {}
+
+    async def list(self) -> List[dict]:
+        return [_load(raw) for raw in self._docs.values()]
+
+    async def count(self) -> int:
+        return len(self._docs)
+
+    async def add(self, exercise: dict) -> None:
+        self._docs[exercise["id"]] = _dump(exercise)
+
+    async def add_many(self, exercises: List[dict]) -> None:
+        for exercise in exercises:
+            await self.add(exercise)
+
+    def clear(self) -> None:
+        self._docs.clear()
+
+
+class MemoryWorkouts(WorkoutRepository):
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self._docs: Dict[str, bytes] = {}
+        self._keys: List[WorkoutKey] = []
+        # id -> (entries, sets, volume, calories), for the range totals
+        self._totals: Dict[str, Tuple[int, int, float, float]] = {}
+        self._days: Dict[str, dict] = {}
+        self._day_list: List[str] = []
+        self._progress: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        self._runs: List[List[str]] = []
+        self._longest: Optional[List[str]] = None
+
+    def _range(self, start_date: Optional[str], end_date: Optional[str]):
+        """Positions in ``_keys`` of ``start_date <= date <= end_date``."""
+        lo = bisect_left(self._keys, (start_date,)) if start_date else 0
+        hi = (
+            bisect_right(self._keys, (end_date, DAY_END))
+            if end_date
+            else len(self._keys)
+        )
+        return lo, max(lo, hi)
+
+    def _store(self, workout: dict) -> None:
+        self._docs[workout["id"]] = _dump(workout)
+        insort(self._keys, (workout["date"], workout["id"]))
+        self._totals[workout["id"]] = (
+            len(workout.get("entries", [])),
+            workout["total_sets"],
+            workout["total_volume"],
+            workout["total_calories"],
+        )
+
+        day = workout["date"][:10]
+        rollup = workout_rollup(workout)
+        if day not in self._days:
+            self._days[day] = {"date": day, **dict.fromkeys(ROLLUP_FIELDS, 0)}
+            insort(self._day_list, day)
+        for field in ROLLUP_FIELDS:
+            self._days[day][field] += rollup[field]
+
+        self._add_progress(workout)
+
+        if parse_day(day):
+            self._runs, self._longest = add_day(self._runs, self._longest, day)
+
+    def _add_progress(self, workout: dict, only: Optional[set] = None) -> None:
+        day = workout["date"][:10]
+        for exercise_id, progress in summarize_workout_progress(workout).items():
+            if only is not None and exercise_id not in only:
+                continue
+            days = self._progress[exercise_id]
+            if day in days:
+                merge_progress(days[day], progress)
+            else:
+                days[day] = progress
+
+    async def add(self, workout: dict) -> None:
+        if workout["id"] in self._docs:
+            raise ValueError(f"Duplicate workout id {workout['id']}")
+        self._store(workout)
+
+    async def add_many(self, workouts: List[dict]) -> Dict[int, str]:
+        failed = {}
+        for index, workout in enumerate(workouts):
+            try:
+                await self.add(workout)
+            except ValueError as e:
+                failed[index] = str(e)
+        return failed
+
+    async def get(self, workout_id: str) -> Optional[dict]:
+        raw = self._docs.get(workout_id)
+        return _load(raw) if raw is not None else None
+
+    async def delete(self, workout_id: str) -> Optional[dict]:
+        raw = self._docs.pop(workout_id, None)
+        if raw is None:
+            return None
+        workout = _load(raw)
+        key = (workout["date"], workout_id)
+        del self._keys[bisect_left(self._keys, key)]
+        del self._totals[workout_id]
+
+        day = workout["date"][:10]
+        rollup = workout_rollup(workout)
+        for field in ROLLUP_FIELDS:
+            self._days[day][field] -= rollup[field]
+        if self._days[day]["workouts"] <= 0:
+            del self._days[day]
+            del self._day_list[bisect_left(self._day_list, day)]
+            if parse_day(day):
+                self._runs, self._longest = remove_day(self._runs, self._longest, day)
+
+        # A max cannot be decremented: rebuild the day from what is left
+        exercise_ids = {
+            entry.get("exercise_id") for entry in workout.get("entries", [])
+        }
+        for exercise_id in exercise_ids:
+            self._progress[exercise_id].pop(day, None)
+        lo, hi = self._range(day, day + DAY_END)
+        for _, other_id in self._keys[lo:hi]:
+            self._add_progress(_load(self._docs[other_id]), exercise_ids)
+        return workout
+
+    async def page(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        after: Optional[WorkoutKey],
+        limit: int,
+        summary: bool = False,
+    ) -> List[dict]:
+        lo, hi = self._range(start_date, end_date)
+        if after:
+            hi = max(lo, min(hi, bisect_left(self._keys, tuple(after))))
+        keys = self._keys[max(lo, hi - limit) : hi]
+        return [_load(self._docs[workout_id]) for _, workout_id in reversed(keys)]
+
+    async def recent(self, limit: int) -> List[dict]:
+        return await self.page(None, None, None, limit)
+
+    async def export(
+        self, start_date: Optional[str], end_date: Optional[str]
+    ) -> AsyncIterator[dict]:
+        lo, hi = self._range(start_date, end_date)
+        # Keys as of the start, so concurrent writes cannot shift the slice
+        for _, workout_id in self._keys[lo:hi]:
+            raw = self._docs.get(workout_id)
+            if raw is not None:
+                yield without_totals(_load(raw))
+
+    async def totals(self, start_date: Optional[str], end_date: Optional[str]) -> dict:
+        lo, hi = self._range(start_date, end_date)
+        if lo == hi:
+            return {}
+        exercises = sets = 0
+        volume = calories = 0.0
+        for _, workout_id in self._keys[lo:hi]:
+            entries, workout_sets, workout_volume, workout_calories = self._totals[
+                workout_id
+            ]
+            exercises += entries
+            sets += workout_sets
+            volume += workout_volume
+            calories += workout_calories
+        return {
+            "workouts": hi - lo,
+            "exercises": exercises,
+            "sets": sets,
+            "volume": volume,
+            "calories": calories,
+        }
+
+    async def daily_totals(self, start_date: str, end_date: str) -> List[dict]:
+        lo = bisect_left(self._day_list, start_date[:10])
+        hi = bisect_right(self._day_list, end_date[:10])
+        return [rounded_rollup(dict(self._days[day])) for day in self._day_list[lo:hi]]
+
+    async def exercise_progress(self, exercise_id: str, start_date: str) -> List[dict]:
+        start = start_date[:10]
+        days = self._progress.get(exercise_id, {})
+        return [
+            {k: v for k, v in days[day].items() if k != "exercise_id"}
+            for day in sorted(days)
+            if day >= start
+        ]
+
+    async def streaks(self, since: Optional[str] = None) -> dict:
+        first = 0
+        if since:
+            # The run starting before ``since`` may still reach it
+            first = bisect_left(self._runs, [since])
+            if first and self._runs[first - 1][1] >= since:
+                first -= 1
+        return {"runs": self._runs[first:], "longest": self._longest}
+
+
+class MemoryTemplates(TemplateRepository):
+    def __init__(self):
+        self._docs: Dict[str, bytes] = {}
+
+    async def list(self, limit: int) -> List[dict]:
+        templates = [_load(raw) for raw in self._docs.values()]
+        templates.sort(key=lambda template: template["created_at"], reverse=True)
+        return templates[:limit]
+
+    async def get(self, template_id: str) -> Optional[dict]:
+        raw = self._docs.get(template_id)
+        return _load(raw) if raw is not None else None
+
+    async def add(self, template: dict) -> None:
+        self._docs[template["id"]] = _dump(template)
+
+    async def update(self, template_id: str, fields: dict) -> Optional[dict]:
+        template = await self.get(template_id)
+        if template is None:
+            return None
+        template.update(fields)
+        self._docs[template_id] = _dump(template)
+        return _load(self._docs[template_id])
+
+    async def delete(self, template_id: str) -> bool:
+        return self._docs.pop(template_id, None) is not None
+
+    def clear(self) -> None:
+        self._docs.clear()
+
+
+class MemoryVersions(DataVersionStore):
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        # Counters restart with the data; a fresh epoch keeps ETags handed
+        # out before (or by an earlier process) from matching
+        self._epoch = uuid.uuid4().hex
+        self._versions: Dict[str, int] = defaultdict(int)
+
+    async def get(self, collections: Iterable[str]) -> Tuple[Version, ...]:
+        return tuple((self._epoch, self._versions[name]) for name in collections)
+
+    async def bump(self, *collections: str) -> None:
+        for name in collections:
+            self._versions[name] += 1
+
+
+class MemoryStorage(Storage):
+    name = "memory"
+
+    def __init__(self):
+        self.exercises = MemoryExercises()
+        self.workouts = MemoryWorkouts()
+        self.templates = MemoryTemplates()
+        self.versions = MemoryVersions()
+
+    async def prepare(self) -> None:
+        pass
+
+    async def clear(self) -> None:
+        self.exercises.clear()
+        self.workouts.clear()
+        self.templates.clear()
+        self.versions.reset()
+
+    def close(self) -> None:
+        pass
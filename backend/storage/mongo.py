@@ -0,0 +1,262 @@
+"""MongoDB storage (Motor), the default backend.
+
+Workouts live in ``db.workouts`` with their stored totals; the write paths
+keep the materialized views current (``rollups.py``,
+``exercise_progress.py``, ``streaks.py``) and the analytics read those
+views or aggregate the stored totals (``aggregations.py``). ``prepare``
+ensures the indexes of ``indexes.py`` and backfills views and totals for
+databases that predate them.
+"""
+
+from typing import AsyncIterator, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+
+from aggregations import stats_pipeline
+from exercise_progress import (
+    add_workout_progress,
+    add_workouts_progress,
+    get_exercise_progress,
+    rebuild_exercise_progress,
+    remove_workout_progress,
+)
+from export import EXPORT_BATCH_SIZE, EXPORT_SORT
+from indexes import ensure_indexes
+from mongo_pool import warm_pool
+from pagination import WORKOUT_SORT, after_key
+from response_cache import DataVersions
+from rollups import (
+    add_workouts,
+    apply_workout,
+    get_daily_rollups,
+    rebuild_daily_rollups,
+)
+from storage.base import (
+    ExerciseRepository,
+    Storage,
+    TemplateRepository,
+    WorkoutKey,
+    WorkoutRepository,
+)
+from streaks import add_workout_days, get_streaks, rebuild_streaks, remove_workout_day
+from workout_totals import MISSING_TOTALS, backfill_workout_totals, totals_excluded
+
+COLLECTIONS = (
+    "exercises",
+    "workouts",
+    "templates",
+    "daily_rollups",
+    "exercise_daily_progress",
+    "streaks",
+    "streak_archive",
+    "data_versions",
+)
+
+# The summary only needs exercise names and the stored totals; no sets
+# leave Mongo
+WORKOUT_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "date": 1,
+    "notes": 1,
+    "created_at": 1,
+    "entries.exercise_name": 1,
+    "total_sets": 1,
+    "total_volume": 1,
+    "total_calories": 1,
+}
+
+
+def date_range_query(start_date: Optional[str], end_date: Optional[str]) -> dict:
+    query = {}
+    if start_date:
+        query["date"] = {"$gte": start_date}
+    if end_date:
+        if "date" in query:
+            query["date"]["$lte"] = end_date
+        else:
+            query["date"] = {"$lte": end_date}
+    return query
+
+
+# Backfill materialized views for databases that predate them
+async def backfill_materialized_views(db) -> None:
+    if await db.workouts.estimated_document_count() == 0:
+        return
+    # The rollups, stats and summaries below all read the stored totals
+    if await db.workouts.find_one(MISSING_TOTALS, {"_id": 1}):
+        await backfill_workout_totals(db)
+    if await db.daily_rollups.estimated_document_count() == 0:
+        await rebuild_daily_rollups(db)
+    if await db.exercise_daily_progress.estimated_document_count() == 0:
+        await rebuild_exercise_progress(db)
+    if await db.streaks.estimated_document_count() == 0:
+        await rebuild_streaks(db)
+
+
+class MongoExercises(ExerciseRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def list(self) -> List[dict]:
+        return await self.db.exercises.find({}, {"_id": 0}).to_list(None)
+
+    async def count(self) -> int:
+        return await self.db.exercises.count_documents({})
+
+    async def add(self, exercise: dict) -> None:
+        await self.db.exercises.insert_one(dict(exercise))
+
+    async def add_many(self, exercises: List[dict]) -> None:
+        await self.db.exercises.insert_many([dict(ex) for ex in exercises])
+
+
+class MongoWorkouts(WorkoutRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def add(self, workout: dict) -> None:
+        await self.db.workouts.insert_one(dict(workout))
+        await apply_workout(self.db, workout)
+        await add_workout_progress(self.db, workout)
+        await add_workout_days(self.db, [workout["date"][:10]])
+
+    async def add_many(self, workouts: List[dict]) -> Dict[int, str]:
+        failed = {}
+        try:
+            await self.db.workouts.insert_many(
+                [dict(workout) for workout in workouts], ordered=False
+            )
+        except BulkWriteError as e:
+            failed = {err["index"]: err["errmsg"] for err in e.details["writeErrors"]}
+        inserted = [w for i, w in enumerate(workouts) if i not in failed]
+        await add_workouts(self.db, inserted)
+        await add_workouts_progress(self.db, inserted)
+        await add_workout_days(self.db, (workout["date"][:10] for workout in inserted))
+        return failed
+
+    async def get(self, workout_id: str) -> Optional[dict]:
+        return await self.db.workouts.find_one({"id": workout_id}, {"_id": 0})
+
+    async def delete(self, workout_id: str) -> Optional[dict]:
+        workout = await self.db.workouts.find_one_and_delete(
+            {"id": workout_id}, projection={"_id": 0}
+        )
+        if workout:
+            await apply_workout(self.db, workout, sign=-1)
+            await remove_workout_progress(self.db, workout)
+            await remove_workout_day(self.db, workout["date"][:10])
+        return workout
+
+    async def page(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        after: Optional[WorkoutKey],
+        limit: int,
+        summary: bool = False,
+    ) -> List[dict]:
+        query = after_key(date_range_query(start_date, end_date), after)
+        projection = WORKOUT_SUMMARY_PROJECTION if summary else {"_id": 0}
+        return (
+            await self.db.workouts.find(query, projection)
+            .sort(WORKOUT_SORT)
+            .limit(limit)
+            .to_list(limit)
+        )
+
+    async def recent(self, limit: int) -> List[dict]:
+        return (
+            await self.db.workouts.find({}, {"_id": 0})
+            .sort("date", -1)
+            .limit(limit)
+            .to_list(limit)
+        )
+
+    async def export(
+        self, start_date: Optional[str], end_date: Optional[str]
+    ) -> AsyncIterator[dict]:
+        cursor = (
+            self.db.workouts.find(
+                date_range_query(start_date, end_date), totals_excluded()
+            )
+            .sort(EXPORT_SORT)
+            .batch_size(EXPORT_BATCH_SIZE)
+        )
+        async for workout in cursor:
+            yield workout
+
+    async def totals(self, start_date: Optional[str], end_date: Optional[str]) -> dict:
+        pipeline = stats_pipeline(date_range_query(start_date, end_date))
+        result = await self.db.workouts.aggregate(pipeline).to_list(1)
+        return result[0] if result else {}
+
+    async def daily_totals(self, start_date: str, end_date: str) -> List[dict]:
+        return await get_daily_rollups(self.db, start_date, end_date)
+
+    async def exercise_progress(self, exercise_id: str, start_date: str) -> List[dict]:
+        return await get_exercise_progress(self.db, exercise_id, start_date)
+
+    async def streaks(self, since: Optional[str] = None) -> dict:
+        return await get_streaks(self.db, since)
+
+
+class MongoTemplates(TemplateRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def list(self, limit: int) -> List[dict]:
+        return (
+            await self.db.templates.find({}, {"_id": 0})
+            .sort("created_at", -1)
+            .limit(limit)
+            .to_list(limit)
+        )
+
+    async def get(self, template_id: str) -> Optional[dict]:
+        return await self.db.templates.find_one({"id": template_id}, {"_id": 0})
+
+    async def add(self, template: dict) -> None:
+        await self.db.templates.insert_one(dict(template))
+
+    async def update(self, template_id: str, fields: dict) -> Optional[dict]:
+        await self.db.templates.update_one({"id": template_id}, {"$set": fields})
+        return await self.get(template_id)
+
+    async def delete(self, template_id: str) -> bool:
+        result = await self.db.templates.delete_one({"id": template_id})
+        return result.deleted_count > 0
+
+
+class MongoStorage(Storage):
+    name = "mongodb"
+
+    def __init__(
+        self, url: str, db_name: str, options: Optional[dict] = None, event_listeners=()
+    ):
+        self.options = options or {}
+        self.client = AsyncIOMotorClient(
+            url, event_listeners=list(event_listeners), **self.options
+        )
+        self.db = self.client[db_name]
+        self.exercises = MongoExercises(self.db)
+        self.workouts = MongoWorkouts(self.db)
+        self.templates = MongoTemplates(self.db)
+        # Kept in Mongo so every worker process sees every write
+        self.versions = DataVersions(self.db.data_versions)
+
+    async def prepare(self) -> None:
+        await ensure_indexes(self.db)
+        await backfill_materialized_views(self.db)
+
+    async def start(self) -> None:
+        await warm_pool(self.client, self.options.get("minPoolSize", 0))
+
+    async def clear(self) -> None:
+        for name in COLLECTIONS:
+            await self.db[name].drop()
+        await ensure_indexes(self.db)
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,599 @@
+"""SQLite storage, with the standard library ``sqlite3`` module.
+
+A single-file database for small deployments without a MongoDB server.
+Every worker process opens the file itself; WAL mode lets readers run
+alongside the one writer at a time SQLite allows.
+
+Documents are stored as orjson blobs, next to the columns the queries
+filter, sort and aggregate on, which are filled from the stored totals
+(``workout_totals.py``) when a workout is written:
+
+    workouts          one row per workout: date, day, totals, document
+    workout_entries   one row per entry: exercise, day and entry totals
+
+The analytics are plain ``GROUP BY`` queries over covering indexes on
+those columns, so unlike the Mongo backend there are no materialized
+views to keep in sync, except for the runs of consecutive workout days
+behind the streaks (``streaks.py``):
+
+    streak_runs       one row per run: first and last day, length
+
+which are updated in the transaction that adds the first workout of a day
+or deletes the last one. ``sqlite3`` blocks, so every statement runs on a
+single thread of its own, off the event loop; the connection is opened
+on first use (after any fork).
+"""
+
+import asyncio
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from export import EXPORT_BATCH_SIZE
+from rollups import rounded_rollup
+from storage.base import (
+    DataVersionStore,
+    ExerciseRepository,
+    Storage,
+    TemplateRepository,
+    Version,
+    WorkoutKey,
+    WorkoutRepository,
+)
+from streaks import (
+    add_day,
+    build_runs,
+    parse_day,
+    remove_day,
+    run_length,
+)
+from workout_totals import without_totals
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exercises (
+    id TEXT PRIMARY KEY,
+    doc BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workouts (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    day TEXT NOT NULL,
+    entry_count INTEGER NOT NULL,
+    total_sets INTEGER NOT NULL,
+    total_volume REAL NOT NULL,
+    total_calories REAL NOT NULL,
+    doc BLOB NOT NULL
+);
+-- History pages and date-range totals
+CREATE INDEX IF NOT EXISTS workouts_date ON workouts (
+    date, id, entry_count, total_sets, total_volume, total_calories
+);
+-- Daily rollups and streaks
+CREATE INDEX IF NOT EXISTS workouts_day ON workouts (
+    day, total_sets, total_volume, total_calories
+);
+CREATE TABLE IF NOT EXISTS workout_entries (
+    workout_id TEXT NOT NULL,
+    exercise_id TEXT,
+    day TEXT NOT NULL,
+    total_volume REAL NOT NULL,
+    total_reps INTEGER NOT NULL,
+    total_duration REAL NOT NULL,
+    total_distance REAL NOT NULL,
+    total_calories REAL NOT NULL,
+    max_weight REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS workout_entries_exercise_day
+    ON workout_entries (exercise_id, day);
+CREATE INDEX IF NOT EXISTS workout_entries_workout
+    ON workout_entries (workout_id);
+CREATE TABLE IF NOT EXISTS streak_runs (
+    first_day TEXT PRIMARY KEY,
+    last_day TEXT NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS streak_runs_last_day ON streak_runs (last_day);
+CREATE INDEX IF NOT EXISTS streak_runs_length ON streak_runs (length DESC, first_day);
+CREATE TABLE IF NOT EXISTS templates (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    doc BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS templates_created_at ON templates (created_at);
+CREATE TABLE IF NOT EXISTS data_versions (
+    collection TEXT PRIMARY KEY,
+    epoch TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+"""
+
+TABLES = (
+    "exercises",
+    "workouts",
+    "workout_entries",
+    "streak_runs",
+    "templates",
+    "data_versions",
+)
+
+# Seconds a writer waits for another process's write to finish
+BUSY_TIMEOUT = 5
+
+
+def _dump(doc: dict) -> bytes:
+    return orjson.dumps(doc)
+
+
+def _load(raw: bytes) -> dict:
+    return orjson.loads(raw)
+
+
+def _date_range(
+    start_date: Optional[str], end_date: Optional[str]
+) -> Tuple[List[str], list]:
+    """WHERE conditions and parameters for ``start_date <= date <= end_date``."""
+    conditions, params = [], []
+    if start_date:
+        conditions.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("date <= ?")
+        params.append(end_date)
+    return conditions, params
+
+
+def _where(conditions: List[str]) -> str:
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+class SqliteDatabase:
+    """The connection, and the thread every statement runs on."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-storage"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    async def run(self, func, *args):
+        """``func(connection, *args)`` on the database thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: func(self._connect(), *args)
+        )
+
+    async def fetchall(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        return await self.run(lambda conn: conn.execute(sql, tuple(params)).fetchall())
+
+    async def fetchone(self, sql: str, params: Iterable = ()) -> Optional[tuple]:
+        return await self.run(lambda conn: conn.execute(sql, tuple(params)).fetchone())
+
+    async def execute(self, sql: str, params: Iterable = ()) -> int:
+        """Run one write statement in its own transaction; returns the
+        number of rows changed."""
+
+        def execute(conn):
+            with conn:
+                return conn.execute(sql, tuple(params)).rowcount
+
+        return await self.run(execute)
+
+    def close(self) -> None:
+        def close():
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+        self._executor.submit(close).result()
+
+
+class SqliteExercises(ExerciseRepository):
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+
+    async def list(self) -> List[dict]:
+        rows = await self.database.fetchall("SELECT doc FROM exercises ORDER BY rowid")
+        return [_load(doc) for doc, in rows]
+
+    async def count(self) -> int:
+        (count,) = await self.database.fetchone("SELECT COUNT(*) FROM exercises")
+        return count
+
+    async def add(self, exercise: dict) -> None:
+        await self.database.execute(
+            "INSERT INTO exercises (id, doc) VALUES (?, ?)",
+            (exercise["id"], _dump(exercise)),
+        )
+
+    async def add_many(self, exercises: List[dict]) -> None:
+        def add_many(conn):
+            with conn:
+                conn.executemany(
+                    "INSERT INTO exercises (id, doc) VALUES (?, ?)",
+                    [(exercise["id"], _dump(exercise)) for exercise in exercises],
+                )
+
+        await self.database.run(add_many)
+
+
+def _workout_row(workout: dict) -> tuple:
+    return (
+        workout["id"],
+        workout["date"],
+        workout["date"][:10],
+        len(workout.get("entries", [])),
+        workout["total_sets"],
+        workout["total_volume"],
+        workout["total_calories"],
+        _dump(workout),
+    )
+
+
+def _entry_rows(workout: dict) -> List[tuple]:
+    day = workout["date"][:10]
+    return [
+        (
+            workout["id"],
+            entry.get("exercise_id"),
+            day,
+            entry["total_volume"],
+            entry["total_reps"],
+            entry["total_duration"],
+            entry["total_distance"],
+            entry["total_calories"],
+            entry["max_weight"],
+        )
+        for entry in workout.get("entries", [])
+    ]
+
+
+def _insert_workout(conn: sqlite3.Connection, workout: dict) -> None:
+    conn.execute(
+        "INSERT INTO workouts (id, date, day, entry_count, total_sets,"
+        " total_volume, total_calories, doc) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        _workout_row(workout),
+    )
+    conn.executemany(
+        "INSERT INTO workout_entries (workout_id, exercise_id, day, total_volume,"
+        " total_reps, total_duration, total_distance, total_calories, max_weight)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        _entry_rows(workout),
+    )
+    day = workout["date"][:10]
+    if parse_day(day) and _day_count(conn, day) == 1:
+        _change_streak_runs(conn, day, add_day)
+
+
+def _change_streak_runs(conn: sqlite3.Connection, day: str, change) -> None:
+    """Apply ``add_day`` or ``remove_day`` for ``day`` to the runs it can
+    touch: the run starting on or before it and the one starting the day
+    after."""
+    next_day = (parse_day(day) + timedelta(days=1)).isoformat()
+    rows = conn.execute(
+        "SELECT first_day, last_day FROM ("
+        "  SELECT first_day, last_day FROM streak_runs WHERE first_day <= ?"
+        "  ORDER BY first_day DESC LIMIT 1"
+        ") UNION SELECT first_day, last_day FROM streak_runs WHERE first_day = ?"
+        " ORDER BY first_day",
+        (day, next_day),
+    ).fetchall()
+    runs = [list(row) for row in rows]
+    new_runs, _ = change(runs, None, day)
+    if new_runs is runs:
+        return
+    conn.executemany(
+        "DELETE FROM streak_runs WHERE first_day = ?", [(run[0],) for run in runs]
+    )
+    conn.executemany(
+        "INSERT INTO streak_runs (first_day, last_day, length) VALUES (?, ?, ?)",
+        [(run[0], run[1], run_length(run)) for run in new_runs],
+    )
+
+
+def _day_count(conn: sqlite3.Connection, day: str) -> int:
+    return conn.execute(
+        "SELECT COUNT(*) FROM workouts WHERE day = ?", (day,)
+    ).fetchone()[0]
+
+
+class SqliteWorkouts(WorkoutRepository):
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+
+    async def add(self, workout: dict) -> None:
+        def add(conn):
+            with conn:
+                _insert_workout(conn, workout)
+
+        await self.database.run(add)
+
+    async def add_many(self, workouts: List[dict]) -> Dict[int, str]:
+        def add_many(conn):
+            failed = {}
+            with conn:
+                for index, workout in enumerate(workouts):
+                    try:
+                        _insert_workout(conn, workout)
+                    except sqlite3.IntegrityError as e:
+                        failed[index] = str(e)
+            return failed
+
+        return await self.database.run(add_many)
+
+    async def get(self, workout_id: str) -> Optional[dict]:
+        row = await self.database.fetchone(
+            "SELECT doc FROM workouts WHERE id = ?", (workout_id,)
+        )
+        return _load(row[0]) if row else None
+
+    async def delete(self, workout_id: str) -> Optional[dict]:
+        def delete(conn):
+            with conn:
+                row = conn.execute(
+                    "SELECT day, doc FROM workouts WHERE id = ?", (workout_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                day, doc = row
+                conn.execute("DELETE FROM workouts WHERE id = ?", (workout_id,))
+                conn.execute(
+                    "DELETE FROM workout_entries WHERE workout_id = ?", (workout_id,)
+                )
+                if parse_day(day) and _day_count(conn, day) == 0:
+                    _change_streak_runs(conn, day, remove_day)
+                return _load(doc)
+
+        return await self.database.run(delete)
+
+    async def page(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        after: Optional[WorkoutKey],
+        limit: int,
+        summary: bool = False,
+    ) -> List[dict]:
+        conditions, params = _date_range(start_date, end_date)
+        if after:
+            conditions.append("(date, id) < (?, ?)")
+            params.extend(after)
+        rows = await self.database.fetchall(
+            f"SELECT doc FROM workouts {_where(conditions)}"
+            " ORDER BY date DESC, id DESC LIMIT ?",
+            [*params, limit],
+        )
+        return [_load(doc) for doc, in rows]
+
+    async def recent(self, limit: int) -> List[dict]:
+        return await self.page(None, None, None, limit)
+
+    async def export(
+        self, start_date: Optional[str], end_date: Optional[str]
+    ) -> AsyncIterator[dict]:
+        # Keyset batches, so no read transaction stays open between them
+        conditions, params = _date_range(start_date, end_date)
+        last = None
+        while True:
+            batch_conditions, batch_params = list(conditions), list(params)
+            if last:
+                batch_conditions.append("(date, id) > (?, ?)")
+                batch_params.extend(last)
+            rows = await self.database.fetchall(
+                f"SELECT date, id, doc FROM workouts {_where(batch_conditions)}"
+                " ORDER BY date, id LIMIT ?",
+                [*batch_params, EXPORT_BATCH_SIZE],
+            )
+            for _, _, doc in rows:
+                yield without_totals(_load(doc))
+            if len(rows) < EXPORT_BATCH_SIZE:
+                return
+            last = rows[-1][:2]
+
+    async def totals(self, start_date: Optional[str], end_date: Optional[str]) -> dict:
+        conditions, params = _date_range(start_date, end_date)
+        workouts, exercises, sets, volume, calories = await self.database.fetchone(
+            "SELECT COUNT(*), SUM(entry_count), SUM(total_sets), SUM(total_volume),"
+            f" SUM(total_calories) FROM workouts {_where(conditions)}",
+            params,
+        )
+        if not workouts:
+            return {}
+        return {
+            "workouts": workouts,
+            "exercises": exercises,
+            "sets": sets,
+            "volume": volume,
+            "calories": calories,
+        }
+
+    async def daily_totals(self, start_date: str, end_date: str) -> List[dict]:
+        rows = await self.database.fetchall(
+            "SELECT day, COUNT(*), SUM(total_sets), SUM(total_volume),"
+            " SUM(total_calories) FROM workouts WHERE day BETWEEN ? AND ?"
+            " GROUP BY day ORDER BY day",
+            (start_date[:10], end_date[:10]),
+        )
+        return [
+            rounded_rollup(
+                {
+                    "date": day,
+                    "workouts": workouts,
+                    "sets": sets,
+                    "volume": volume,
+                    "calories": calories,
+                }
+            )
+            for day, workouts, sets, volume, calories in rows
+        ]
+
+    async def exercise_progress(self, exercise_id: str, start_date: str) -> List[dict]:
+        rows = await self.database.fetchall(
+            "SELECT day, MAX(max_weight), SUM(total_volume), SUM(total_reps),"
+            " SUM(total_duration), SUM(total_distance), SUM(total_calories)"
+            " FROM workout_entries WHERE exercise_id = ? AND day >= ?"
+            " GROUP BY day ORDER BY day",
+            (exercise_id, start_date[:10]),
+        )
+        return [
+            {
+                "date": day,
+                "max_weight": max_weight,
+                "total_volume": volume,
+                "total_reps": reps,
+                "duration": duration,
+                "distance": distance,
+                "calories": calories,
+            }
+            for day, max_weight, volume, reps, duration, distance, calories in rows
+        ]
+
+    async def streaks(self, since: Optional[str] = None) -> dict:
+        def streaks(conn):
+            runs = conn.execute(
+                "SELECT first_day, last_day FROM streak_runs WHERE last_day >= ?"
+                " ORDER BY last_day",
+                (since or "",),
+            ).fetchall()
+            longest = conn.execute(
+                "SELECT first_day, last_day FROM streak_runs"
+                " ORDER BY length DESC, first_day LIMIT 1"
+            ).fetchone()
+            return {
+                "runs": [list(run) for run in runs],
+                "longest": list(longest) if longest else None,
+            }
+
+        return await self.database.run(streaks)
+
+
+class SqliteTemplates(TemplateRepository):
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+
+    async def list(self, limit: int) -> List[dict]:
+        rows = await self.database.fetchall(
+            "SELECT doc FROM templates ORDER BY created_at DESC LIMIT ?", (limit,)
+        )
+        return [_load(doc) for doc, in rows]
+
+    async def get(self, template_id: str) -> Optional[dict]:
+        row = await self.database.fetchone(
+            "SELECT doc FROM templates WHERE id = ?", (template_id,)
+        )
+        return _load(row[0]) if row else None
+
+    async def add(self, template: dict) -> None:
+        await self.database.execute(
+            "INSERT INTO templates (id, created_at, doc) VALUES (?, ?, ?)",
+            (template["id"], template["created_at"], _dump(template)),
+        )
+
+    async def update(self, template_id: str, fields: dict) -> Optional[dict]:
+        def update(conn):
+            with conn:
+                row = conn.execute(
+                    "SELECT doc FROM templates WHERE id = ?", (template_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                template = {**_load(row[0]), **fields}
+                doc = _dump(template)
+                conn.execute(
+                    "UPDATE templates SET doc = ? WHERE id = ?", (doc, template_id)
+                )
+                return _load(doc)
+
+        return await self.database.run(update)
+
+    async def delete(self, template_id: str) -> bool:
+        deleted = await self.database.execute(
+            "DELETE FROM templates WHERE id = ?", (template_id,)
+        )
+        return deleted > 0
+
+
+class SqliteVersions(DataVersionStore):
+    """Same counters as ``response_cache.DataVersions``, in a table shared
+    by every process using the file."""
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+
+    async def get(self, collections: Iterable[str]) -> Tuple[Version, ...]:
+        collections = list(collections)
+        placeholders = ", ".join("?" for _ in collections)
+        rows = await self.database.fetchall(
+            "SELECT collection, epoch, version FROM data_versions"
+            f" WHERE collection IN ({placeholders})",
+            collections,
+        )
+        versions = {name: (epoch, version) for name, epoch, version in rows}
+        return tuple(versions.get(name, ("", 0)) for name in collections)
+
+    async def bump(self, *collections: str) -> None:
+        def bump(conn):
+            with conn:
+                conn.executemany(
+                    "INSERT INTO data_versions (collection, epoch, version)"
+                    " VALUES (?, ?, 1) ON CONFLICT (collection)"
+                    " DO UPDATE SET version = version + 1",
+                    [(name, uuid.uuid4().hex) for name in collections],
+                )
+
+        await self.database.run(bump)
+
+
+class SqliteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.database = SqliteDatabase(path)
+        self.options = {"path": path}
+        self.exercises = SqliteExercises(self.database)
+        self.workouts = SqliteWorkouts(self.database)
+        self.templates = SqliteTemplates(self.database)
+        self.versions = SqliteVersions(self.database)
+
+    async def prepare(self) -> None:
+        # The schema is created on connect; the streak runs of a database
+        # written before they were kept are backfilled once
+        def backfill_streak_runs(conn):
+            with conn:
+                if conn.execute("SELECT 1 FROM streak_runs LIMIT 1").fetchone():
+                    return
+                days = conn.execute("SELECT DISTINCT day FROM workouts").fetchall()
+                conn.executemany(
+                    "INSERT INTO streak_runs (first_day, last_day, length)"
+                    " VALUES (?, ?, ?)",
+                    [
+                        (run[0], run[1], run_length(run))
+                        for run in build_runs(day for day, in days)
+                    ],
+                )
+
+        await self.database.run(backfill_streak_runs)
+
+    async def clear(self) -> None:
+        def clear(conn):
+            with conn:
+                for table in TABLES:
+                    conn.execute(f"DELETE FROM {table}")
+
+        await self.database.run(clear)
+
+    def close(self) -> None:
+        self.database.close()
@@ -0,0 +1,393 @@
+"""Incrementally maintained workout streaks.
+
+Streaks are kept as runs of consecutive workout days, oldest first, and
+the longest of them. Adding a day extends, merges or inserts a run;
+removing the last workout of a day shortens or splits the run holding it.
+Only a split of the longest run needs a scan of the runs to find the new
+longest. Streaks for the whole history are then a read of the newest and
+the longest run; a date window only has to clip the runs that overlap it,
+so a read asks for the runs ending on or after ``streaks_since``.
+
+On MongoDB, ``db.streaks`` holds one small document with the most recent
+runs and the longest, plus one manifest entry per archived chunk of older
+runs:
+
+    {"_id": "workouts", "version": 42,
+     "runs": [["2026-01-03", "2026-01-05"], ["2026-01-07", "2026-01-20"]],
+     "longest": ["2025-03-02", "2025-04-11"],
+     "archive": [{"id": "<uuid hex>", "first": "2024-01-02",
+                  "last": "2025-02-27", "longest": [...]}]}
+
+Once it holds more than ``MAX_RUNS`` runs, the oldest ``ARCHIVE_RUNS``
+move to a document of ``db.streak_archive``, so the document stays a few
+kilobytes however long the history: it grows by one manifest entry (about
+100 bytes) per ``ARCHIVE_RUNS`` runs. Reads of recent windows never touch
+the archive. Adding or removing a day older than the runs the document
+holds pulls the archived chunks from that day on back in first. Writes are
+guarded by ``version``, so concurrent updates retry instead of
+overwriting each other. Archive documents are written before the update
+that refers to them and never changed afterwards.
+"""
+
+import logging
+import re
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from aggregations import daily_workout_counts_pipeline
+
+STREAKS_ID = "workouts"
+
+# Runs the streaks document holds before the oldest move to the archive,
+# and how many move at a time
+MAX_RUNS = 64
+ARCHIVE_RUNS = 32
+
+Run = List[str]
+
+_DAY = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+logger = logging.getLogger(__name__)
+
+
+def parse_day(value: Optional[str]) -> Optional[date]:
+    """The calendar day of a workout date, or None if it is not one."""
+    if not value or not _DAY.match(value[:10]):
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def _shift(day: str, days: int) -> str:
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def run_length(run: Run) -> int:
+    return (date.fromisoformat(run[1]) - date.fromisoformat(run[0])).days + 1
+
+
+def longest_run(runs: List[Run]) -> Optional[Run]:
+    # Ties go to the earliest run, as in a left-to-right scan
+    best = None
+    for run in runs:
+        if best is None or run_length(run) > run_length(best):
+            best = run
+    return best
+
+
+def add_day(runs: List[Run], longest: Optional[Run], day: str):
+    """Return ``(runs, longest)`` with ``day`` marked as a workout day."""
+    index = bisect_right([run[0] for run in runs], day)
+    before = runs[index - 1] if index else None
+    after = runs[index] if index < len(runs) else None
+    if before and before[1] >= day:
+        return runs, longest
+
+    joins_before = before is not None and _shift(before[1], 1) == day
+    joins_after = after is not None and _shift(after[0], -1) == day
+    if joins_before and joins_after:
+        run = [before[0], after[1]]
+        runs = runs[: index - 1] + [run] + runs[index + 1 :]
+    elif joins_before:
+        run = [before[0], day]
+        runs = runs[: index - 1] + [run] + runs[index:]
+    elif joins_after:
+        run = [day, after[1]]
+        runs = runs[:index] + [run] + runs[index + 1 :]
+    else:
+        run = [day, day]
+        runs = runs[:index] + [run] + runs[index:]
+
+    # A merged run is always longer than the runs it absorbed
+    if longest is None or run_length(run) > run_length(longest):
+        longest = run
+    return runs, longest
+
+
+def remove_day(runs: List[Run], longest: Optional[Run], day: str):
+    """Return ``(runs, longest)`` with ``day`` no longer a workout day."""
+    index = bisect_right([run[0] for run in runs], day) - 1
+    if index < 0 or runs[index][1] < day:
+        return runs, longest
+
+    run = runs[index]
+    pieces = []
+    if run[0] < day:
+        pieces.append([run[0], _shift(day, -1)])
+    if day < run[1]:
+        pieces.append([_shift(day, 1), run[1]])
+    runs = runs[:index] + pieces + runs[index + 1 :]
+
+    if run == longest:
+        longest = longest_run(runs)
+    return runs, longest
+
+
+def _clip(run: Run, start: Optional[str], end: Optional[str]) -> Optional[Run]:
+    clipped = [
+        max(run[0], start) if start else run[0],
+        min(run[1], end) if end else run[1],
+    ]
+    return clipped if clipped[0] <= clipped[1] else None
+
+
+def _runs_in(runs: List[Run], start: Optional[str], end: Optional[str]):
+    """Runs overlapping [start, end] (either bound optional), clipped to it."""
+    first = bisect_left([run[1] for run in runs], start) if start else 0
+    for run in runs[first:]:
+        if end and run[0] > end:
+            break
+        clipped = _clip(run, start, end)
+        if clipped:
+            yield clipped
+
+
+def streak_stats(
+    doc: dict,
+    today: date,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Tuple[int, int]:
+    """``(current_streak, longest_streak)`` over the days in the window.
+
+    The current streak is the run ending today, or yesterday if there is
+    no workout yet today; it is zero if the window holds a later workout
+    day than today.
+    """
+    runs = doc.get("runs", [])
+    start = start_date[:10] if start_date else None
+    end = end_date[:10] if end_date else None
+
+    if start or end:
+        window = list(_runs_in(runs, start, end))
+        latest = window[-1] if window else None
+        longest = max((run_length(run) for run in window), default=0)
+    else:
+        latest = runs[-1] if runs else None
+        longest = run_length(doc["longest"]) if doc.get("longest") else 0
+
+    current = 0
+    if latest and latest[1] in (
+        today.isoformat(),
+        (today - timedelta(days=1)).isoformat(),
+    ):
+        current = run_length(latest)
+    return current, longest
+
+
+def streaks_since(
+    today: date, start_date: Optional[str] = None, end_date: Optional[str] = None
+) -> Optional[str]:
+    """The earliest day whose runs ``streak_stats`` and the week and month
+    ``count_days`` of a stats window read: runs ending before it can be
+    left out of the streaks read. None when every run is needed."""
+    if start_date:
+        return start_date[:10]
+    if end_date:
+        return None
+    # The current streak ends yesterday at the earliest
+    week_start = today - timedelta(days=today.weekday())
+    return min(week_start, today.replace(day=1), today - timedelta(days=1)).isoformat()
+
+
+def count_days(
+    doc: dict, start_date: Optional[str] = None, end_date: Optional[str] = None
+) -> int:
+    """Number of workout days in [start_date, end_date]."""
+    start = start_date[:10] if start_date else None
+    end = end_date[:10] if end_date else None
+    return sum(run_length(run) for run in _runs_in(doc.get("runs", []), start, end))
+
+
+def build_runs(days: Iterable[str]) -> List[Run]:
+    """Runs of consecutive days among ``days`` (workout dates; values that
+    are not a calendar day are skipped), oldest first."""
+    runs: List[Run] = []
+    for day in sorted({day[:10] for day in days if parse_day(day)}):
+        if runs and _shift(runs[-1][1], 1) == day:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def streaks_doc(days: Iterable[str]) -> dict:
+    """The streaks document for a set of workout days, built from scratch."""
+    runs = build_runs(days)
+    return {"runs": runs, "longest": longest_run(runs)}
+
+
+def _split_runs(runs: List[Run]) -> Tuple[List[List[Run]], List[Run]]:
+    """``runs`` as the chunks to archive, oldest first, and the runs the
+    streaks document keeps."""
+    chunks = []
+    while len(runs) > MAX_RUNS:
+        chunks.append(runs[:ARCHIVE_RUNS])
+        runs = runs[ARCHIVE_RUNS:]
+    return chunks, runs
+
+
+def _archive_entry(archive_id: str, chunk: List[Run]) -> dict:
+    return {
+        "id": archive_id,
+        "first": chunk[0][0],
+        "last": chunk[-1][1],
+        "longest": longest_run(chunk),
+    }
+
+
+async def _archived_runs(db, entries: List[dict]) -> Optional[List[Run]]:
+    """The runs of the archive ``entries``, in order; None if one of them
+    is gone, i.e. a concurrent update pulled it back in."""
+    ids = [entry["id"] for entry in entries]
+    docs = await db.streak_archive.find({"_id": {"$in": ids}}).to_list(None)
+    chunks = {doc["_id"]: doc["runs"] for doc in docs}
+    if len(chunks) < len(ids):
+        return None
+    return [run for archive_id in ids for run in chunks[archive_id]]
+
+
+async def get_streaks(db, since: Optional[str] = None) -> dict:
+    """The streaks document, with the archived runs ending on or after
+    ``since`` (all of them without it) put back in front of its runs."""
+    while True:
+        doc = await db.streaks.find_one({"_id": STREAKS_ID}) or {"runs": []}
+        needed = [
+            entry
+            for entry in doc.get("archive", [])
+            if not since or entry["last"] >= since
+        ]
+        archived = await _archived_runs(db, needed) if needed else []
+        if archived is not None:
+            runs = archived + doc["runs"]
+            if since:
+                runs = runs[bisect_left([run[1] for run in runs], since) :]
+            doc["runs"] = runs
+            return doc
+
+
+async def _update(db, earliest: str, change) -> None:
+    """Apply ``change(runs, longest)`` to the streaks, where ``earliest`` is
+    the earliest day it adds or removes."""
+    while True:
+        doc = await db.streaks.find_one({"_id": STREAKS_ID}) or {
+            "runs": [],
+            "longest": None,
+            "version": 0,
+        }
+        # Archived runs ending the day before ``earliest`` or later may
+        # change; pull them back in
+        archive = doc.get("archive", [])
+        kept = [entry for entry in archive if entry["last"] < _shift(earliest, -1)]
+        pulled = archive[len(kept) :]
+        runs = doc["runs"]
+        if pulled:
+            archived = await _archived_runs(db, pulled)
+            if archived is None:
+                continue
+            runs = archived + runs
+
+        new_runs, longest = change(runs, doc.get("longest"))
+        if new_runs is runs:
+            return
+        if longest != doc.get("longest"):
+            # Only the runs at hand were compared: the kept archive chunks
+            # may hold a longer one
+            longest = longest_run(
+                [entry["longest"] for entry in kept] + ([longest] if longest else [])
+            )
+
+        chunks, new_runs = _split_runs(new_runs)
+        written = [{"_id": uuid.uuid4().hex, "runs": chunk} for chunk in chunks]
+        if written:
+            await db.streak_archive.insert_many(written)
+        archive = kept + [_archive_entry(w["_id"], w["runs"]) for w in written]
+        try:
+            result = await db.streaks.update_one(
+                {"_id": STREAKS_ID, "version": doc["version"]},
+                {
+                    "$set": {"runs": new_runs, "longest": longest, "archive": archive},
+                    "$inc": {"version": 1},
+                },
+                upsert=True,
+            )
+            updated = bool(result.matched_count or result.upserted_id is not None)
+        except DuplicateKeyError:
+            # Another writer created the document first
+            updated = False
+        # Whichever chunks no document refers to now
+        if updated:
+            orphans = [entry["id"] for entry in pulled]
+        else:
+            orphans = [w["_id"] for w in written]
+        if orphans:
+            await db.streak_archive.delete_many({"_id": {"$in": orphans}})
+        if updated:
+            return
+
+
+async def add_workout_days(db, days: Iterable[str]) -> None:
+    """Mark the days of new workouts (``YYYY-MM-DD``) as workout days."""
+    days = sorted({day for day in days if parse_day(day)})
+    if not days:
+        return
+
+    def change(runs, longest):
+        for day in days:
+            runs, longest = add_day(runs, longest, day)
+        return runs, longest
+
+    await _update(db, days[0], change)
+
+
+async def remove_workout_day(db, day: str) -> None:
+    """Drop ``day`` from the streaks if it no longer has any workouts.
+
+    Call after the workout has been removed from the daily rollups.
+    """
+    if not parse_day(day) or await db.daily_rollups.find_one({"_id": day}):
+        return
+    await _update(db, day, lambda runs, longest: remove_day(runs, longest, day))
+
+
+async def rebuild_streaks(db) -> int:
+    """Regenerate the streaks document and its archive from ``db.workouts``.
+
+    Returns the number of runs.
+    """
+    days = await db.workouts.aggregate(daily_workout_counts_pipeline()).to_list(None)
+    all_runs = build_runs(row["_id"] for row in days)
+    chunks, runs = _split_runs(all_runs)
+    written = [{"_id": uuid.uuid4().hex, "runs": chunk} for chunk in chunks]
+    if written:
+        await db.streak_archive.insert_many(written)
+    await db.streaks.update_one(
+        {"_id": STREAKS_ID},
+        {
+            "$set": {
+                "runs": runs,
+                "longest": longest_run(all_runs),
+                "archive": [_archive_entry(w["_id"], w["runs"]) for w in written],
+            },
+            "$inc": {"version": 1},
+        },
+        upsert=True,
+    )
+    await db.streak_archive.delete_many({"_id": {"$nin": [w["_id"] for w in written]}})
+    logger.info(f"Rebuilt workout streaks ({len(all_runs)} runs)")
+    return len(all_runs)
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from storage import open_mongo_database
+
+    db = open_mongo_database("Rebuilding the streaks")
+    asyncio.run(rebuild_streaks(db))
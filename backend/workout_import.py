@@ -0,0 +1,313 @@
+"""Incremental parsers for bulk workout imports.
+
+Each parser consumes the request body as an async stream of byte chunks
+and yields ``(record_number, workout_dict_or_error)`` as soon as a record
+is complete, so an upload is never held in memory as a whole. Parse
+errors are yielded as ``ValueError`` instances in place of the record so
+the caller can report them per record and carry on where possible: a
+malformed element of a JSON array is skipped up to the comma that ends
+it, so the elements after it still import.
+
+Supported formats:
+
+- ``json``: a JSON array of workouts (the ``WorkoutLogCreate`` shape)
+- ``ndjson``: one workout per line, as produced by the NDJSON export
+- ``csv``: one row per set with the columns of the CSV export; rows of the
+  same workout (``workout_id``, or ``date`` when that is empty) must be
+  consecutive, as they are in an export
+"""
+
+import codecs
+import csv
+import io
+import json
+import re
+from typing import AsyncIterator, Optional, Tuple, Union
+
+ParsedRecord = Tuple[int, Union[dict, ValueError]]
+
+# A single workout larger than this is rejected without being parsed
+MAX_RECORD_CHARS = 1024 * 1024
+
+# What ends or nests a JSON array element, and what matters inside a string
+_STRUCTURE = re.compile(r'["\[\]{},]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+IMPORT_FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return IMPORT_FORMATS.get(media_type)
+
+
+async def _decoded(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class _ElementScanner:
+    """Finds where a JSON array element ends without parsing it: at the
+    first comma or closing bracket outside any string or nesting. A closing
+    bracket that does not match also closes what it skips over, so broken
+    nesting stays within its element. A scan that runs out of text resumes
+    from its state with the next chunk."""
+
+    def __init__(self):
+        self.closers = []
+        self.in_string = False
+        self.escaped = False
+
+    def scan(self, text: str, pos: int) -> int:
+        """Index in ``text`` of the end of the element, scanning from
+        ``pos``, or -1 when the element goes on past the end of ``text``."""
+        while True:
+            if self.escaped:
+                if pos >= len(text):
+                    return -1
+                self.escaped = False
+                pos += 1
+            if self.in_string:
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    return -1
+                if match.group() == '"':
+                    self.in_string = False
+                else:
+                    self.escaped = True
+                pos = match.end()
+                continue
+            match = _STRUCTURE.search(text, pos)
+            if match is None:
+                return -1
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self.in_string = True
+            elif char == "[":
+                self.closers.append("]")
+            elif char == "{":
+                self.closers.append("}")
+            elif not self.closers:
+                if char != "}":
+                    return match.start()
+            elif char in self.closers:
+                while self.closers.pop() != char:
+                    pass
+
+
+async def parse_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    decoder = json.JSONDecoder()
+    stream = _decoded(chunks).__aiter__()
+    buffer = ""
+    pos = 0
+    started = False
+    record = 0
+
+    async def fill() -> bool:
+        nonlocal buffer, pos
+        try:
+            text = await stream.__anext__()
+        except StopAsyncIteration:
+            return False
+        buffer = buffer[pos:] + text
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            if buffer[pos] == "," and not started:
+                break
+            pos += 1
+        if pos >= len(buffer):
+            if await fill():
+                continue
+            message = "JSON array is not closed" if started else "Empty body"
+            yield record, ValueError(message)
+            return
+
+        if not started:
+            if buffer[pos] != "[":
+                yield record, ValueError("Expected a JSON array of workouts")
+                return
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            if end == len(buffer) and await fill():
+                # A number may go on in the next chunk
+                continue
+        except json.JSONDecodeError:
+            # Either cut off by the end of the buffer or malformed: find
+            # where the element ends and parse exactly that, so a malformed
+            # element is reported and skipped and the next one still parsed
+            scanner = _ElementScanner()
+            scanned = pos
+            oversized = False
+            while True:
+                end = scanner.scan(buffer, scanned)
+                if end != -1:
+                    break
+                if len(buffer) - pos > MAX_RECORD_CHARS:
+                    # Stop keeping it; only look for where it ends
+                    oversized = True
+                    pos = len(buffer)
+                scanned = len(buffer) - pos
+                if not await fill():
+                    yield record, ValueError("JSON array is not closed")
+                    return
+            if oversized:
+                value = ValueError("Workout is too large")
+            else:
+                try:
+                    value = json.loads(buffer[pos:end])
+                except json.JSONDecodeError as e:
+                    value = ValueError(f"Invalid JSON: {e.msg}")
+        pos = end
+        if isinstance(value, (dict, ValueError)):
+            yield record, value
+        else:
+            yield record, ValueError("Each workout must be a JSON object")
+        record += 1
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    buffer = ""
+    record = 0
+
+    def parse(line: str) -> Union[dict, ValueError]:
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as e:
+            return ValueError(f"Invalid JSON: {e.msg}")
+        if not isinstance(value, dict):
+            return ValueError("Each workout must be a JSON object")
+        return value
+
+    async for text in _decoded(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield record, parse(line)
+                record += 1
+    if buffer.strip():
+        yield record, parse(buffer)
+
+
+def _csv_number(value: str, cast):
+    return cast(value) if value not in ("", None) else None
+
+
+async def _csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Complete CSV records (possibly spanning lines inside quotes)."""
+    buffer = ""
+    async for text in _decoded(chunks):
+        buffer += text
+        start = 0
+        quotes = 0
+        search_from = 0
+        while True:
+            newline = buffer.find("\n", search_from)
+            if newline == -1:
+                break
+            quotes += buffer.count('"', search_from, newline)
+            search_from = newline + 1
+            if quotes % 2 == 0:
+                yield buffer[start:search_from]
+                start = search_from
+                quotes = 0
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    record = 0
+    columns = None
+    workout = None
+    workout_key = None
+    failed: Optional[ValueError] = None
+
+    async for text in _csv_records(chunks):
+        row = next(csv.reader(io.StringIO(text)), None)
+        if not row or not any(row):
+            continue
+        if columns is None:
+            columns = [c.strip() for c in row]
+            missing = {"date", "exercise_id", "exercise_name", "category"} - set(
+                columns
+            )
+            if missing:
+                yield record, ValueError(
+                    f"CSV is missing columns: {', '.join(sorted(missing))}"
+                )
+                return
+            continue
+
+        values = dict(zip(columns, row))
+        key = values.get("workout_id") or values.get("date")
+        if key != workout_key:
+            if workout_key is not None:
+                yield record, failed or workout
+                record += 1
+            workout_key = key
+            workout = {
+                "date": values.get("date"),
+                "notes": values.get("workout_notes") or None,
+                "entries": [],
+            }
+            failed = None
+
+        entries = workout["entries"]
+        if not entries or entries[-1]["exercise_id"] != values.get("exercise_id"):
+            entries.append(
+                {
+                    "exercise_id": values.get("exercise_id"),
+                    "exercise_name": values.get("exercise_name"),
+                    "category": values.get("category"),
+                    "sets": [],
+                }
+            )
+        try:
+            entries[-1]["sets"].append(
+                {
+                    "set_number": _csv_number(values.get("set_number"), int)
+                    or len(entries[-1]["sets"]) + 1,
+                    "reps": _csv_number(values.get("reps"), int),
+                    "weight": _csv_number(values.get("weight"), float),
+                    "duration_minutes": _csv_number(
+                        values.get("duration_minutes"), float
+                    ),
+                    "distance_km": _csv_number(values.get("distance_km"), float),
+                    "notes": values.get("set_notes") or None,
+                }
+            )
+        except ValueError as e:
+            failed = ValueError(f"Invalid number in CSV row: {e}")
+
+    if workout_key is not None:
+        yield record, failed or workout
+
+
+PARSERS = {
+    "json": parse_json_array,
+    "ndjson": parse_ndjson,
+    "csv": parse_csv,
+}
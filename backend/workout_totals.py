@@ -0,0 +1,172 @@
+"""Per-entry and per-workout totals, stored on the workout documents.
+
+The write paths compute these once when a workout is logged, so the
+analytics only ever add up stored numbers instead of walking every set:
+
+    entry    total_sets, total_reps, total_volume, total_calories,
+             total_duration, total_distance, max_weight
+    workout  the same fields over all its entries
+
+Entry totals are what the progress charts sum per (exercise, day): the
+volume is weight x reps of every set. The workout ``total_volume`` and
+``total_calories`` are what the dashboard reports, which only counts
+strength sets with a positive weight and reps and cardio sets with a
+positive duration, so cardio entries do not count towards the volume.
+Calories round per set, exactly like the helpers in ``calories.py`` they
+come from.
+
+``backfill_workout_totals`` adds the totals to workouts written before
+they existed; it runs on startup and can also be run by hand.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from calories import calculate_cardio_calories, calculate_strength_calories
+
+SUM_FIELDS = (
+    "total_sets",
+    "total_reps",
+    "total_volume",
+    "total_calories",
+    "total_duration",
+    "total_distance",
+)
+TOTAL_FIELDS = SUM_FIELDS + ("max_weight",)
+
+# Workouts that predate the stored totals
+MISSING_TOTALS = {"total_sets": {"$exists": False}}
+
+logger = logging.getLogger(__name__)
+
+
+def entry_totals(entry: dict) -> dict:
+    cardio = entry.get("category", "strength") == "cardio"
+    totals = dict.fromkeys(TOTAL_FIELDS, 0)
+    totals["total_volume"] = totals["total_calories"] = 0.0
+    for set_data in entry.get("sets", []):
+        weight = set_data.get("weight", 0) or 0
+        reps = set_data.get("reps", 0) or 0
+        duration = set_data.get("duration_minutes", 0) or 0
+
+        totals["total_sets"] += 1
+        totals["total_reps"] += reps
+        totals["total_volume"] += weight * reps
+        totals["total_duration"] += duration
+        totals["total_distance"] += set_data.get("distance_km", 0) or 0
+        if weight > totals["max_weight"]:
+            totals["max_weight"] = weight
+        if cardio:
+            totals["total_calories"] += calculate_cardio_calories(duration)
+        else:
+            totals["total_calories"] += calculate_strength_calories(weight, reps)
+    return totals
+
+
+def counted_totals(entry: dict) -> Tuple[float, float]:
+    """The volume and calories of ``entry`` that count towards the
+    dashboard: sets with no (or a negative) load or duration are left out."""
+    volume = calories = 0.0
+    cardio = entry.get("category", "strength") == "cardio"
+    for set_data in entry.get("sets", []):
+        if cardio:
+            duration = set_data.get("duration_minutes", 0) or 0
+            if duration > 0:
+                calories += calculate_cardio_calories(duration)
+        else:
+            weight = set_data.get("weight", 0) or 0
+            reps = set_data.get("reps", 0) or 0
+            if weight > 0 and reps > 0:
+                volume += weight * reps
+                calories += calculate_strength_calories(weight, reps)
+    return volume, calories
+
+
+def workout_totals(entries: List[dict]) -> dict:
+    """Workout totals from entries that already carry their own (and still
+    have their sets, for the dashboard volume and calories)."""
+    totals = dict.fromkeys(TOTAL_FIELDS, 0)
+    totals["total_volume"] = totals["total_calories"] = 0.0
+    for entry in entries:
+        for field in SUM_FIELDS:
+            if field not in ("total_volume", "total_calories"):
+                totals[field] += entry[field]
+        volume, calories = counted_totals(entry)
+        totals["total_volume"] += volume
+        totals["total_calories"] += calories
+        totals["max_weight"] = max(totals["max_weight"], entry["max_weight"])
+    return totals
+
+
+def add_totals(workout: dict) -> dict:
+    """Store entry and workout totals on ``workout`` (in place) and return it."""
+    entries = workout.get("entries", [])
+    for entry in entries:
+        entry.update(entry_totals(entry))
+    workout.update(workout_totals(entries))
+    return workout
+
+
+def totals_excluded() -> dict:
+    """Projection that leaves the stored totals out (exports)."""
+    return {
+        "_id": 0,
+        **{field: 0 for field in TOTAL_FIELDS},
+        **{f"entries.{field}": 0 for field in TOTAL_FIELDS},
+    }
+
+
+def without_totals(workout: dict) -> dict:
+    """A copy of ``workout`` without the stored totals, like a read with
+    ``totals_excluded``."""
+    doc = {k: v for k, v in workout.items() if k not in TOTAL_FIELDS}
+    if "entries" in doc:
+        doc["entries"] = [
+            {k: v for k, v in entry.items() if k not in TOTAL_FIELDS}
+            for entry in doc["entries"]
+        ]
+    return doc
+
+
+async def backfill_workout_totals(
+    db, query: Optional[dict] = None, batch_size: int = 500
+) -> int:
+    """Store totals on the workouts matching ``query`` (by default, the
+    ones without any). Returns the number of workouts updated."""
+    cursor = db.workouts.find(
+        MISSING_TOTALS if query is None else query, {"_id": 1, "entries": 1}
+    ).batch_size(batch_size)
+
+    updated = 0
+    batch = []
+    async for workout in cursor:
+        add_totals(workout)
+        totals = {field: workout[field] for field in TOTAL_FIELDS}
+        batch.append(
+            UpdateOne(
+                {"_id": workout["_id"]},
+                {"$set": {"entries": workout.get("entries", []), **totals}},
+            )
+        )
+        if len(batch) >= batch_size:
+            await db.workouts.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await db.workouts.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    logger.info(f"Stored totals on {updated} workouts")
+    return updated
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    from storage import open_mongo_database
+
+    db = open_mongo_database("Backfilling the workout totals")
+    # --all recomputes the totals of every workout, not just missing ones
+    asyncio.run(backfill_workout_totals(db, {} if "--all" in sys.argv else None))
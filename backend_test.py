@@ -105,18 +105,31 @@ class WorkoutTrackerAPITester:
                     search_results = response.json()
                     details += f", Search 'bench' found {len(search_results)} exercises"
                     
-                    # Verify search results contain 'bench' in name
+                    # Verify name matches rank ahead of description-only matches
                     if search_results:
-                        non_matching = [ex for ex in search_results if 'bench' not in ex.get('name', '').lower()]
-                        if non_matching:
+                        name_matches = ['bench' in ex.get('name', '').lower() for ex in search_results]
+                        if not name_matches[0] or name_matches != sorted(name_matches, reverse=True):
                             success = False
-                            details += f", {len(non_matching)} results don't match search term"
+                            details += ", Name matches are not ranked first"
                         else:
-                            details += " (✓ All search results match)"
+                            details += " (✓ Search results ranked by match quality)"
                 else:
                     success = False
                     details += f", Search failed with status {response.status_code}"
 
+                # Typo tolerant search should still find the exercise
+                response = requests.get(f"{self.api_url}/exercises?search=benchpres", timeout=10)
+                if response.status_code == 200 and response.json():
+                    top = response.json()[0].get('name', '')
+                    if top != "Bench Press":
+                        success = False
+                        details += f", Search 'benchpres' ranked '{top}' first"
+                    else:
+                        details += " (✓ Typo search found Bench Press)"
+                else:
+                    success = False
+                    details += ", Search 'benchpres' found nothing"
+
             self.log_test("Exercise Filtering", success, details)
             return success
         except Exception as e:
@@ -226,6 +239,48 @@ class WorkoutTrackerAPITester:
             self.log_test("Get Workouts", False, str(e))
             return False, []
 
+    def test_get_workout_summaries(self):
+        """Test the summary view of the workout list against full workouts"""
+        try:
+            params = {"limit": 20}
+            response = requests.get(
+                f"{self.api_url}/workouts", params={**params, "view": "summary"}, timeout=10
+            )
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+
+            if success:
+                summaries = response.json()
+                full = requests.get(f"{self.api_url}/workouts", params=params, timeout=10).json()
+                details += f", Found {len(summaries)} summaries"
+
+                if [s["id"] for s in summaries] != [w["id"] for w in full]:
+                    success = False
+                    details += ", Order differs from full view"
+                elif any("entries" in s for s in summaries):
+                    success = False
+                    details += ", Summaries include entries"
+                else:
+                    for summary, workout in zip(summaries, full):
+                        names = [e["exercise_name"] for e in workout["entries"]]
+                        total_sets = sum(len(e["sets"]) for e in workout["entries"])
+                        if summary["exercise_names"] != names or summary["total_exercises"] != len(names):
+                            success = False
+                            details += f", Exercise names differ for {workout['id']}"
+                            break
+                        if summary["total_sets"] != total_sets:
+                            success = False
+                            details += f", Set count differs for {workout['id']}"
+                            break
+                    else:
+                        details += ", Summaries match full workouts"
+
+            self.log_test("Get Workout Summaries", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Get Workout Summaries", False, str(e))
+            return False
+
     def test_get_stats(self):
         """Test getting dashboard stats"""
         try:
@@ -648,6 +703,283 @@ class WorkoutTrackerAPITester:
             self.log_test("Get Recent Workouts", False, str(e))
             return False
 
+    def test_get_dashboard(self):
+        """Test the combined dashboard endpoint against the individual ones"""
+        try:
+            today = datetime.now()
+            params = {
+                "start_date": (today - timedelta(days=30)).strftime("%Y-%m-%d"),
+                "end_date": today.strftime("%Y-%m-%d"),
+            }
+            response = requests.get(f"{self.api_url}/dashboard", params=params, timeout=10)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+
+            if success:
+                dashboard = response.json()
+                stats = requests.get(f"{self.api_url}/stats", params=params, timeout=10).json()
+                trends = requests.get(f"{self.api_url}/trends", params=params, timeout=10).json()
+                recent = requests.get(f"{self.api_url}/recent-workouts", timeout=10).json()
+
+                if dashboard.get("stats") != stats:
+                    success = False
+                    details += ", Stats differ from /stats"
+                elif dashboard.get("trends") != trends:
+                    success = False
+                    details += ", Trends differ from /trends"
+                elif [w["id"] for w in dashboard.get("recent_workouts", [])] != [w["id"] for w in recent]:
+                    success = False
+                    details += ", Recent workouts differ from /recent-workouts"
+                else:
+                    details += f", {len(dashboard['trends'])} trend days, {len(dashboard['recent_workouts'])} recent workouts"
+
+            self.log_test("Get Dashboard", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Get Dashboard", False, str(e))
+            return False
+
+    def test_stats_cache_invalidation(self):
+        """Test that cached stats are invalidated by workout writes"""
+        try:
+            before = requests.get(f"{self.api_url}/stats", timeout=10).json()
+            cached = requests.get(f"{self.api_url}/stats", timeout=10).json()
+            success = before == cached
+            details = "Repeated stats identical" if success else "Repeated stats differ"
+
+            workout = {"date": "2000-01-02", "entries": [], "notes": "Cache test"}
+            created = requests.post(f"{self.api_url}/workouts", json=workout, timeout=10).json()
+            after = requests.get(f"{self.api_url}/stats", timeout=10).json()
+            requests.delete(f"{self.api_url}/workouts/{created['id']}", timeout=10)
+
+            if after["total_workouts"] != before["total_workouts"] + 1:
+                success = False
+                details += f", Stale stats after write: {after['total_workouts']} workouts"
+            else:
+                details += ", Stats updated after write"
+
+            cache_stats = requests.get(f"{self.api_url}/cache-stats", timeout=10).json()
+            details += f", Cache hits: {cache_stats['hits']}, misses: {cache_stats['misses']}"
+
+            self.log_test("Stats Cache Invalidation", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Stats Cache Invalidation", False, str(e))
+            return False
+
+    def test_stored_workout_totals(self):
+        """Test that totals stored at write time feed the summary and stats"""
+        try:
+            workout = {
+                "date": "2000-01-03",
+                "entries": [
+                    {
+                        "exercise_id": "totals-test-strength",
+                        "exercise_name": "Bench Press",
+                        "category": "strength",
+                        "sets": [
+                            {"set_number": 1, "weight": 100, "reps": 5},
+                            {"set_number": 2, "weight": 50, "reps": 10},
+                        ],
+                    },
+                    {
+                        "exercise_id": "totals-test-cardio",
+                        "exercise_name": "Running",
+                        "category": "cardio",
+                        "sets": [{"set_number": 1, "duration_minutes": 30, "distance_km": 5}],
+                    },
+                ],
+                "notes": "Totals test",
+            }
+            # 2 x 32.5 kcal strength + 245 kcal cardio, strength volume only
+            expected = {"total_sets": 3, "total_volume": 1000.0, "total_calories": 310.0}
+            day = {"start_date": "2000-01-03", "end_date": "2000-01-03"}
+
+            created = requests.post(f"{self.api_url}/workouts", json=workout, timeout=10).json()
+            summaries = requests.get(
+                f"{self.api_url}/workouts", params={**day, "view": "summary"}, timeout=10
+            ).json()
+            stats = requests.get(f"{self.api_url}/stats", params=day, timeout=10).json()
+            requests.delete(f"{self.api_url}/workouts/{created['id']}", timeout=10)
+
+            summary = next((s for s in summaries if s["id"] == created["id"]), {})
+            success = all(summary.get(field) == value for field, value in expected.items())
+            details = f"Summary: {[summary.get(field) for field in expected]}"
+            if stats["total_sets"] < expected["total_sets"] or stats["total_calories"] < expected["total_calories"]:
+                success = False
+                details += f", Stats missing stored totals: {stats}"
+
+            self.log_test("Stored Workout Totals", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Stored Workout Totals", False, str(e))
+            return False
+
+    def test_conditional_get(self):
+        """Test ETag / If-None-Match on read endpoints"""
+        try:
+            success = True
+            details = []
+            for path in ["/exercises", "/workouts", "/stats", "/trends", "/templates"]:
+                response = requests.get(f"{self.api_url}{path}", timeout=10)
+                etag = response.headers.get("ETag")
+                if not etag:
+                    success = False
+                    details.append(f"{path}: no ETag")
+                    continue
+                revalidated = requests.get(
+                    f"{self.api_url}{path}", headers={"If-None-Match": etag}, timeout=10
+                )
+                if revalidated.status_code != 304 or revalidated.content:
+                    success = False
+                details.append(f"{path}: {revalidated.status_code}")
+
+            self.log_test("Conditional GET (ETag)", success, ", ".join(details))
+            return success
+        except Exception as e:
+            self.log_test("Conditional GET (ETag)", False, str(e))
+            return False
+
+    def test_response_compression(self):
+        """Test negotiated compression of a large JSON response"""
+        try:
+            response = requests.get(
+                f"{self.api_url}/exercises", headers={"Accept-Encoding": "gzip"}, timeout=10
+            )
+            encoding = response.headers.get("Content-Encoding")
+            success = response.status_code == 200 and encoding == "gzip"
+            details = f"Status: {response.status_code}, Content-Encoding: {encoding}"
+
+            if success:
+                plain = requests.get(
+                    f"{self.api_url}/exercises", headers={"Accept-Encoding": "identity"}, timeout=10
+                )
+                if "Content-Encoding" in plain.headers or plain.json() != response.json():
+                    success = False
+                    details += ", identity response differs"
+                else:
+                    details += f", {len(plain.content)} bytes uncompressed"
+
+            self.log_test("Response Compression", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Response Compression", False, str(e))
+            return False
+
+    def test_metrics_endpoint(self):
+        """Test the Prometheus metrics exposition"""
+        try:
+            requests.get(f"{self.api_url}/stats", timeout=10)
+            response = requests.get(f"{self.api_url}/metrics", timeout=10)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+
+            if success:
+                text = response.text
+                expected = [
+                    'http_requests_total{method="GET",route="/api/stats",status="200"}',
+                    'http_request_duration_seconds_bucket{method="GET",route="/api/stats",le="+Inf"}',
+                    "# TYPE http_requests_in_flight gauge",
+                    "response_cache_hits_total",
+                ]
+                missing = [line for line in expected if line not in text]
+                if not response.headers.get("content-type", "").startswith("text/plain"):
+                    success = False
+                    details += f", Content-Type: {response.headers.get('content-type')}"
+                elif missing:
+                    success = False
+                    details += f", Missing: {missing}"
+                else:
+                    details += ", Request, latency and cache metrics present"
+
+            self.log_test("Metrics Endpoint", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Metrics Endpoint", False, str(e))
+            return False
+
+    def test_export_workouts(self):
+        """Test streaming NDJSON and CSV exports"""
+        try:
+            response = requests.get(f"{self.api_url}/export/workouts.ndjson", timeout=30)
+            success = response.status_code == 200
+            details = f"NDJSON status: {response.status_code}"
+
+            if success:
+                lines = [json.loads(line) for line in response.text.splitlines() if line]
+                details += f", {len(lines)} workouts"
+                if lines and not all('id' in w and 'entries' in w for w in lines):
+                    success = False
+                    details += " (✗ Malformed workout lines)"
+
+            response = requests.get(f"{self.api_url}/export/workouts.csv", timeout=30)
+            details += f", CSV status: {response.status_code}"
+            if response.status_code == 200:
+                header = response.text.splitlines()[0].split(',')
+                if header[:2] != ['workout_id', 'date'] or 'set_number' not in header:
+                    success = False
+                    details += f" (✗ Unexpected CSV header {header})"
+                else:
+                    details += f", {len(response.text.splitlines()) - 1} set rows"
+            else:
+                success = False
+
+            self.log_test("Export Workouts", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Export Workouts", False, str(e))
+            return False
+
+    def test_import_workouts(self):
+        """Test bulk import with per-record error reporting"""
+        try:
+            workouts = [
+                {
+                    "date": "2000-01-01",
+                    "notes": "Bulk import test",
+                    "entries": [{
+                        "exercise_id": "import-test",
+                        "exercise_name": "Import Test",
+                        "category": "strength",
+                        "sets": [{"set_number": 1, "reps": 5, "weight": 100.0}]
+                    }]
+                },
+                {"date": "2000-01-01"}
+            ]
+            body = "\n".join(json.dumps(w) for w in workouts)
+            response = requests.post(
+                f"{self.api_url}/workouts/import",
+                data=body,
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=30
+            )
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+
+            if success:
+                result = response.json()
+                details += f", Imported {result['imported']}, failed {result['failed']}"
+                if result['imported'] != 1 or result['failed'] != 1 or result['errors'][0]['record'] != 1:
+                    success = False
+                    details += " (✗ Expected 1 imported and record 1 reported as failed)"
+                else:
+                    details += " (✓ Per-record errors reported)"
+
+            # Clean up the imported workout
+            imported = requests.get(
+                f"{self.api_url}/workouts?start_date=2000-01-01&end_date=2000-01-01", timeout=10
+            )
+            if imported.status_code == 200:
+                for workout in imported.json():
+                    if workout.get('notes') == "Bulk import test":
+                        requests.delete(f"{self.api_url}/workouts/{workout['id']}", timeout=10)
+
+            self.log_test("Import Workouts", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Import Workouts", False, str(e))
+            return False
+
     def test_get_progress(self, exercise_id=None):
         """Test getting progress data"""
         try:
@@ -949,6 +1281,9 @@ class WorkoutTrackerAPITester:
         # Test 5: Get workouts
         self.test_get_workouts()
 
+        # Test 5a: Summary view of the workout list
+        self.test_get_workout_summaries()
+
         # Test 6: Get stats
         self.test_get_stats()
 
@@ -961,9 +1296,33 @@ class WorkoutTrackerAPITester:
         # Test 7: Get recent workouts
         self.test_get_recent_workouts()
 
+        # Test 7a: Combined dashboard endpoint
+        self.test_get_dashboard()
+
+        # Test 7b: Cached stats are invalidated by writes
+        self.test_stats_cache_invalidation()
+
+        # Test 7c: ETag / If-None-Match
+        self.test_conditional_get()
+
+        # Test 7d: Response compression
+        self.test_response_compression()
+
+        # Test 7e: Totals stored at write time
+        self.test_stored_workout_totals()
+
+        # Test 7f: Prometheus metrics
+        self.test_metrics_endpoint()
+
         # Test 8: Get progress
         self.test_get_progress()
 
+        # Test 8a: Export workouts
+        self.test_export_workouts()
+
+        # Test 8b: Bulk import workouts
+        self.test_import_workouts()
+
         # Test 9: Template CRUD operations
         print("\n🗂️ Testing Template Features...")
         
@@ -98,14 +98,10 @@ export default function Dashboard() {
       if (start) params.append("start_date", start);
       if (end) params.append("end_date", end);
 
-      const [statsRes, trendsRes, workoutsRes] = await Promise.all([
-        axios.get(`${API}/stats?${params.toString()}`),
-        axios.get(`${API}/trends?${params.toString()}`),
-        axios.get(`${API}/recent-workouts`)
-      ]);
-      setStats(statsRes.data);
-      setTrends(trendsRes.data);
-      setRecentWorkouts(workoutsRes.data);
+      const response = await axios.get(`${API}/dashboard?${params.toString()}`);
+      setStats(response.data.stats);
+      setTrends(response.data.trends);
+      setRecentWorkouts(response.data.recent_workouts);
     } catch (error) {
       console.error("Error fetching dashboard data:", error);
     } finally {
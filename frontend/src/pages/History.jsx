@@ -34,17 +34,24 @@ export default function History() {
   const [loading, setLoading] = useState(true);
   const [selectedDate, setSelectedDate] = useState(null);
   const [expandedWorkout, setExpandedWorkout] = useState(null);
+  // Full workouts (with sets) by id, fetched when a card is first expanded
+  const [details, setDetails] = useState({});
   const [deleteWorkout, setDeleteWorkout] = useState(null);
   const [deleting, setDeleting] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchWorkouts();
   }, []);
 
-  const fetchWorkouts = async () => {
+  const fetchWorkouts = async (cursor = null) => {
     try {
-      const res = await axios.get(`${API}/workouts?limit=100`);
-      setWorkouts(res.data);
+      const params = new URLSearchParams({ limit: "50", view: "summary" });
+      if (cursor) params.append("cursor", cursor);
+      const res = await axios.get(`${API}/workouts?${params.toString()}`);
+      setWorkouts(prev => cursor ? [...prev, ...res.data] : res.data);
+      setNextCursor(res.headers["x-next-cursor"] || null);
     } catch (error) {
       console.error("Error fetching workouts:", error);
       toast.error("Failed to load workouts");
@@ -53,6 +60,29 @@ export default function History() {
     }
   };
 
+  const toggleWorkout = async (workoutId) => {
+    if (expandedWorkout === workoutId) {
+      setExpandedWorkout(null);
+      return;
+    }
+    setExpandedWorkout(workoutId);
+    if (details[workoutId]) return;
+    try {
+      const res = await axios.get(`${API}/workouts/${workoutId}`);
+      setDetails(prev => ({ ...prev, [workoutId]: res.data }));
+    } catch (error) {
+      console.error("Error fetching workout:", error);
+      toast.error("Failed to load workout");
+      setExpandedWorkout(null);
+    }
+  };
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchWorkouts(nextCursor);
+    setLoadingMore(false);
+  };
+
   const handleDelete = async () => {
     if (!deleteWorkout) return;
     
@@ -76,30 +106,6 @@ export default function History() {
     ? workouts.filter(w => w.date?.startsWith(format(selectedDate, "yyyy-MM-dd")))
     : workouts;
 
-  const calculateWorkoutStats = (workout) => {
-    let totalSets = 0;
-    let totalVolume = 0;
-    let totalDuration = 0;
-    let totalDistance = 0;
-
-    workout.entries?.forEach(entry => {
-      entry.sets?.forEach(set => {
-        totalSets++;
-        if (set.weight && set.reps) {
-          totalVolume += set.weight * set.reps;
-        }
-        if (set.duration_minutes) {
-          totalDuration += set.duration_minutes;
-        }
-        if (set.distance_km) {
-          totalDistance += set.distance_km;
-        }
-      });
-    });
-
-    return { totalSets, totalVolume, totalDuration, totalDistance };
-  };
-
   if (loading) {
     return (
       <div className="flex items-center justify-center min-h-[60vh]">
@@ -117,7 +123,7 @@ export default function History() {
             WORKOUT HISTORY
           </h1>
           <p className="text-muted-foreground mt-2">
-            {workouts.length} workouts logged
+            {workouts.length}{nextCursor ? "+" : ""} workouts logged
           </p>
         </div>
 
@@ -186,8 +192,8 @@ export default function History() {
       ) : (
         <div className="space-y-4">
           {filteredWorkouts.map((workout, index) => {
-            const stats = calculateWorkoutStats(workout);
             const isExpanded = expandedWorkout === workout.id;
+            const detail = details[workout.id];
             
             return (
               <Card 
@@ -197,7 +203,7 @@ export default function History() {
               >
                 <CardHeader 
                   className="cursor-pointer"
-                  onClick={() => setExpandedWorkout(isExpanded ? null : workout.id)}
+                  onClick={() => toggleWorkout(workout.id)}
                 >
                   <div className="flex items-center justify-between">
                     <div className="flex items-center gap-4">
@@ -209,10 +215,13 @@ export default function History() {
                           {format(parseISO(workout.date), "EEEE, MMMM d, yyyy")}
                         </CardTitle>
                         <div className="flex items-center gap-4 mt-1 text-sm text-muted-foreground">
-                          <span>{workout.entries?.length || 0} exercises</span>
-                          <span>{stats.totalSets} sets</span>
-                          {stats.totalVolume > 0 && (
-                            <span>{stats.totalVolume.toLocaleString()} kg volume</span>
+                          <span>{workout.total_exercises} exercises</span>
+                          <span>{workout.total_sets} sets</span>
+                          {workout.total_volume > 0 && (
+                            <span>{workout.total_volume.toLocaleString()} kg volume</span>
+                          )}
+                          {workout.total_calories > 0 && (
+                            <span>{Math.round(workout.total_calories)} kcal</span>
                           )}
                         </div>
                       </div>
@@ -241,8 +250,13 @@ export default function History() {
 
                 {isExpanded && (
                   <CardContent className="border-t border-border/40">
+                    {!detail ? (
+                      <div className="flex justify-center py-6">
+                        <div className="w-6 h-6 border-2 border-primary border-t-transparent rounded-full animate-spin" />
+                      </div>
+                    ) : (
                     <div className="space-y-4 pt-4">
-                      {workout.entries?.map((entry, entryIndex) => (
+                      {detail.entries?.map((entry, entryIndex) => (
                         <div 
                           key={entryIndex}
                           className="workout-entry"
@@ -300,15 +314,16 @@ export default function History() {
                         </div>
                       ))}
 
-                      {workout.notes && (
+                      {detail.notes && (
                         <div className="pt-4 border-t border-border/40">
                           <p className="text-xs uppercase tracking-widest text-muted-foreground mb-2">
                             Notes
                           </p>
-                          <p className="text-sm">{workout.notes}</p>
+                          <p className="text-sm">{detail.notes}</p>
                         </div>
                       )}
                     </div>
+                    )}
                   </CardContent>
                 )}
               </Card>
@@ -317,6 +332,19 @@ export default function History() {
         </div>
       )}
 
+      {nextCursor && (
+        <div className="flex justify-center">
+          <Button
+            variant="outline"
+            onClick={loadMore}
+            disabled={loadingMore}
+            data-testid="load-more-btn"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
+
       {/* Delete Confirmation */}
       <AlertDialog open={!!deleteWorkout} onOpenChange={() => setDeleteWorkout(null)}>
         <AlertDialogContent className="bg-card border-border">
@@ -0,0 +1,66 @@
+"""Offline test setup: the backend modules, the app on an in-process
+storage backend, and a repository fixture for every offline backend.
+
+The app picks its backend on import from ``STORAGE_BACKEND``, memory
+unless set otherwise, so ``STORAGE_BACKEND=sqlite pytest tests`` runs the
+HTTP tests against SQLite. Repository tests run on both regardless.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "workout_test")
+os.environ.setdefault(
+    "SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "workouts.sqlite3")
+)
+
+OFFLINE_BACKENDS = ("memory", "sqlite")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(params=OFFLINE_BACKENDS)
+async def storage(request, tmp_path):
+    """An empty storage backend, memory or SQLite."""
+    if request.param == "memory":
+        from storage.memory import MemoryStorage
+
+        store = MemoryStorage()
+    else:
+        from storage.sqlite import SqliteStorage
+
+        store = SqliteStorage(str(tmp_path / "workouts.sqlite3"))
+    await store.prepare()
+    yield store
+    store.close()
+
+
+@pytest.fixture
+async def client():
+    """An HTTP client for the app, on emptied storage with the seeded
+    exercise catalog."""
+    import httpx
+
+    import server
+
+    await server.storage.clear()
+    await server.prepare_database(server.storage)
+    server.response_cache.clear()
+    await server.exercise_catalog.load(
+        server.storage.exercises, await server.data_versions.get(["exercises"])
+    )
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
@@ -0,0 +1,171 @@
+"""Columnar analytics (``analytics.py``), checked against the storage
+backends' own analytics and the reference loops of ``test_storage``."""
+
+import numpy as np
+import pytest
+
+from analytics import ColumnarAnalytics, cardio_calories, strength_calories
+from calories import calculate_cardio_calories, calculate_strength_calories
+from tests.test_api import first_exercise, log_workout, today
+from tests.test_storage import (  # noqa: F401 (fixture)
+    assert_close,
+    entry,
+    history,
+    in_range,
+    load,
+    reference_progress,
+    reference_totals,
+    reference_trends,
+    workout,
+)
+
+pytestmark = pytest.mark.anyio
+
+WINDOWS = [
+    (None, None),
+    ("2026-01-01", None),
+    (None, "2026-03-10"),
+    ("2026-02-01", "2026-03-10T23:59:59"),
+    ("2030-01-01", None),
+]
+
+
+async def loaded(storage, version=1) -> ColumnarAnalytics:
+    analytics = ColumnarAnalytics()
+    await analytics.ensure_loaded(storage.workouts, version)
+    return analytics
+
+
+def test_calorie_arrays_match_the_helpers():
+    weight = np.array([0, 2.5, 10, 17.5, 60, 102.5, -20])
+    reps = np.array([5, 3, 1, 7, 8, 12, 5])
+    duration = np.array([0, 0.5, 3, 10, 33.3, 45, -5])
+
+    # Python floats: ``round`` rounds NumPy scalars the NumPy way
+    assert strength_calories(weight, reps).tolist() == [
+        calculate_strength_calories(w, r)
+        for w, r in zip(weight.tolist(), reps.tolist())
+    ]
+    assert cardio_calories(duration).tolist() == [
+        calculate_cardio_calories(d) for d in duration.tolist()
+    ]
+
+
+@pytest.mark.parametrize("start_date, end_date", WINDOWS)
+async def test_totals_match_storage(storage, history, start_date, end_date):
+    workouts = await load(storage, history)
+    analytics = await loaded(storage)
+
+    totals = await analytics.totals(start_date, end_date)
+
+    assert_close(totals, await storage.workouts.totals(start_date, end_date))
+    expected = in_range(workouts, start_date, end_date)
+    if expected:
+        assert_close(totals, reference_totals(expected))
+    else:
+        assert totals == {}
+
+
+async def test_daily_totals_match_storage(storage, history):
+    workouts = await load(storage, history)
+    analytics = await loaded(storage)
+
+    for start_date, end_date in [("2025-01-01", "2026-12-31"), ("2026-03-10", "")]:
+        trends = await analytics.daily_totals(start_date, end_date)
+        assert trends == await storage.workouts.daily_totals(start_date, end_date)
+    assert await analytics.daily_totals("2025-01-01", "2026-12-31") == (
+        reference_trends(workouts, "2025-01-01", "2026-12-31")
+    )
+
+
+async def test_exercise_progress_matches_storage(storage, history):
+    workouts = await load(storage, history)
+    analytics = await loaded(storage)
+    exercise_ids = {e["exercise_id"] for w in workouts for e in w["entries"]}
+
+    for exercise_id in sorted(exercise_ids) + ["missing"]:
+        progress = await analytics.exercise_progress(exercise_id, "2026-01-01")
+        expected = await storage.workouts.exercise_progress(exercise_id, "2026-01-01")
+        assert [p["date"] for p in progress] == [p["date"] for p in expected]
+        for actual, stored, reference in zip(
+            progress,
+            expected,
+            reference_progress(workouts, exercise_id, "2026-01-01"),
+        ):
+            assert_close(actual, stored)
+            assert_close(actual, reference)
+
+
+async def test_entries_without_sets_or_exercise(storage):
+    await storage.workouts.add(
+        workout(
+            "w1",
+            "2026-03-01",
+            [
+                entry("squat", "strength", []),
+                entry("bike", "cardio", [{"duration_minutes": 20}]),
+            ],
+        )
+    )
+    await storage.workouts.add(
+        workout(
+            "w2", "2026-03-02", [{**entry("x", "strength", []), "exercise_id": None}]
+        )
+    )
+    analytics = await loaded(storage)
+
+    assert await analytics.exercise_progress("squat", "2026-01-01") == (
+        await storage.workouts.exercise_progress("squat", "2026-01-01")
+    )
+    assert_close(
+        await analytics.totals(None, None), await storage.workouts.totals(None, None)
+    )
+    assert await analytics.exercise_progress("None", "2026-01-01") == []
+
+
+async def test_reloads_when_the_version_changes(storage, history):
+    _, workouts = history
+    await storage.workouts.add_many(workouts[:-1])
+    analytics = await loaded(storage, version=1)
+
+    await storage.workouts.add(workouts[-1])
+    # Same version: the columns as loaded
+    await analytics.ensure_loaded(storage.workouts, 1)
+    assert (await analytics.totals(None, None))["workouts"] == len(workouts) - 1
+
+    await analytics.ensure_loaded(storage.workouts, 2)
+    assert (await analytics.totals(None, None))["workouts"] == len(workouts)
+
+
+async def test_empty_history(storage):
+    analytics = await loaded(storage)
+
+    assert await analytics.totals(None, None) == {}
+    assert await analytics.daily_totals("2026-01-01", "2026-12-31") == []
+    assert await analytics.exercise_progress("squat", "2026-01-01") == []
+
+
+async def test_api_answers_from_the_columns(client, monkeypatch):
+    import server
+
+    await log_workout(client, today(), weight=100, minutes=30)
+    await log_workout(client, today(1), weight=60, minutes=0)
+    await log_workout(client, today(1), weight=-10, minutes=-5)
+    squat = await first_exercise(client, "strength")
+    paths = [
+        "/api/stats",
+        f"/api/stats?start_date={today(1)}",
+        "/api/trends?days=7",
+        f"/api/progress/{squat['id']}",
+        "/api/dashboard?days=7",
+    ]
+    expected = [(await client.get(path)).json() for path in paths]
+
+    monkeypatch.setattr(server, "columnar_analytics", ColumnarAnalytics())
+    server.response_cache.clear()
+    assert [(await client.get(path)).json() for path in paths] == expected
+
+    # A write is seen on the next read
+    await log_workout(client, today())
+    stats = (await client.get("/api/stats")).json()
+    assert stats["total_workouts"] == 4
@@ -0,0 +1,164 @@
+"""The API end to end on the app's in-process storage backend (memory, or
+``STORAGE_BACKEND=sqlite``), without a server or database."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def today(days_ago: int = 0) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).date().isoformat()
+
+
+async def first_exercise(client, category: str) -> dict:
+    exercises = (await client.get("/api/exercises")).json()
+    return next(ex for ex in exercises if ex["category"] == category)
+
+
+async def log_workout(client, day: str, weight: float = 100, minutes: float = 30):
+    squat = await first_exercise(client, "strength")
+    run = await first_exercise(client, "cardio")
+    response = await client.post(
+        "/api/workouts",
+        json={
+            "date": day,
+            "entries": [
+                {
+                    "exercise_id": squat["id"],
+                    "exercise_name": squat["name"],
+                    "category": "strength",
+                    "sets": [
+                        {"set_number": 1, "reps": 5, "weight": weight},
+                        {"set_number": 2, "reps": 5, "weight": weight},
+                    ],
+                },
+                {
+                    "exercise_id": run["id"],
+                    "exercise_name": run["name"],
+                    "category": "cardio",
+                    "sets": [{"set_number": 1, "duration_minutes": minutes}],
+                },
+            ],
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_exercise_catalog(client):
+    exercises = (await client.get("/api/exercises")).json()
+    assert len(exercises) >= 100
+
+    created = await client.post(
+        "/api/exercises",
+        json={"name": "Zercher Squat", "category": "strength", "muscle_group": "legs"},
+    )
+    assert created.status_code == 200
+    exercise_id = created.json()["id"]
+
+    fetched = await client.get(f"/api/exercises/{exercise_id}")
+    assert fetched.json()["name"] == "Zercher Squat"
+    search = (await client.get("/api/exercises", params={"search": "zerch"})).json()
+    assert [ex["id"] for ex in search][:1] == [exercise_id]
+    assert (await client.get("/api/exercises/missing")).status_code == 404
+
+
+async def test_short_search_finds_in_word_matches(client):
+    exercises = (await client.get("/api/exercises")).json()
+
+    search = (await client.get("/api/exercises", params={"search": "ow"})).json()
+
+    names = {ex["name"] for ex in exercises if "ow" in ex["name"].lower()}
+    assert {ex["name"] for ex in search} >= names
+    assert "Barbell Row" in names
+
+
+async def test_workout_crud(client):
+    logged = await log_workout(client, today())
+
+    fetched = await client.get(f"/api/workouts/{logged['id']}")
+    assert fetched.status_code == 200
+    assert fetched.json()["entries"] == logged["entries"]
+
+    assert (await client.delete(f"/api/workouts/{logged['id']}")).status_code == 200
+    assert (await client.get(f"/api/workouts/{logged['id']}")).status_code == 404
+    assert (await client.delete(f"/api/workouts/{logged['id']}")).status_code == 404
+
+
+async def test_stats_and_trends(client):
+    await log_workout(client, today(), weight=100, minutes=30)
+    await log_workout(client, today(1), weight=60, minutes=0)
+    await log_workout(client, today(1), weight=-10, minutes=-5)
+
+    stats = (await client.get("/api/stats")).json()
+    # Only positive sets count: 2 x 5 x 100 and 2 x 5 x 60 kg, one run
+    assert stats["total_workouts"] == 3
+    assert stats["total_exercises_logged"] == 6
+    assert stats["total_sets"] == 9
+    assert stats["total_volume"] == 1600
+    assert stats["total_calories"] == pytest.approx(2 * 32.5 + 2 * 19.5 + 245.0)
+    assert stats["current_streak"] == 2
+
+    trends = (await client.get("/api/trends", params={"days": 7})).json()
+    assert [t["date"] for t in trends] == [today(1), today()]
+    assert [t["workouts"] for t in trends] == [2, 1]
+    assert [t["volume"] for t in trends] == [600, 1000]
+
+    dashboard = (await client.get("/api/dashboard", params={"days": 7})).json()
+    assert dashboard["stats"] == stats
+    assert dashboard["trends"] == trends
+    assert len(dashboard["recent_workouts"]) == 3
+
+
+async def test_progress(client):
+    await log_workout(client, today(), weight=100)
+    await log_workout(client, today(), weight=110)
+    squat = await first_exercise(client, "strength")
+
+    progress = (await client.get(f"/api/progress/{squat['id']}")).json()
+
+    assert len(progress) == 1
+    assert progress[0]["max_weight"] == 110
+    assert progress[0]["total_volume"] == 2100
+    assert progress[0]["total_reps"] == 20
+
+
+async def test_etag_revalidation(client):
+    first = await client.get("/api/stats")
+    etag = first.headers["etag"]
+
+    cached = await client.get("/api/stats", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    await log_workout(client, today())
+    changed = await client.get("/api/stats", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["total_workouts"] == 1
+
+
+async def test_templates(client):
+    squat = await first_exercise(client, "strength")
+    created = await client.post(
+        "/api/templates",
+        json={
+            "name": "Legs",
+            "exercises": [
+                {
+                    "exercise_id": squat["id"],
+                    "exercise_name": squat["name"],
+                    "category": "strength",
+                }
+            ],
+        },
+    )
+    template_id = created.json()["id"]
+
+    updated = await client.put(f"/api/templates/{template_id}", json={"name": "Legs A"})
+    assert updated.json()["name"] == "Legs A"
+    templates = (await client.get("/api/templates")).json()
+    assert [t["name"] for t in templates] == ["Legs A"]
+
+    assert (await client.delete(f"/api/templates/{template_id}")).status_code == 200
+    assert (await client.get(f"/api/templates/{template_id}")).status_code == 404
@@ -0,0 +1,64 @@
+"""Response compression and its ETag handling (``compression.py``)."""
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from compression import CompressionMiddleware
+
+pytestmark = pytest.mark.anyio
+
+ETAG = '"v1"'
+
+
+async def document(request: Request) -> Response:
+    if request.headers.get("if-none-match") in (ETAG, "W/" + ETAG):
+        return Response(status_code=304, headers={"ETag": ETAG})
+    size = int(request.query_params["size"])
+    return Response(b"x" * size, media_type="application/json", headers={"ETag": ETAG})
+
+
+@pytest.fixture
+async def client():
+    app = Starlette(routes=[Route("/doc", document)])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test",
+        headers={"Accept-Encoding": "gzip"},
+    ) as c:
+        yield c
+
+
+@pytest.mark.parametrize("size", [10, 5000])
+async def test_304_repeats_the_headers_of_the_200(client, size):
+    full = await client.get("/doc", params={"size": size})
+    assert full.content == b"x" * size
+    compressed = size >= 1024
+    assert ("content-encoding" in full.headers) == compressed
+
+    revalidated = await client.get(
+        "/doc", params={"size": size}, headers={"If-None-Match": full.headers["etag"]}
+    )
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == full.headers["etag"] == "W/" + ETAG
+    assert revalidated.headers["vary"] == full.headers["vary"] == "Accept-Encoding"
+
+
+async def test_without_compression_etags_stay_strong(client):
+    full = await client.get(
+        "/doc", params={"size": 5000}, headers={"Accept-Encoding": "identity"}
+    )
+    revalidated = await client.get(
+        "/doc",
+        params={"size": 5000},
+        headers={"Accept-Encoding": "identity", "If-None-Match": ETAG},
+    )
+
+    assert full.headers["etag"] == revalidated.headers["etag"] == ETAG
+    assert "vary" not in full.headers
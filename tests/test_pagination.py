@@ -0,0 +1,159 @@
+"""Keyset pagination of the workout history (``pagination.py``)."""
+
+import base64
+import random
+import uuid
+
+import pytest
+
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from workout_totals import add_totals
+
+pytestmark = pytest.mark.anyio
+
+
+def history(days: int = 20, per_day: int = 3, seed: int = 0) -> list:
+    """Several workouts on every day, so pages split same-date ties."""
+    rng = random.Random(seed)
+    workouts = []
+    for day in range(1, days + 1):
+        for _ in range(per_day):
+            workouts.append(
+                add_totals(
+                    {
+                        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                        "date": f"2026-01-{day:02d}",
+                        "entries": [],
+                        "notes": None,
+                        "created_at": f"2026-01-{day:02d}T08:00:00+00:00",
+                    }
+                )
+            )
+    rng.shuffle(workouts)
+    return workouts
+
+
+def newest_first(workouts: list) -> list:
+    return [
+        w["id"]
+        for w in sorted(workouts, key=lambda w: (w["date"], w["id"]), reverse=True)
+    ]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"date": "2026-01-31T18:00:00", "id": "abc"})
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2026-01-31T18:00:00", "abc")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor!",
+        "e30",  # {}
+        base64.urlsafe_b64encode(b'["2026-01-01"]').decode(),
+        base64.urlsafe_b64encode(b'[20260101, "abc"]').decode(),
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    ],
+)
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 60, 100])
+async def test_pages_cover_history_once(storage, limit):
+    workouts = history()
+    await storage.workouts.add_many(workouts)
+
+    seen, after = [], None
+    while True:
+        page = await storage.workouts.page(None, None, after, limit)
+        seen += [w["id"] for w in page]
+        if len(page) < limit:
+            break
+        after = (page[-1]["date"], page[-1]["id"])
+
+    assert seen == newest_first(workouts)
+
+
+async def test_page_ties_and_range(storage):
+    workouts = history()
+    await storage.workouts.add_many(workouts)
+    same_day = newest_first([w for w in workouts if w["date"] == "2026-01-10"])
+
+    # A cursor in the middle of a day continues with its smaller ids
+    page = await storage.workouts.page(
+        "2026-01-05", "2026-01-10", ("2026-01-10", same_day[0]), 3
+    )
+
+    assert [w["id"] for w in page[:2]] == same_day[1:]
+    assert page[2]["date"] == "2026-01-09"
+    # Paging stops at the start of the range: nothing after its last workout
+    first_day = newest_first([w for w in workouts if w["date"] == "2026-01-05"])
+    last = await storage.workouts.page(
+        "2026-01-05", "2026-01-10", ("2026-01-05", first_day[0]), 10
+    )
+    assert [w["id"] for w in last] == first_day[1:]
+    after_last = ("2026-01-05", first_day[-1])
+    assert await storage.workouts.page("2026-01-05", "2026-01-10", after_last, 10) == []
+
+
+async def test_summary_pages(storage):
+    workouts = history(days=3)
+    await storage.workouts.add_many(workouts)
+
+    page = await storage.workouts.page(None, None, None, 50, summary=True)
+
+    assert [w["id"] for w in page] == newest_first(workouts)
+
+
+async def load_app_history(workouts):
+    import server
+
+    await server.storage.workouts.add_many(workouts)
+    await server.data_versions.bump("workouts")
+
+
+@pytest.mark.parametrize("view", ["full", "summary"])
+async def test_api_follows_next_cursor(client, view):
+    workouts = history()
+    await load_app_history(workouts)
+
+    seen, pages, params = [], 0, {"limit": 7, "view": view}
+    while True:
+        response = await client.get("/api/workouts", params=params)
+        assert response.status_code == 200
+        pages += 1
+        seen += [w["id"] for w in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+        params["cursor"] = cursor
+
+    assert seen == newest_first(workouts)
+    assert pages == 9  # 60 workouts, 7 a page
+
+
+async def test_api_exact_last_page_has_no_cursor(client):
+    workouts = history(days=2)
+    await load_app_history(workouts)
+
+    response = await client.get("/api/workouts", params={"limit": 6})
+
+    assert len(response.json()) == 6
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+async def test_api_rejects_malformed_cursor(client):
+    response = await client.get("/api/workouts", params={"cursor": "not a cursor!"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+async def test_api_limit_bound(client):
+    response = await client.get("/api/workouts", params={"limit": 101})
+
+    assert response.status_code == 422
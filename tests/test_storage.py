@@ -0,0 +1,389 @@
+"""Backend contract of ``storage.base``, checked on every offline backend.
+
+Analytics are compared with reference loops over the raw sets, written
+the way the API computed them before the stored totals and views
+existed, so every backend must reproduce those numbers.
+"""
+
+import random
+from collections import defaultdict
+from datetime import date
+
+import pytest
+
+from benchmarks.history import generate_exercises, generate_workouts
+from calories import calculate_cardio_calories, calculate_strength_calories
+from streaks import streaks_doc
+from workout_totals import TOTAL_FIELDS, add_totals
+
+pytestmark = pytest.mark.anyio
+
+END = date(2026, 3, 31)
+
+
+def workout(workout_id, day, entries, notes=None):
+    return add_totals(
+        {
+            "id": workout_id,
+            "date": day,
+            "entries": entries,
+            "notes": notes,
+            "created_at": f"{day[:10]}T12:00:00+00:00",
+        }
+    )
+
+
+def entry(exercise_id, category, sets):
+    return {
+        "exercise_id": exercise_id,
+        "exercise_name": exercise_id.title(),
+        "category": category,
+        "sets": [{"set_number": i + 1, **s} for i, s in enumerate(sets)],
+    }
+
+
+def edge_workouts():
+    """Workouts the generated history never produces: non-positive and
+    missing set values, and a date with a time of day."""
+    return [
+        workout(
+            "edge-1",
+            "2026-03-10",
+            [
+                entry("squat", "strength", [{"weight": 0, "reps": 5}]),
+                entry("squat", "strength", [{"weight": -20, "reps": 5}]),
+                entry("row", "strength", [{"weight": 50, "reps": None}]),
+                entry("bike", "cardio", [{"duration_minutes": 0}]),
+                entry("bike", "cardio", [{"duration_minutes": -5, "weight": 10}]),
+            ],
+        ),
+        workout(
+            "edge-2",
+            "2026-03-10T18:30:00",
+            [entry("squat", "strength", [{"weight": 100, "reps": 5}])],
+        ),
+    ]
+
+
+@pytest.fixture
+def history():
+    exercises = generate_exercises()
+    workouts = list(generate_workouts(exercises, 1500, end_date=END))
+    return exercises, workouts + edge_workouts()
+
+
+async def load(storage, history):
+    exercises, workouts = history
+    await storage.exercises.add_many(exercises)
+    assert await storage.workouts.add_many(workouts) == {}
+    return workouts
+
+
+def in_range(workouts, start_date=None, end_date=None):
+    return [
+        w
+        for w in workouts
+        if (not start_date or w["date"] >= start_date)
+        and (not end_date or w["date"] <= end_date)
+    ]
+
+
+def reference_totals(workouts):
+    totals = {"workouts": 0, "exercises": 0, "sets": 0, "volume": 0.0}
+    totals["calories"] = 0.0
+    for w in workouts:
+        totals["workouts"] += 1
+        for e in w["entries"]:
+            totals["exercises"] += 1
+            for s in e["sets"]:
+                totals["sets"] += 1
+                if e["category"] == "cardio":
+                    duration = s.get("duration_minutes", 0) or 0
+                    if duration > 0:
+                        totals["calories"] += calculate_cardio_calories(duration)
+                else:
+                    weight = s.get("weight", 0) or 0
+                    reps = s.get("reps", 0) or 0
+                    if weight > 0 and reps > 0:
+                        totals["volume"] += weight * reps
+                        totals["calories"] += calculate_strength_calories(weight, reps)
+    return totals
+
+
+def reference_trends(workouts, start_date, end_date):
+    by_day = defaultdict(list)
+    for w in workouts:
+        if start_date <= w["date"][:10] <= end_date:
+            by_day[w["date"][:10]].append(w)
+    trends = []
+    for day in sorted(by_day):
+        totals = reference_totals(by_day[day])
+        trends.append(
+            {
+                "date": day,
+                "workouts": totals["workouts"],
+                "sets": totals["sets"],
+                "volume": round(totals["volume"], 1),
+                "calories": round(totals["calories"], 1),
+            }
+        )
+    return trends
+
+
+def reference_progress(workouts, exercise_id, start_date):
+    by_day = {}
+    for w in workouts:
+        day = w["date"][:10]
+        if day < start_date:
+            continue
+        for e in w["entries"]:
+            if e["exercise_id"] != exercise_id:
+                continue
+            progress = by_day.setdefault(
+                day,
+                {
+                    "date": day,
+                    "max_weight": 0,
+                    "total_volume": 0,
+                    "total_reps": 0,
+                    "duration": 0,
+                    "distance": 0,
+                    "calories": 0,
+                },
+            )
+            for s in e["sets"]:
+                weight = s.get("weight", 0) or 0
+                reps = s.get("reps", 0) or 0
+                duration = s.get("duration_minutes", 0) or 0
+                progress["max_weight"] = max(progress["max_weight"], weight)
+                progress["total_volume"] += weight * reps
+                progress["total_reps"] += reps
+                progress["duration"] += duration
+                progress["distance"] += s.get("distance_km", 0) or 0
+                if e["category"] == "cardio":
+                    progress["calories"] += calculate_cardio_calories(duration)
+                else:
+                    progress["calories"] += calculate_strength_calories(weight, reps)
+    return [by_day[day] for day in sorted(by_day)]
+
+
+def assert_close(actual: dict, expected: dict):
+    assert set(actual) >= set(expected)
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value), key
+
+
+async def test_exercises(storage):
+    exercises = generate_exercises()
+    await storage.exercises.add_many(exercises[:3])
+    await storage.exercises.add(exercises[3])
+
+    assert await storage.exercises.count() == 4
+    assert await storage.exercises.list() == exercises[:4]
+
+
+async def test_workout_crud(storage):
+    first, second = edge_workouts()
+    await storage.workouts.add(first)
+
+    assert await storage.workouts.get("edge-1") == first
+    assert await storage.workouts.get("missing") is None
+    assert await storage.workouts.delete("missing") is None
+
+    assert await storage.workouts.delete("edge-1") == first
+    assert await storage.workouts.get("edge-1") is None
+    assert await storage.workouts.totals(None, None) == {}
+    assert await storage.workouts.add_many([second]) == {}
+
+
+async def test_add_many_reports_duplicates(storage):
+    first, second = edge_workouts()
+    await storage.workouts.add(first)
+
+    failed = await storage.workouts.add_many([second, first])
+
+    assert list(failed) == [1]
+    assert await storage.workouts.get("edge-2") == second
+    totals = await storage.workouts.totals(None, None)
+    assert totals["workouts"] == 2
+
+
+async def test_recent_and_export(storage, history):
+    workouts = await load(storage, history)
+    newest_first = sorted(workouts, key=lambda w: w["date"], reverse=True)
+
+    recent = await storage.workouts.recent(5)
+    assert [w["date"] for w in recent] == [w["date"] for w in newest_first[:5]]
+
+    exported = [w async for w in storage.workouts.export("2026-03-01", "2026-03-20")]
+    expected = sorted(
+        in_range(workouts, "2026-03-01", "2026-03-20"),
+        key=lambda w: (w["date"], w["id"]),
+    )
+    assert [w["id"] for w in exported] == [w["id"] for w in expected]
+    for w in exported:
+        assert not set(w) & set(TOTAL_FIELDS)
+        for e in w["entries"]:
+            assert not set(e) & set(TOTAL_FIELDS)
+
+
+@pytest.mark.parametrize(
+    "start_date, end_date",
+    [
+        (None, None),
+        ("2026-03-01", None),
+        (None, "2026-02-15"),
+        ("2026-03-10", "2026-03-10T23:59:59"),
+    ],
+)
+async def test_totals_match_reference(storage, history, start_date, end_date):
+    workouts = await load(storage, history)
+
+    totals = await storage.workouts.totals(start_date, end_date)
+
+    assert_close(totals, reference_totals(in_range(workouts, start_date, end_date)))
+
+
+async def test_daily_totals_match_reference(storage, history):
+    workouts = await load(storage, history)
+
+    trends = await storage.workouts.daily_totals("2026-02-01", "2026-03-31")
+
+    expected = reference_trends(workouts, "2026-02-01", "2026-03-31")
+    assert [t["date"] for t in trends] == [t["date"] for t in expected]
+    for actual, reference in zip(trends, expected):
+        assert_close(actual, reference)
+
+
+async def test_dashboard_combines_totals_and_trends(storage, history):
+    workouts = await load(storage, history)
+
+    totals, trends = await storage.workouts.dashboard(
+        None, None, "2026-03-01", "2026-03-31"
+    )
+
+    assert_close(totals, reference_totals(workouts))
+    assert trends == await storage.workouts.daily_totals("2026-03-01", "2026-03-31")
+
+
+async def test_exercise_progress_matches_reference(storage, history):
+    workouts = await load(storage, history)
+    exercise_ids = {e["exercise_id"] for w in workouts for e in w["entries"]}
+
+    for exercise_id in sorted(exercise_ids):
+        progress = await storage.workouts.exercise_progress(exercise_id, "2026-02-01")
+        expected = reference_progress(workouts, exercise_id, "2026-02-01")
+        assert [p["date"] for p in progress] == [p["date"] for p in expected]
+        for actual, reference in zip(progress, expected):
+            assert_close(actual, reference)
+
+
+async def test_views_follow_deletes(storage, history):
+    workouts = await load(storage, history)
+    removed = [w for w in workouts if w["date"][:10] == "2026-03-10"]
+
+    for w in removed:
+        await storage.workouts.delete(w["id"])
+
+    remaining = [w for w in workouts if w not in removed]
+    assert_close(await storage.workouts.totals(None, None), reference_totals(remaining))
+    trends = await storage.workouts.daily_totals("2026-03-01", "2026-03-31")
+    assert "2026-03-10" not in [t["date"] for t in trends]
+    assert await storage.workouts.exercise_progress("squat", "2026-03-01") == []
+    streaks = await storage.workouts.streaks()
+    assert streaks["runs"] == streaks_doc(w["date"] for w in remaining)["runs"]
+
+
+async def test_streaks_match_rebuild(storage, history):
+    workouts = await load(storage, history)
+
+    streaks = await storage.workouts.streaks()
+
+    expected = streaks_doc(w["date"] for w in workouts)
+    assert streaks["runs"] == expected["runs"]
+    assert streaks["longest"] == expected["longest"]
+
+
+async def test_streaks_since(storage, history):
+    workouts = await load(storage, history)
+    expected = streaks_doc(w["date"] for w in workouts)
+    # A day inside a run, so the run starting before it is kept
+    inside = next(run for run in expected["runs"] if run[0] < run[1])
+    since = inside[1]
+
+    streaks = await storage.workouts.streaks(since)
+
+    assert streaks["runs"] == [r for r in expected["runs"] if r[1] >= since]
+    assert streaks["runs"][0] == inside
+    assert streaks["longest"] == expected["longest"]
+
+
+async def test_streaks_follow_random_deletes(storage, history):
+    workouts = await load(storage, history)
+    remaining = list(workouts)
+    random.Random(0).shuffle(remaining)
+
+    while len(remaining) > 1000:
+        await storage.workouts.delete(remaining.pop()["id"])
+
+    streaks = await storage.workouts.streaks()
+    expected = streaks_doc(w["date"] for w in remaining)
+    assert streaks["runs"] == expected["runs"]
+    assert streaks["longest"] == expected["longest"]
+
+
+async def test_sqlite_backfills_streak_runs(tmp_path, history):
+    from storage.sqlite import SqliteStorage
+
+    storage = SqliteStorage(str(tmp_path / "workouts.sqlite3"))
+    workouts = await load(storage, history)
+    # A database written before the runs were kept
+    await storage.database.execute("DELETE FROM streak_runs")
+
+    await storage.prepare()
+
+    streaks = await storage.workouts.streaks()
+    assert streaks["runs"] == streaks_doc(w["date"] for w in workouts)["runs"]
+    storage.close()
+
+
+async def test_templates(storage):
+    for i in range(3):
+        await storage.templates.add(
+            {
+                "id": f"t{i}",
+                "name": f"Day {i}",
+                "description": None,
+                "exercises": [],
+                "created_at": f"2026-01-0{i + 1}T00:00:00+00:00",
+            }
+        )
+
+    assert [t["id"] for t in await storage.templates.list(2)] == ["t2", "t1"]
+    updated = await storage.templates.update("t0", {"name": "Legs"})
+    assert updated["name"] == "Legs"
+    assert (await storage.templates.get("t0"))["name"] == "Legs"
+    assert await storage.templates.update("missing", {"name": "x"}) is None
+    assert await storage.templates.delete("t0") is True
+    assert await storage.templates.delete("t0") is False
+    assert await storage.templates.get("t0") is None
+
+
+async def test_versions(storage):
+    before = await storage.versions.get(["workouts", "templates"])
+
+    await storage.versions.bump("workouts")
+
+    after = await storage.versions.get(["workouts", "templates"])
+    assert after[0] != before[0]
+    assert after[1] == before[1]
+
+
+async def test_clear(storage, history):
+    await load(storage, history)
+
+    await storage.clear()
+
+    assert await storage.exercises.count() == 0
+    assert await storage.workouts.recent(5) == []
+    assert await storage.workouts.daily_totals("2026-01-01", "2026-12-31") == []
@@ -0,0 +1,328 @@
+"""Incremental workout streaks (``streaks.py``)."""
+
+import copy
+import random
+from datetime import date, timedelta
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from streaks import (
+    MAX_RUNS,
+    STREAKS_ID,
+    add_day,
+    add_workout_days,
+    count_days,
+    get_streaks,
+    remove_day,
+    remove_workout_day,
+    run_length,
+    streak_stats,
+    streaks_doc,
+)
+
+
+def day(n: int) -> str:
+    return (date(2026, 1, 1) + timedelta(days=n)).isoformat()
+
+
+def runs_of(*days: int):
+    doc = streaks_doc(day(n) for n in days)
+    return doc["runs"], doc["longest"]
+
+
+def test_add_day_starts_extends_and_merges_runs():
+    runs, longest = runs_of(1, 2, 5)
+
+    runs, longest = add_day(runs, longest, day(8))
+    assert runs == [[day(1), day(2)], [day(5), day(5)], [day(8), day(8)]]
+    runs, longest = add_day(runs, longest, day(6))
+    assert runs == [[day(1), day(2)], [day(5), day(6)], [day(8), day(8)]]
+    runs, longest = add_day(runs, longest, day(4))
+    assert runs == [[day(1), day(2)], [day(4), day(6)], [day(8), day(8)]]
+    assert longest == [day(4), day(6)]
+
+    # Bridging the gap merges both neighbours into one run
+    runs, longest = add_day(runs, longest, day(7))
+    assert runs == [[day(1), day(2)], [day(4), day(8)]]
+    assert longest == [day(4), day(8)]
+
+
+def test_add_day_already_counted_is_a_no_op():
+    runs, longest = runs_of(1, 2, 3)
+
+    for n in (1, 2, 3):
+        new_runs, new_longest = add_day(runs, longest, day(n))
+        # The very same list, which tells ``_update`` there is nothing to write
+        assert new_runs is runs
+        assert new_longest == longest
+
+
+def test_remove_day_splits_and_shortens_runs():
+    runs, longest = runs_of(1, 2, 3, 4, 5, 8, 9, 10)
+
+    runs, longest = remove_day(runs, longest, day(3))
+    assert runs == [[day(1), day(2)], [day(4), day(5)], [day(8), day(10)]]
+    # The longest run was split, so the next longest takes over
+    assert longest == [day(8), day(10)]
+
+    runs, longest = remove_day(runs, longest, day(10))
+    assert runs == [[day(1), day(2)], [day(4), day(5)], [day(8), day(9)]]
+    assert longest == [day(1), day(2)]
+
+    runs, longest = remove_day(runs, longest, day(4))
+    runs, longest = remove_day(runs, longest, day(5))
+    assert runs == [[day(1), day(2)], [day(8), day(9)]]
+
+
+def test_remove_day_without_a_workout_is_a_no_op():
+    runs, longest = runs_of(1, 2, 5)
+
+    for n in (0, 3, 6):
+        new_runs, new_longest = remove_day(runs, longest, day(n))
+        assert new_runs is runs
+        assert new_longest == longest
+
+
+def test_random_edits_match_a_rebuild():
+    rng = random.Random(0)
+    days = set()
+    runs, longest = [], None
+    for _ in range(2000):
+        n = rng.randrange(60)
+        if rng.random() < 0.6:
+            days.add(n)
+            runs, longest = add_day(runs, longest, day(n))
+        else:
+            days.discard(n)
+            runs, longest = remove_day(runs, longest, day(n))
+        expected = streaks_doc(day(n) for n in days)
+        assert runs == expected["runs"]
+        # Among runs of equal length either may be kept; only its length
+        # is ever read
+        if runs:
+            assert longest in runs
+            assert run_length(longest) == run_length(expected["longest"])
+        else:
+            assert longest is None
+
+
+def test_streak_stats_and_day_counts():
+    runs, longest = runs_of(1, 2, 3, 4, 10, 11)
+    doc = {"runs": runs, "longest": longest}
+
+    assert streak_stats(doc, date.fromisoformat(day(11))) == (2, 4)
+    assert streak_stats(doc, date.fromisoformat(day(12))) == (2, 4)
+    assert streak_stats(doc, date.fromisoformat(day(13))) == (0, 4)
+    # A window clips the runs to it
+    assert streak_stats(doc, date.fromisoformat(day(11)), day(3)) == (2, 2)
+    assert count_days(doc, day(3), day(10)) == 3
+    assert count_days(doc) == 6
+
+
+class FakeStreaks:
+    """Just enough of a collection for ``streaks._update``, with a hook to
+    simulate another writer getting in between its read and its write."""
+
+    def __init__(self, doc=None):
+        self.doc = doc
+        self.before_write = None
+        self.writes = 0
+
+    async def find_one(self, query):
+        return copy.deepcopy(self.doc)
+
+    async def update_one(self, query, update, upsert=False):
+        if self.before_write:
+            hook, self.before_write = self.before_write, None
+            hook(self)
+        self.writes += 1
+        if self.doc is None or self.doc.get("version") != query.get("version"):
+            if self.doc is not None and upsert and "version" in query:
+                # The upsert would insert a second document with the same _id
+                raise DuplicateKeyError("duplicate key")
+            if not upsert:
+                return type("Result", (), {"matched_count": 0, "upserted_id": None})
+        doc = self.doc or {"_id": STREAKS_ID, "version": 0}
+        self.doc = {
+            **doc,
+            **copy.deepcopy(update["$set"]),
+            "version": doc["version"] + update["$inc"]["version"],
+        }
+        return type("Result", (), {"matched_count": 1, "upserted_id": None})
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class FakeArchive:
+    """The ``streak_archive`` collection, counting reads."""
+
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+
+    def find(self, query):
+        self.reads += 1
+        ids = query["_id"]["$in"]
+        return FakeCursor([copy.deepcopy(self.docs[i]) for i in ids if i in self.docs])
+
+    async def insert_many(self, docs):
+        for doc in docs:
+            self.docs[doc["_id"]] = copy.deepcopy(doc)
+
+    async def delete_many(self, query):
+        if "$in" in query["_id"]:
+            doomed = set(query["_id"]["$in"])
+        else:
+            doomed = set(self.docs) - set(query["_id"]["$nin"])
+        for archive_id in doomed:
+            self.docs.pop(archive_id, None)
+
+
+class FakeDb:
+    def __init__(self, streaks, rollup_days=()):
+        self.streaks = streaks
+        self.streak_archive = FakeArchive()
+        self.daily_rollups = FakeRollups(rollup_days)
+
+
+class FakeRollups:
+    def __init__(self, days):
+        self.days = set(days)
+
+    async def find_one(self, query):
+        return {"_id": query["_id"]} if query["_id"] in self.days else None
+
+
+@pytest.mark.anyio
+async def test_update_retries_after_a_concurrent_write():
+    runs, longest = runs_of(1, 2)
+    streaks = FakeStreaks(
+        {"_id": STREAKS_ID, "runs": runs, "longest": longest, "version": 1}
+    )
+
+    def concurrent_add(collection):
+        collection.doc["runs"], collection.doc["longest"] = add_day(
+            collection.doc["runs"], collection.doc["longest"], day(3)
+        )
+        collection.doc["version"] += 1
+
+    streaks.before_write = concurrent_add
+    await add_workout_days(FakeDb(streaks), [day(5)])
+
+    # The first write lost the race; the retry kept both days
+    assert streaks.writes == 2
+    assert streaks.doc["runs"] == [[day(1), day(3)], [day(5), day(5)]]
+    assert streaks.doc["version"] == 3
+
+
+@pytest.mark.anyio
+async def test_update_creates_the_document_once():
+    streaks = FakeStreaks()
+
+    def concurrent_create(collection):
+        collection.doc = {"_id": STREAKS_ID, "version": 1}
+        collection.doc["runs"], collection.doc["longest"] = runs_of(9)
+
+    streaks.before_write = concurrent_create
+    await add_workout_days(FakeDb(streaks), [day(1)])
+
+    assert streaks.doc["runs"] == [[day(1), day(1)], [day(9), day(9)]]
+
+
+@pytest.mark.anyio
+async def test_no_op_updates_do_not_write():
+    runs, longest = runs_of(1, 2)
+    streaks = FakeStreaks(
+        {"_id": STREAKS_ID, "runs": runs, "longest": longest, "version": 1}
+    )
+    db = FakeDb(streaks, rollup_days=[day(2)])
+
+    await add_workout_days(db, [day(1), "not a date"])
+    # Another workout is still logged on that day
+    await remove_workout_day(db, day(2))
+
+    assert streaks.writes == 0
+    await remove_workout_day(db, day(1))
+    assert streaks.doc["runs"] == [[day(2), day(2)]]
+
+
+def assert_archived_consistently(db):
+    """The document stays small and every archive document it refers to,
+    and no other, exists."""
+    doc = db.streaks.doc
+    assert len(doc["runs"]) <= MAX_RUNS
+    archive = {entry["id"] for entry in doc.get("archive", [])}
+    assert archive == set(db.streak_archive.docs)
+
+
+@pytest.mark.anyio
+async def test_old_runs_move_to_the_archive():
+    db = FakeDb(FakeStreaks())
+    # A week-long streak first, then single days two days apart
+    days = list(range(7)) + list(range(10, 10 + 2 * 300, 2))
+
+    for n in days:
+        await add_workout_days(db, [day(n)])
+
+    assert_archived_consistently(db)
+    assert len(db.streak_archive.docs) > 1
+    expected = streaks_doc(day(n) for n in days)
+    doc = await get_streaks(db)
+    assert doc["runs"] == expected["runs"]
+    assert doc["longest"] == [day(0), day(6)]
+
+    # Recent windows are answered from the document alone
+    reads = db.streak_archive.reads
+    recent = await get_streaks(db, day(days[-1] - 30))
+    assert db.streak_archive.reads == reads
+    assert recent["runs"] == [r for r in expected["runs"] if r[1] >= day(days[-1] - 30)]
+    assert recent["longest"] == [day(0), day(6)]
+
+
+@pytest.mark.anyio
+async def test_random_edits_with_an_archive_match_a_rebuild():
+    rng = random.Random(1)
+    db = FakeDb(FakeStreaks())
+    days = set()
+    for _ in range(1500):
+        n = rng.randrange(600)
+        if rng.random() < 0.6:
+            days.add(n)
+            await add_workout_days(db, [day(n)])
+        else:
+            days.discard(n)
+            db.daily_rollups.days = {day(n) for n in days}
+            await remove_workout_day(db, day(n))
+
+    assert_archived_consistently(db)
+    expected = streaks_doc(day(n) for n in days)
+    doc = await get_streaks(db)
+    assert doc["runs"] == expected["runs"]
+    assert run_length(doc["longest"]) == run_length(expected["longest"])
+    since = day(450)
+    recent = await get_streaks(db, since)
+    assert recent["runs"] == [r for r in expected["runs"] if r[1] >= since]
+
+
+@pytest.mark.anyio
+async def test_failed_update_removes_its_archive_documents():
+    db = FakeDb(FakeStreaks())
+    await add_workout_days(db, [day(2 * n) for n in range(MAX_RUNS)])
+
+    def concurrent_add(collection):
+        collection.doc["version"] += 1
+
+    db.streaks.before_write = concurrent_add
+    # Pushes the document over the cap, but loses the race the first time
+    await add_workout_days(db, [day(2 * MAX_RUNS)])
+
+    assert db.streaks.writes == 3
+    assert_archived_consistently(db)
+    assert len(db.streak_archive.docs) == 1
@@ -0,0 +1,91 @@
+"""Several app instances on one shared store, the way the launcher runs
+worker processes: a write through one is seen by the next read through
+any other, with no stale 304 or cached response in between."""
+
+import importlib.util
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def load_worker(name: str):
+    """A fresh copy of the app module, with storage of its own."""
+    origin = importlib.util.find_spec("server").origin
+    spec = importlib.util.spec_from_file_location(name, origin)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+async def workers(monkeypatch, tmp_path):
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "shared.sqlite3"))
+    modules = [load_worker(f"worker_{i}") for i in range(2)]
+    await modules[0].prepare_database(modules[0].storage)
+    clients = [
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=module.app), base_url="http://test"
+        )
+        for module in modules
+    ]
+    yield clients
+    for client, module in zip(clients, modules):
+        await client.aclose()
+        module.storage.close()
+
+
+async def test_writes_are_seen_by_other_workers(workers):
+    writer, reader = workers
+    squat = (await reader.get("/api/exercises", params={"search": "squat"})).json()[0]
+    today = datetime.now(timezone.utc).date().isoformat()
+    reads = {
+        path: await reader.get(path)
+        for path in ("/api/stats", "/api/trends", "/api/dashboard")
+    }
+    progress = await reader.get(f"/api/progress/{squat['id']}")
+
+    created = await writer.post(
+        "/api/workouts",
+        json={
+            "date": today,
+            "entries": [
+                {
+                    "exercise_id": squat["id"],
+                    "exercise_name": squat["name"],
+                    "category": "strength",
+                    "sets": [{"set_number": 1, "reps": 5, "weight": 100}],
+                }
+            ],
+        },
+    )
+    assert created.status_code == 200
+
+    for path, before in reads.items():
+        after = await reader.get(
+            path, headers={"If-None-Match": before.headers["etag"]}
+        )
+        assert after.status_code == 200, path
+        assert after.json() != before.json(), path
+    assert (await reader.get("/api/stats")).json()["total_workouts"] == 1
+    after = await reader.get(f"/api/progress/{squat['id']}")
+    assert after.json() != progress.json()
+
+
+async def test_new_exercises_are_seen_by_other_workers(workers):
+    writer, reader = workers
+    before = await reader.get("/api/exercises")
+
+    await writer.post(
+        "/api/exercises",
+        json={"name": "Zercher Squat", "category": "strength", "muscle_group": "legs"},
+    )
+
+    after = await reader.get(
+        "/api/exercises", headers={"If-None-Match": before.headers["etag"]}
+    )
+    assert after.status_code == 200
+    assert len(after.json()) == len(before.json()) + 1
@@ -0,0 +1,102 @@
+"""Incremental parsing of bulk workout uploads (``workout_import.py``)."""
+
+import json
+
+import pytest
+
+import workout_import
+from workout_import import parse_json_array
+
+pytestmark = pytest.mark.anyio
+
+WORKOUTS = [
+    {
+        "date": "2026-01-01",
+        "notes": 'a "quoted" [note], with {braces}\\',
+        "entries": [],
+    },
+    {"date": "2026-01-02", "entries": [{"sets": [{"reps": 5}, {"reps": 6}]}]},
+]
+
+
+async def parse(body: str, chunk_size: int) -> list:
+    data = body.encode()
+
+    async def chunks():
+        for i in range(0, len(data), chunk_size):
+            yield data[i : i + chunk_size]
+
+    return [
+        (record, str(value) if isinstance(value, ValueError) else value)
+        async for record, value in parse_json_array(chunks())
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+async def test_elements_across_chunks(chunk_size):
+    assert await parse(json.dumps(WORKOUTS), chunk_size) == list(enumerate(WORKOUTS))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+async def test_malformed_element_is_skipped(chunk_size):
+    first, last = (json.dumps(w) for w in WORKOUTS)
+    body = f'[{first}, {{"date": "2026-01-05", "entries": [,]}}, 42, {last}]'
+
+    records = await parse(body, chunk_size)
+
+    assert records[0] == (0, WORKOUTS[0])
+    assert records[1][0] == 1 and records[1][1].startswith("Invalid JSON")
+    assert records[2] == (2, "Each workout must be a JSON object")
+    assert records[3] == (3, WORKOUTS[1])
+
+
+async def test_oversized_element_is_skipped(monkeypatch):
+    monkeypatch.setattr(workout_import, "MAX_RECORD_CHARS", 150)
+    big = {"date": "2026-01-03", "notes": "x" * 500, "entries": []}
+    body = json.dumps([WORKOUTS[0], big, WORKOUTS[1]])
+
+    records = await parse(body, 16)
+
+    assert records == [
+        (0, WORKOUTS[0]),
+        (1, "Workout is too large"),
+        (2, WORKOUTS[1]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        ("", "Empty body"),
+        ('{"date": "2026-01-01"}', "Expected a JSON array of workouts"),
+        ('[{"date": "2026-01-01"}', "JSON array is not closed"),
+        ('[{"date": "2026-01-01"', "JSON array is not closed"),
+    ],
+)
+async def test_broken_arrays(body, error):
+    records = await parse(body, 4)
+
+    assert records[-1][1] == error
+
+
+async def test_api_imports_around_a_malformed_workout(client):
+    exercises = (await client.get("/api/exercises")).json()
+    entry = {
+        "exercise_id": exercises[0]["id"],
+        "exercise_name": exercises[0]["name"],
+        "category": exercises[0]["category"],
+        "sets": [{"set_number": 1, "reps": 5, "weight": 100}],
+    }
+    good = json.dumps({"date": "2026-01-01", "entries": [entry]})
+    body = f'[{good}, {{"date": "2026-01-02", "entries": [}}, {good}]'
+
+    response = await client.post(
+        "/api/workouts/import",
+        content=body,
+        headers={"Content-Type": "application/json"},
+    )
+
+    result = response.json()
+    assert result["imported"] == 2
+    assert result["failed"] == 1
+    assert result["errors"][0]["record"] == 1